@@ -5,19 +5,20 @@ from alembic import context
 import sys
 from pathlib import Path
 
-# Add backend directory to path
+# Add the project root to path so the backend package imports
 backend_dir = Path(__file__).resolve().parent.parent
-sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
 
 from backend.db.database import Base
-from backend.db.models import User, FailedLogin, PasswordReset, Assessment, AssessmentResult
+from backend.db import models  # noqa: F401 - registers every table on Base.metadata
 from backend.config import settings
 
 # Alembic Config object
 config = context.config
 
-# Set database URL from settings
-config.set_main_option("sqlalchemy.url", settings.database_url)
+# Set database URL from settings, unless a caller passed its own connection
+if "connection" not in config.attributes:
+    config.set_main_option("sqlalchemy.url", settings.database_url)
 
 # Interpret the config file for Python logging
 if config.config_file_name is not None:
@@ -43,6 +44,11 @@ def run_migrations_offline() -> None:
 
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -50,12 +56,19 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+        run_migrations(connection)
+
+
+def run_migrations(connection) -> None:
+    # Batch mode lets SQLite alter constraints by copying the table
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
 
-        with context.begin_transaction():
-            context.run_migrations()
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,23 @@
+"""Index for keyset pagination of a user's assessments
+
+Revision ID: 0002_04_assessment_listing_index
+Revises: 0002_03_user_admin_flag
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_04_assessment_listing_index'
+down_revision = '0002_03_user_admin_flag'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_assessments_user_created_id', 'assessments', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assessments_user_created_id', table_name='assessments')
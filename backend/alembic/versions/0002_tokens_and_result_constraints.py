@@ -0,0 +1,43 @@
+"""One result per category
+
+Revision ID: 0002_tokens_and_result_constraints
+Revises: 0002_04_assessment_listing_index
+Create Date: 2026-10-17 00:00:00.000000
+
+The revision ID predates the split of the token tables, admin flag and
+listing index into their own revisions and is kept so databases already at
+or past it upgrade unchanged.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_tokens_and_result_constraints'
+down_revision = '0002_04_assessment_listing_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the latest result of any category submitted more than once, then
+    # enforce one result per category for the answer upsert
+    results = sa.table(
+        'assessment_results',
+        sa.column('id', sa.Integer),
+        sa.column('assessment_id', sa.Integer),
+        sa.column('category', sa.String)
+    )
+    latest = (
+        sa.select(sa.func.max(results.c.id))
+        .group_by(results.c.assessment_id, results.c.category)
+        .scalar_subquery()
+    )
+    op.execute(results.delete().where(results.c.id.not_in(latest)))
+    with op.batch_alter_table('assessment_results') as batch_op:
+        batch_op.create_unique_constraint('uq_assessment_results_assessment_category', ['assessment_id', 'category'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('assessment_results') as batch_op:
+        batch_op.drop_constraint('uq_assessment_results_assessment_category', type_='unique')
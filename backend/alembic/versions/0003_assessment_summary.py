@@ -0,0 +1,102 @@
+"""Store each assessment's summary on its row
+
+Revision ID: 0003_assessment_summary
+Revises: 0002_tokens_and_result_constraints
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from collections import defaultdict
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_assessment_summary'
+down_revision = '0002_tokens_and_result_constraints'
+branch_labels = None
+depends_on = None
+
+# Assessments backfilled per round trip
+BATCH_SIZE = 500
+
+assessments = sa.table(
+    'assessments',
+    sa.column('id', sa.Integer),
+    sa.column('overall_score', sa.Integer),
+    sa.column('overall_maturity', sa.String),
+    sa.column('category_scores', sa.JSON)
+)
+results = sa.table(
+    'assessment_results',
+    sa.column('id', sa.Integer),
+    sa.column('assessment_id', sa.Integer),
+    sa.column('category', sa.String),
+    sa.column('score', sa.Integer)
+)
+
+
+def maturity_level(score: int) -> str:
+    """Maturity thresholds as of this revision"""
+    for limit, level in ((20, 'initial'), (40, 'developing'), (60, 'defined'), (80, 'managed')):
+        if score < limit:
+            return level
+    return 'optimized'
+
+
+def backfill(bind) -> None:
+    """Summarize existing results, walking assessments by primary key in batches"""
+    update = (
+        assessments.update()
+        .where(assessments.c.id == sa.bindparam('assessment_id'))
+        .values(
+            overall_score=sa.bindparam('score'),
+            overall_maturity=sa.bindparam('maturity'),
+            category_scores=sa.bindparam('scores', type_=sa.JSON)
+        )
+    )
+    last_id = 0
+    while True:
+        ids = bind.execute(
+            sa.select(assessments.c.id)
+            .where(assessments.c.id > last_id)
+            .order_by(assessments.c.id)
+            .limit(BATCH_SIZE)
+        ).scalars().all()
+        if not ids:
+            break
+
+        scores = defaultdict(dict)
+        for row in bind.execute(
+            sa.select(results.c.assessment_id, results.c.category, results.c.score)
+            .where(results.c.assessment_id.in_(ids))
+            .order_by(results.c.id)
+        ):
+            scores[row.assessment_id][row.category] = row.score
+
+        rows = []
+        for assessment_id, category_scores in scores.items():
+            overall = sum(category_scores.values()) // len(category_scores)
+            rows.append({
+                'assessment_id': assessment_id,
+                'score': overall,
+                'maturity': maturity_level(overall),
+                'scores': category_scores
+            })
+        if rows:
+            bind.execute(update, rows)
+        last_id = ids[-1]
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('assessments') as batch_op:
+        batch_op.add_column(sa.Column('overall_score', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('overall_maturity', sa.String(length=50), server_default='initial', nullable=False))
+        batch_op.add_column(sa.Column('category_scores', sa.JSON(), server_default=sa.text("'{}'"), nullable=False))
+    backfill(op.get_bind())
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('assessments') as batch_op:
+        batch_op.drop_column('category_scores')
+        batch_op.drop_column('overall_maturity')
+        batch_op.drop_column('overall_score')
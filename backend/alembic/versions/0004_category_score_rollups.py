@@ -0,0 +1,35 @@
+"""Per-category score histograms across all assessments
+
+Revision ID: 0004_category_score_rollups
+Revises: 0003_assessment_summary
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_category_score_rollups'
+down_revision = '0003_assessment_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'category_score_rollups',
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('category', 'score')
+    )
+    # One grouped INSERT ... SELECT; the table holds at most 101 rows per category
+    op.execute(
+        "INSERT INTO category_score_rollups (category, score, count) "
+        "SELECT category, score, COUNT(*) FROM assessment_results GROUP BY category, score"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('category_score_rollups')
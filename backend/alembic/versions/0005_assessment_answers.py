@@ -0,0 +1,110 @@
+"""Per-question answers extracted from assessment_results.questions
+
+Revision ID: 0005_assessment_answers
+Revises: 0004_category_score_rollups
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_assessment_answers'
+down_revision = '0004_category_score_rollups'
+branch_labels = None
+depends_on = None
+
+# Results expanded per round trip by the portable backfill
+BATCH_SIZE = 500
+
+results = sa.table(
+    'assessment_results',
+    sa.column('id', sa.Integer),
+    sa.column('assessment_id', sa.Integer),
+    sa.column('category', sa.String),
+    sa.column('questions', sa.JSON),
+    sa.column('created_at', sa.DateTime)
+)
+answers = sa.table(
+    'assessment_answers',
+    sa.column('assessment_id', sa.Integer),
+    sa.column('category', sa.String),
+    sa.column('question_id', sa.String),
+    sa.column('value', sa.Integer),
+    sa.column('answered_at', sa.DateTime)
+)
+
+# Expands every result's answer map into rows in one INSERT ... SELECT
+BACKFILL = {
+    'sqlite': (
+        "INSERT INTO assessment_answers (assessment_id, category, question_id, value, answered_at) "
+        "SELECT r.assessment_id, r.category, a.key, CAST(a.value AS INTEGER), r.created_at "
+        "FROM assessment_results r, json_each(r.questions) a"
+    ),
+    'postgresql': (
+        "INSERT INTO assessment_answers (assessment_id, category, question_id, value, answered_at) "
+        "SELECT r.assessment_id, r.category, a.key, CAST(a.value AS INTEGER), r.created_at "
+        "FROM assessment_results r, json_each_text(r.questions) a"
+    ),
+}
+
+
+def backfill(bind) -> None:
+    """Expand answer maps in Python, walking results by primary key in batches
+
+    Used on databases without a JSON table function in BACKFILL.
+    """
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(results)
+            .where(results.c.id > last_id)
+            .order_by(results.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        values = [
+            {
+                'assessment_id': row.assessment_id,
+                'category': row.category,
+                'question_id': question_id,
+                'value': int(value),
+                'answered_at': row.created_at
+            }
+            for row in rows
+            for question_id, value in (row.questions or {}).items()
+        ]
+        if values:
+            bind.execute(answers.insert(), values)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        'assessment_answers',
+        sa.Column('assessment_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('question_id', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.Column('answered_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['assessment_id'], ['assessments.id']),
+        sa.PrimaryKeyConstraint('assessment_id', 'category', 'question_id')
+    )
+    op.create_index(
+        'ix_assessment_answers_question_answered',
+        'assessment_answers',
+        ['category', 'question_id', 'answered_at', 'value'],
+        unique=False
+    )
+    bind = op.get_bind()
+    if bind.dialect.name in BACKFILL:
+        op.execute(BACKFILL[bind.dialect.name])
+    else:
+        backfill(bind)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assessment_answers_question_answered', table_name='assessment_answers')
+    op.drop_table('assessment_answers')
@@ -0,0 +1,31 @@
+"""Shared sliding-window login failure counters
+
+Revision ID: 0006_login_attempt_counters
+Revises: 0005_assessment_answers
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_login_attempt_counters'
+down_revision = '0005_assessment_answers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'login_attempt_counters',
+        sa.Column('key', sa.String(length=100), nullable=False),
+        sa.Column('window_index', sa.Integer(), nullable=False),
+        sa.Column('current_count', sa.Integer(), nullable=False),
+        sa.Column('previous_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('login_attempt_counters')
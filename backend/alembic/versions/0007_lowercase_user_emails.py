@@ -0,0 +1,58 @@
+"""Store user emails in lowercase
+
+Revision ID: 0007_lowercase_user_emails
+Revises: 0006_login_attempt_counters
+Create Date: 2026-10-17 00:00:00.000000
+
+Signup, login and provisioning now normalize emails to lowercase, so the
+unique index on users.email also rejects addresses differing only in case.
+"""
+from collections import defaultdict
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_lowercase_user_emails'
+down_revision = '0006_login_attempt_counters'
+branch_labels = None
+depends_on = None
+
+users = sa.table(
+    'users',
+    sa.column('id', sa.Integer),
+    sa.column('email', sa.String)
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Lowercase in Python so stored emails match the application's normalization
+    accounts = defaultdict(list)
+    for row in bind.execute(sa.select(users.c.id, users.c.email)):
+        accounts[row.email.strip().lower()].append(row)
+
+    conflicts = sorted(email for email, rows in accounts.items() if len(rows) > 1)
+    if conflicts:
+        raise ValueError(
+            "Accounts differ only in email letter case; merge or rename them before upgrading: "
+            + ", ".join(conflicts)
+        )
+
+    changed = [
+        {'user_id': rows[0].id, 'normalized': email}
+        for email, rows in accounts.items()
+        if rows[0].email != email
+    ]
+    if changed:
+        bind.execute(
+            users.update()
+            .where(users.c.id == sa.bindparam('user_id'))
+            .values(email=sa.bindparam('normalized')),
+            changed
+        )
+
+
+def downgrade() -> None:
+    # The original letter case is not kept, and lowercase emails stay valid
+    pass
@@ -0,0 +1,139 @@
+"""
+Vectorized scoring of many answer sets per category
+
+Answer sets are rows of an integer matrix whose columns follow the compiled
+questionnaire's question order (unanswered questions are 0). A whole matrix
+is validated, scored and mapped to maturity levels with a handful of NumPy
+operations, giving the same results as CompiledQuestionnaire.score row by row.
+
+The what-if analysis builds one row per single-question upgrade of an
+assessment's current answers and scores them all in one batch per category.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from backend.db.models import Assessment
+from backend.assessments.questionnaire import (
+    questionnaire_registry,
+    MATURITY_ORDER,
+    MATURITY_THRESHOLDS,
+    AssessmentCategory,
+    CompiledQuestionnaire,
+    InvalidAnswersError
+)
+
+_THRESHOLDS = np.array(MATURITY_THRESHOLDS)
+_LEVELS = np.array([level.value for level in MATURITY_ORDER])
+
+
+def answer_matrix(questionnaire: CompiledQuestionnaire, answer_sets: Iterable[Dict[str, int]]) -> np.ndarray:
+    """Lay out answer dicts as matrix rows in the questionnaire's question order
+
+    Question IDs the questionnaire does not have are ignored; score_batch
+    validates the values.
+    """
+    index = questionnaire.index
+    rows = []
+    for answers in answer_sets:
+        row = [0] * len(index)
+        for question_id, value in answers.items():
+            i = index.get(question_id)
+            if i is not None:
+                row[i] = value
+        rows.append(row)
+    return np.array(rows, dtype=np.int64).reshape(len(rows), len(index))
+
+
+def score_batch(
+    questionnaire: CompiledQuestionnaire,
+    matrix: np.ndarray,
+    validate: bool = True
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Score every row of an answer matrix, returning (scores, maturity levels)
+
+    Raises InvalidAnswersError if validate is set and any value is not one of
+    its question's options.
+    """
+    category = questionnaire.category
+    matrix = np.asarray(matrix, dtype=np.int64)
+    if matrix.ndim != 2 or matrix.shape[1] != len(questionnaire.question_ids):
+        raise ValueError(
+            f"Expected a matrix with {len(questionnaire.question_ids)} columns for {category.value}, got shape {matrix.shape}"
+        )
+
+    if validate:
+        problems = []
+        for i, question_id in enumerate(questionnaire.question_ids):
+            invalid = np.unique(matrix[:, i][~np.isin(matrix[:, i], questionnaire.option_values[i])])
+            if invalid.size:
+                problems.append(f"{question_id} must be one of {list(questionnaire.option_values[i])}, got {invalid.tolist()}")
+        if problems:
+            raise InvalidAnswersError(category, problems)
+
+    # Same float normalization as CompiledQuestionnaire.score, truncated toward zero
+    if questionnaire.total_weight > 0:
+        scores = (matrix.sum(axis=1) / questionnaire.total_weight * 100).astype(np.int64)
+    else:
+        scores = np.zeros(len(matrix), dtype=np.int64)
+    return scores, _LEVELS[np.searchsorted(_THRESHOLDS, scores, side="right")]
+
+
+def rank_upgrades(
+    assessment: Assessment,
+    category: Optional[AssessmentCategory] = None,
+    limit: Optional[int] = None
+) -> List[dict]:
+    """Rank every single-question upgrade of an assessment's answers by score gain
+
+    An upgrade raises one answered category's question to a higher option,
+    leaving every other answer as submitted. Categories without results are
+    skipped, since they do not count towards the overall score yet. Scores
+    use the questionnaire version the assessment was created with.
+    """
+    questionnaires = questionnaire_registry.get(assessment.schema_version)
+    results = {r.category: r for r in assessment.results}
+    category_scores = dict(assessment.category_scores or {})
+    upgrades = []
+    for result_category, result in results.items():
+        try:
+            current_category = AssessmentCategory(result_category)
+        except ValueError:
+            continue
+        if category is not None and current_category != category:
+            continue
+        questionnaire = questionnaires.compiled[current_category]
+        current = answer_matrix(questionnaire, [result.questions or {}])[0]
+
+        # One row per (question, higher option): the current answers with that one value raised
+        columns, values = [], []
+        for i, options in enumerate(questionnaire.option_values):
+            for value in options:
+                if value > current[i]:
+                    columns.append(i)
+                    values.append(value)
+        if not columns:
+            continue
+        candidates = np.repeat(current[np.newaxis, :], len(columns), axis=0)
+        candidates[np.arange(len(columns)), columns] = values
+
+        current_score = int(score_batch(questionnaire, current[np.newaxis, :], validate=False)[0][0])
+        scores, maturities = score_batch(questionnaire, candidates, validate=False)
+
+        # Overall score if only this category's score changed
+        others = sum(score for key, score in category_scores.items() if key != result_category)
+        count = len(category_scores) or 1
+        overall = (others + scores) // count
+        for row, column in enumerate(columns):
+            upgrades.append({
+                "category": result_category,
+                "question_id": questionnaire.question_ids[column],
+                "current_value": int(current[column]),
+                "upgraded_value": values[row],
+                "category_score": int(scores[row]),
+                "maturity_level": str(maturities[row]),
+                "score_gain": int(scores[row]) - current_score,
+                "overall_score": int(overall[row]),
+                "overall_gain": int(overall[row]) - assessment.overall_score,
+            })
+
+    upgrades.sort(key=lambda u: (-u["overall_gain"], -u["score_gain"], u["category"], u["question_id"]))
+    return upgrades[:limit] if limit else upgrades
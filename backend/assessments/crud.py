@@ -1,47 +1,81 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime
-from backend.db.models import Assessment, AssessmentResult
+from sqlalchemy import Float, cast, delete, func, insert, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import Counter
+from datetime import datetime, timezone
+from backend.db.models import Assessment, AssessmentResult, AssessmentAnswer, CategoryScoreRollup
+from backend.assessments.pagination import encode_cursor, decode_cursor
 from backend.assessments.questionnaire import (
-    calculate_category_score,
+    questionnaire_registry,
     get_maturity_level,
-    get_recommendations,
-    AssessmentCategory
+    AssessmentCategory,
+    MaturityLevel
 )
 
 
-def create_assessment(db: Session, user_id: int, title: str, description: Optional[str] = None) -> Assessment:
+async def create_assessment(db: AsyncSession, user_id: int, title: str, description: Optional[str] = None) -> Assessment:
     """Create a new assessment"""
     assessment = Assessment(
         user_id=user_id,
         title=title,
         description=description,
-        status="draft"
+        schema_version=questionnaire_registry.default_version,
+        status="draft",
+        results=[]
     )
     db.add(assessment)
-    db.commit()
-    db.refresh(assessment)
+    await db.commit()
     return assessment
 
 
-def get_assessment(db: Session, assessment_id: int, user_id: int) -> Optional[Assessment]:
+# Results are loaded up front with one batched SELECT ... IN per page: async
+# sessions cannot lazy-load, and lazy loading would cost a query per assessment
+WITH_RESULTS = selectinload(Assessment.results)
+
+# A single assessment joins its results into the same statement
+WITH_JOINED_RESULTS = joinedload(Assessment.results)
+
+
+async def get_assessment(db: AsyncSession, assessment_id: int, user_id: int) -> Optional[Assessment]:
     """Get an assessment by ID for a specific user"""
-    return db.query(Assessment).filter(
-        Assessment.id == assessment_id,
-        Assessment.user_id == user_id
-    ).first()
+    return (await db.scalars(
+        select(Assessment)
+        .options(WITH_JOINED_RESULTS)
+        .where(Assessment.id == assessment_id, Assessment.user_id == user_id)
+    )).unique().first()
 
 
-def get_user_assessments(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Assessment]:
-    """Get all assessments for a user"""
-    return db.query(Assessment).filter(
-        Assessment.user_id == user_id
-    ).offset(skip).limit(limit).all()
+async def get_user_assessments(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None
+) -> Tuple[List[Assessment], Optional[str]]:
+    """Get a page of a user's assessments, newest first, and the cursor for the next page"""
+    query = select(Assessment).options(WITH_RESULTS).where(Assessment.user_id == user_id)
+    if status:
+        query = query.where(Assessment.status == status)
+    if cursor:
+        created_at, assessment_id = decode_cursor(cursor)
+        query = query.where(tuple_(Assessment.created_at, Assessment.id) < (created_at, assessment_id))
+    
+    # One extra row tells whether another page follows
+    rows = list(await db.scalars(
+        query.order_by(Assessment.created_at.desc(), Assessment.id.desc()).limit(limit + 1)
+    ))
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+    return page, next_cursor
 
 
-def update_assessment(db: Session, assessment_id: int, user_id: int, **kwargs) -> Optional[Assessment]:
+async def update_assessment(db: AsyncSession, assessment_id: int, user_id: int, **kwargs) -> Optional[Assessment]:
     """Update an assessment"""
-    assessment = get_assessment(db, assessment_id, user_id)
+    assessment = await get_assessment(db, assessment_id, user_id)
     if not assessment:
         return None
     
@@ -49,111 +83,320 @@ def update_assessment(db: Session, assessment_id: int, user_id: int, **kwargs) -
         if value is not None and hasattr(assessment, key):
             setattr(assessment, key, value)
     
-    db.commit()
-    db.refresh(assessment)
+    await db.commit()
     return assessment
 
 
-def delete_assessment(db: Session, assessment_id: int, user_id: int) -> bool:
+async def delete_assessment(db: AsyncSession, assessment_id: int, user_id: int) -> bool:
     """Delete an assessment"""
-    assessment = get_assessment(db, assessment_id, user_id)
+    assessment = await get_assessment(db, assessment_id, user_id)
     if not assessment:
         return False
     
-    db.delete(assessment)
-    db.commit()
+    await db.execute(delete(AssessmentAnswer).where(AssessmentAnswer.assessment_id == assessment_id))
+    await db.delete(assessment)
+    deltas = rollup_deltas(removed=(assessment.category_scores or {}).items())
+    if deltas:
+        await db.execute(rollup_delta_statement(db.get_bind().dialect.name, deltas))
+    await db.commit()
     return True
 
 
-def submit_category_answers(
-    db: Session,
+# INSERT ... ON CONFLICT for each dialect the app runs on
+UPSERT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def upsert_result_statement(dialect: str, rows: List[dict]):
+    """Insert category results, or overwrite the assessment's existing ones, returning the rows"""
+    if dialect not in UPSERT_INSERTS:
+        raise ValueError(f"No upsert support for database backend: {dialect}")
+    statement = UPSERT_INSERTS[dialect](AssessmentResult).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[AssessmentResult.assessment_id, AssessmentResult.category],
+        set_={
+            key: statement.excluded[key]
+            for key in ("questions", "score", "maturity_level", "recommendations", "created_at")
+        }
+    ).returning(AssessmentResult)
+
+
+def rollup_deltas(
+    removed: Iterable[Tuple[str, int]] = (),
+    added: Iterable[Tuple[str, int]] = ()
+) -> List[dict]:
+    """Net rollup count changes for (category, score) results removed and added
+
+    Rows come out sorted so concurrent writers lock rollup rows in the same order.
+    """
+    counts = Counter()
+    counts.subtract(removed)
+    counts.update(added)
+    return [
+        {"category": category, "score": score, "count": count}
+        for (category, score), count in sorted(counts.items())
+        if count
+    ]
+
+
+def rollup_delta_statement(dialect: str, deltas: List[dict]):
+    """Add each delta's count to its (category, score) rollup row, creating missing rows"""
+    if dialect not in UPSERT_INSERTS:
+        raise ValueError(f"No upsert support for database backend: {dialect}")
+    statement = UPSERT_INSERTS[dialect](CategoryScoreRollup).values(deltas)
+    return statement.on_conflict_do_update(
+        index_elements=[CategoryScoreRollup.category, CategoryScoreRollup.score],
+        set_={"count": CategoryScoreRollup.count + statement.excluded.count}
+    )
+
+
+async def submit_answer_batch(
+    db: AsyncSession,
     assessment_id: int,
     user_id: int,
-    category: AssessmentCategory,
-    answers: dict
-) -> Optional[AssessmentResult]:
-    """Submit answers for a category and calculate results"""
-    assessment = get_assessment(db, assessment_id, user_id)
+    answers_by_category: Dict[AssessmentCategory, dict],
+    with_results: bool = False
+) -> Optional[Tuple[Assessment, List[AssessmentResult]]]:
+    """Score answers for any number of categories and save them in one transaction
+
+    Answers are scored with the questionnaire version the assessment was
+    created with. Raises InvalidAnswersError before writing anything if any
+    category's answers are invalid for it, or UnknownSchemaVersionError if
+    that version is no longer available. With with_results, the returned
+    assessment also carries all of its results.
+    """
+    # Locking the assessment serializes submissions to it, so the scores
+    # stored on it stay accurate until commit
+    query = (
+        select(Assessment)
+        .where(Assessment.id == assessment_id, Assessment.user_id == user_id)
+        .with_for_update()
+    )
+    if with_results:
+        # A separate SELECT: FOR UPDATE cannot lock the nullable side of a join
+        query = query.options(WITH_RESULTS)
+    assessment = await db.scalar(query)
     if not assessment:
         return None
     
-    # Calculate score and maturity
-    score = calculate_category_score(answers, category)
-    maturity = get_maturity_level(score)
-    recommendations = get_recommendations(category, score, maturity)
-    
-    # Check if result already exists for this category
-    existing_result = db.query(AssessmentResult).filter(
-        AssessmentResult.assessment_id == assessment_id,
-        AssessmentResult.category == category.value
-    ).first()
-    
-    if existing_result:
-        # Update existing result
-        existing_result.questions = answers
-        existing_result.score = score
-        existing_result.maturity_level = maturity.value
-        existing_result.recommendations = recommendations
-        existing_result.created_at = datetime.utcnow()
-        result = existing_result
-    else:
-        # Create new result
-        result = AssessmentResult(
-            assessment_id=assessment_id,
-            category=category.value,
-            questions=answers,
-            score=score,
-            maturity_level=maturity.value,
-            recommendations=recommendations
+    questionnaires = questionnaire_registry.get(assessment.schema_version)
+    submitted_at = datetime.utcnow()
+    rows = []
+    for category, answers in answers_by_category.items():
+        questionnaire = questionnaires.compiled[category]
+        score = questionnaire.score(answers)
+        maturity = get_maturity_level(score)
+        rows.append({
+            "assessment_id": assessment_id,
+            "category": category.value,
+            "questions": answers,
+            "score": score,
+            "maturity_level": maturity.value,
+            "recommendations": questionnaire.recommendation(maturity),
+            "created_at": submitted_at
+        })
+    
+    # Insert or overwrite every submitted category's result in one statement
+    upserted = {
+        result.category: result
+        for result in await db.scalars(
+            upsert_result_statement(db.get_bind().dialect.name, rows),
+            execution_options={"populate_existing": True}
+        )
+    }
+    
+    if with_results:
+        # Fold new results into the loaded collection without marking it dirty
+        merged = {r.category: r for r in assessment.results}
+        merged.update(upserted)
+        set_committed_value(assessment, "results", sorted(merged.values(), key=lambda r: r.id))
+    
+    # Move each category's rollup count from its previous score to the new one
+    previous_scores = assessment.category_scores or {}
+    deltas = rollup_deltas(
+        removed=[(row["category"], previous_scores[row["category"]]) for row in rows if row["category"] in previous_scores],
+        added=[(row["category"], row["score"]) for row in rows]
+    )
+    if deltas:
+        await db.execute(rollup_delta_statement(db.get_bind().dialect.name, deltas))
+    
+    # Rewrite the submitted categories' rows in the per-question answer table
+    resubmitted = [row["category"] for row in rows if row["category"] in previous_scores]
+    if resubmitted:
+        await db.execute(
+            delete(AssessmentAnswer)
+            .where(AssessmentAnswer.assessment_id == assessment_id, AssessmentAnswer.category.in_(resubmitted))
         )
-        db.add(result)
+    answers = [
+        {
+            "assessment_id": assessment_id,
+            "category": row["category"],
+            "question_id": question_id,
+            "value": value,
+            "answered_at": submitted_at
+        }
+        for row in rows
+        for question_id, value in row["questions"].items()
+    ]
+    if answers:
+        await db.execute(insert(AssessmentAnswer).values(answers))
+    
+    # Fold the new scores into the stored summary; assigning a new dict marks the JSON column dirty
+    category_scores = dict(previous_scores)
+    category_scores.update({row["category"]: row["score"] for row in rows})
+    assessment.category_scores = category_scores
+    assessment.overall_score = sum(category_scores.values()) // len(category_scores)
+    assessment.overall_maturity = get_maturity_level(assessment.overall_score).value
     
     # Update assessment status
     if assessment.status == "draft":
         assessment.status = "in_progress"
     
-    # Check if all categories are completed
-    results_count = db.query(AssessmentResult).filter(
-        AssessmentResult.assessment_id == assessment_id
-    ).count()
-    
-    if results_count >= 4:  # All 4 categories
+    # Complete once every category has a result
+    if len(category_scores) >= len(AssessmentCategory) and assessment.status != "completed":
         assessment.status = "completed"
-        assessment.completed_at = datetime.utcnow()
+        assessment.completed_at = submitted_at
     
-    db.commit()
-    db.refresh(result)
-    return result
+    await db.commit()
+    return assessment, [upserted[row["category"]] for row in rows]
 
 
-def get_assessment_summary(db: Session, assessment_id: int, user_id: int) -> Optional[dict]:
+async def submit_category_answers(
+    db: AsyncSession,
+    assessment_id: int,
+    user_id: int,
+    category: AssessmentCategory,
+    answers: dict
+) -> Optional[AssessmentResult]:
+    """Submit answers for a category and calculate results"""
+    submitted = await submit_answer_batch(db, assessment_id, user_id, {category: answers})
+    if not submitted:
+        return None
+    return submitted[1][0]
+
+
+def summarize_assessment(assessment: Assessment) -> dict:
+    """Summary of an assessment, read from the scores stored on its row"""
+    return {
+        "assessment": assessment,
+        "overall_score": assessment.overall_score,
+        "overall_maturity": assessment.overall_maturity,
+        "category_scores": assessment.category_scores
+    }
+
+
+async def get_assessment_summary(db: AsyncSession, assessment_id: int, user_id: int) -> Optional[dict]:
     """Get assessment summary with overall score"""
-    assessment = get_assessment(db, assessment_id, user_id)
+    assessment = await get_assessment(db, assessment_id, user_id)
     if not assessment:
         return None
     
-    results = db.query(AssessmentResult).filter(
-        AssessmentResult.assessment_id == assessment_id
-    ).all()
-    
-    if not results:
-        return {
-            "assessment": assessment,
-            "overall_score": 0,
-            "overall_maturity": "initial",
-            "category_scores": {}
-        }
-    
-    # Calculate overall score
-    total_score = sum(r.score for r in results)
-    overall_score = total_score // len(results)
-    overall_maturity = get_maturity_level(overall_score)
-    
-    category_scores = {r.category: r.score for r in results}
-    
+    return summarize_assessment(assessment)
+
+
+def category_benchmark(category: str, score: int, histogram: List[int]) -> dict:
+    """Where one score falls in its category's histogram of results at each score 0-100
+
+    The percentile rank counts the results scoring below plus half of those
+    with the same score, so equal scores share a rank.
+    """
+    total = sum(histogram)
+    index = min(max(score, 0), len(histogram) - 1)
+    below = sum(histogram[:index])
+    maturity_distribution = {level.value: 0 for level in MaturityLevel}
+    for bucket, count in enumerate(histogram):
+        if count:
+            maturity_distribution[get_maturity_level(bucket).value] += count
     return {
-        "assessment": assessment,
-        "overall_score": overall_score,
-        "overall_maturity": overall_maturity.value,
-        "category_scores": category_scores
+        "category": category,
+        "score": score,
+        "maturity_level": get_maturity_level(score).value,
+        "assessments": total,
+        "percentile_rank": round((below + histogram[index] / 2) / total * 100, 1) if total else 0.0,
+        "maturity_distribution": maturity_distribution,
+        "histogram": histogram,
     }
+
+
+async def get_assessment_benchmarks(db: AsyncSession, assessment_id: int, user_id: int) -> Optional[List[dict]]:
+    """Percentile rank and distribution of each scored category against all assessments
+
+    Reads the assessment's stored scores and the categories' rollup rows,
+    two queries whatever the number of assessments.
+    """
+    category_scores = await db.scalar(
+        select(Assessment.category_scores).where(Assessment.id == assessment_id, Assessment.user_id == user_id)
+    )
+    if category_scores is None:
+        return None
+    
+    histograms = {category: [0] * 101 for category in category_scores}
+    if histograms:
+        for category, score, count in await db.execute(
+            select(CategoryScoreRollup.category, CategoryScoreRollup.score, CategoryScoreRollup.count)
+            .where(CategoryScoreRollup.category.in_(list(histograms)))
+        ):
+            histograms[category][min(max(score, 0), 100)] += count
+    return [
+        category_benchmark(category, score, histograms[category])
+        for category, score in sorted(category_scores.items())
+    ]
+
+
+def as_naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC; convert aware filter values to match"""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def get_answer_distribution(
+    db: AsyncSession,
+    category: AssessmentCategory,
+    question_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status: Optional[str] = None,
+    schema_version: Optional[str] = None
+) -> List[dict]:
+    """How often each option of a category's questions was chosen, counted in the database
+
+    Answers are filtered by submission time (since inclusive, until
+    exclusive) and by their assessment's status and questionnaire version.
+    Options nobody chose are absent.
+    """
+    count = func.count()
+    answered = func.sum(count).over(partition_by=AssessmentAnswer.question_id)
+    query = (
+        select(
+            AssessmentAnswer.question_id,
+            AssessmentAnswer.value,
+            count.label("count"),
+            answered.label("answered"),
+            (cast(count, Float) / cast(answered, Float)).label("share")
+        )
+        .where(AssessmentAnswer.category == category.value)
+    )
+    if question_id:
+        query = query.where(AssessmentAnswer.question_id == question_id)
+    if since:
+        query = query.where(AssessmentAnswer.answered_at >= as_naive_utc(since))
+    if until:
+        query = query.where(AssessmentAnswer.answered_at < as_naive_utc(until))
+    if status or schema_version:
+        query = query.join(Assessment, Assessment.id == AssessmentAnswer.assessment_id)
+        if status:
+            query = query.where(Assessment.status == status)
+        if schema_version:
+            query = query.where(Assessment.schema_version == schema_version)
+    query = query.group_by(AssessmentAnswer.question_id, AssessmentAnswer.value).order_by(
+        AssessmentAnswer.question_id, AssessmentAnswer.value
+    )
+    
+    questions: Dict[str, dict] = {}
+    for row in await db.execute(query):
+        question = questions.setdefault(row.question_id, {"question_id": row.question_id, "answered": row.answered, "options": []})
+        question["options"].append({"value": row.value, "count": row.count, "share": row.share})
+    return list(questions.values())
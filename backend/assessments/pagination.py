@@ -0,0 +1,29 @@
+"""
+Keyset pagination cursors for assessment listings
+
+A cursor is the (created_at, id) of the last row on a page, encoded as
+URL-safe base64 so clients treat it as opaque. The next page continues
+strictly after that key, so pages stay stable while rows are added and
+cost the same at any depth.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, assessment_id: int) -> str:
+    """Encode the key of the last row on a page"""
+    raw = json.dumps([created_at.isoformat(), assessment_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor, raising ValueError if it was not produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, assessment_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(assessment_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
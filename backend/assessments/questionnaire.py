@@ -1,10 +1,30 @@
 """
 AI Governance Assessment Questionnaire Templates
 Defines questions and scoring for each assessment category
+
+Templates and recommendation tables live in versioned JSON or YAML files,
+one schema_version per file, under `questionnaire_dir`. The registry compiles
+each version once. It re-reads the directory when a file's mtime or size
+changes, checking at most every `questionnaire_reload_seconds`, so edits
+take effect in running workers without a restart. Assessments are scored
+with the schema_version they were created with.
 """
 
-from typing import Dict, List
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Optional
 from enum import Enum
+from backend.config import settings
+
+logger = logging.getLogger("ai_governance")
+
+DEFAULT_QUESTIONNAIRE_DIR = os.path.join(os.path.dirname(__file__), "questionnaires")
+QUESTIONNAIRE_EXTENSIONS = (".json", ".yaml", ".yml")
 
 
 class MaturityLevel(str, Enum):
@@ -24,297 +44,294 @@ class AssessmentCategory(str, Enum):
     COMPLIANCE = "compliance"
 
 
-# Questionnaire templates for each category
-QUESTIONNAIRES = {
-    AssessmentCategory.DATA_PRIVACY: {
-        "title": "Data Privacy Assessment",
-        "description": "Evaluate data handling, privacy controls, and compliance with data protection regulations",
-        "questions": [
-            {
-                "id": "dp_1",
-                "text": "Does your organization have a documented data inventory for AI systems?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "No inventory exists"},
-                    {"value": 5, "label": "Partial inventory, not regularly updated"},
-                    {"value": 10, "label": "Complete inventory, regularly maintained"}
-                ]
-            },
-            {
-                "id": "dp_2",
-                "text": "Are data minimization principles applied to AI training data?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "Not considered"},
-                    {"value": 5, "label": "Considered but not enforced"},
-                    {"value": 10, "label": "Actively enforced with regular audits"}
-                ]
-            },
-            {
-                "id": "dp_3",
-                "text": "Is personal data anonymized or pseudonymized before use in AI systems?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "No anonymization"},
-                    {"value": 7, "label": "Partial anonymization"},
-                    {"value": 15, "label": "Full anonymization with validation"}
-                ]
-            },
-            {
-                "id": "dp_4",
-                "text": "Are data retention and deletion policies defined and enforced?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "No policies"},
-                    {"value": 5, "label": "Policies exist but not enforced"},
-                    {"value": 10, "label": "Policies enforced with automated controls"}
-                ]
-            },
-            {
-                "id": "dp_5",
-                "text": "Is user consent obtained and managed for data used in AI?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "No consent management"},
-                    {"value": 7, "label": "Basic consent collection"},
-                    {"value": 15, "label": "Comprehensive consent management with audit trail"}
-                ]
-            }
-        ]
-    },
-    
-    AssessmentCategory.MODEL_RISK: {
-        "title": "Model Risk Assessment",
-        "description": "Evaluate model development, validation, monitoring, and risk management practices",
-        "questions": [
-            {
-                "id": "mr_1",
-                "text": "Is there a formal model development lifecycle process?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "No formal process"},
-                    {"value": 7, "label": "Informal process, not documented"},
-                    {"value": 15, "label": "Formal, documented, and enforced process"}
-                ]
-            },
-            {
-                "id": "mr_2",
-                "text": "Are models validated before deployment?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "No validation"},
-                    {"value": 7, "label": "Basic validation by developers"},
-                    {"value": 15, "label": "Independent validation with documented results"}
-                ]
-            },
-            {
-                "id": "mr_3",
-                "text": "Is model performance monitored in production?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "No monitoring"},
-                    {"value": 7, "label": "Basic logging"},
-                    {"value": 15, "label": "Comprehensive monitoring with alerting"}
-                ]
-            },
-            {
-                "id": "mr_4",
-                "text": "Are model limitations and assumptions documented?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "Not documented"},
-                    {"value": 5, "label": "Partially documented"},
-                    {"value": 10, "label": "Fully documented and communicated"}
-                ]
-            },
-            {
-                "id": "mr_5",
-                "text": "Is there a process for model retraining and updates?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "No process"},
-                    {"value": 5, "label": "Ad-hoc retraining"},
-                    {"value": 10, "label": "Scheduled retraining with validation"}
-                ]
-            }
-        ]
-    },
-    
-    AssessmentCategory.ETHICS: {
-        "title": "AI Ethics Assessment",
-        "description": "Evaluate fairness, transparency, accountability, and ethical considerations",
-        "questions": [
-            {
-                "id": "eth_1",
-                "text": "Are AI systems tested for bias and fairness?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "No testing"},
-                    {"value": 7, "label": "Basic testing during development"},
-                    {"value": 15, "label": "Comprehensive testing with ongoing monitoring"}
-                ]
-            },
-            {
-                "id": "eth_2",
-                "text": "Is there transparency about AI system decisions?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "No transparency"},
-                    {"value": 7, "label": "Limited explanations available"},
-                    {"value": 15, "label": "Full explainability and documentation"}
-                ]
-            },
-            {
-                "id": "eth_3",
-                "text": "Are there human oversight mechanisms for AI decisions?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "Fully automated, no oversight"},
-                    {"value": 7, "label": "Human review for some decisions"},
-                    {"value": 15, "label": "Human-in-the-loop for critical decisions"}
-                ]
-            },
-            {
-                "id": "eth_4",
-                "text": "Is there an AI ethics review board or committee?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "No ethics review"},
-                    {"value": 5, "label": "Informal review process"},
-                    {"value": 10, "label": "Formal ethics board with regular reviews"}
-                ]
-            },
-            {
-                "id": "eth_5",
-                "text": "Are stakeholders consulted about AI system impacts?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "No stakeholder engagement"},
-                    {"value": 5, "label": "Limited consultation"},
-                    {"value": 10, "label": "Regular stakeholder engagement and feedback"}
-                ]
-            }
-        ]
-    },
-    
-    AssessmentCategory.COMPLIANCE: {
-        "title": "Regulatory Compliance Assessment",
-        "description": "Evaluate compliance with AI regulations, standards, and legal requirements",
-        "questions": [
-            {
-                "id": "comp_1",
-                "text": "Are relevant AI regulations and standards identified?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "Not identified"},
-                    {"value": 5, "label": "Partially identified"},
-                    {"value": 10, "label": "Comprehensive regulatory mapping"}
-                ]
-            },
-            {
-                "id": "comp_2",
-                "text": "Is there a compliance management program for AI?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "No program"},
-                    {"value": 7, "label": "Basic compliance tracking"},
-                    {"value": 15, "label": "Comprehensive program with regular audits"}
-                ]
-            },
-            {
-                "id": "comp_3",
-                "text": "Are AI systems documented for regulatory requirements?",
-                "weight": 15,
-                "options": [
-                    {"value": 0, "label": "No documentation"},
-                    {"value": 7, "label": "Basic documentation"},
-                    {"value": 15, "label": "Complete documentation meeting all requirements"}
-                ]
-            },
-            {
-                "id": "comp_4",
-                "text": "Are there processes for responding to regulatory inquiries?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "No process"},
-                    {"value": 5, "label": "Ad-hoc responses"},
-                    {"value": 10, "label": "Formal process with designated owners"}
-                ]
-            },
-            {
-                "id": "comp_5",
-                "text": "Is compliance training provided to AI teams?",
-                "weight": 10,
-                "options": [
-                    {"value": 0, "label": "No training"},
-                    {"value": 5, "label": "One-time training"},
-                    {"value": 10, "label": "Regular, updated training programs"}
-                ]
-            }
-        ]
-    }
-}
+# Lowest score of each maturity level after INITIAL, in MaturityLevel order
+MATURITY_THRESHOLDS = (20, 40, 60, 80)
+MATURITY_ORDER = tuple(MaturityLevel)
 
-
-def calculate_category_score(answers: Dict[str, int], category: AssessmentCategory) -> int:
-    """Calculate score for a category based on answers"""
-    questionnaire = QUESTIONNAIRES[category]
-    total_weight = sum(q["weight"] for q in questionnaire["questions"])
-    
-    score = 0
-    for question in questionnaire["questions"]:
-        answer_value = answers.get(question["id"], 0)
-        score += answer_value
-    
-    # Normalize to 0-100
-    return int((score / total_weight) * 100) if total_weight > 0 else 0
+DEFAULT_RECOMMENDATION = "Continue improving governance practices."
 
 
 def get_maturity_level(score: int) -> MaturityLevel:
     """Determine maturity level based on score"""
-    if score < 20:
-        return MaturityLevel.INITIAL
-    elif score < 40:
-        return MaturityLevel.DEVELOPING
-    elif score < 60:
-        return MaturityLevel.DEFINED
-    elif score < 80:
-        return MaturityLevel.MANAGED
-    else:
-        return MaturityLevel.OPTIMIZED
-
-
-def get_recommendations(category: AssessmentCategory, score: int, maturity: MaturityLevel) -> str:
+    return MATURITY_ORDER[bisect_right(MATURITY_THRESHOLDS, score)]
+
+
+class InvalidAnswersError(ValueError):
+    """Answers naming unknown questions or values that are not one of their options"""
+
+    def __init__(self, category: AssessmentCategory, problems: List[str]):
+        self.category = category
+        self.problems = problems
+        super().__init__(f"Invalid {category.value} answers: " + "; ".join(problems))
+
+
+class UnknownSchemaVersionError(LookupError):
+    """No questionnaire file defines the requested schema_version"""
+
+    def __init__(self, schema_version: str):
+        self.schema_version = schema_version
+        super().__init__(f"Questionnaire version {schema_version} is not available")
+
+
+class CompiledQuestionnaire:
+    """A category's questionnaire flattened into parallel arrays for scoring
+
+    Question IDs map to positions in the weight and allowed-value arrays, so
+    scoring is one dict lookup and one set membership test per answer.
+    """
+    __slots__ = (
+        "category", "question_ids", "index", "weights", "allowed", "option_values", "total_weight",
+        "recommendations", "default_recommendation"
+    )
+
+    def __init__(
+        self,
+        category: AssessmentCategory,
+        template: dict,
+        recommendations: Dict[MaturityLevel, str],
+        default_recommendation: str = DEFAULT_RECOMMENDATION
+    ):
+        questions = template["questions"]
+        self.category = category
+        self.question_ids = tuple(q["id"] for q in questions)
+        self.index = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        self.weights = array("i", (q["weight"] for q in questions))
+        self.allowed = tuple(frozenset(option["value"] for option in q["options"]) for q in questions)
+        self.option_values = tuple(tuple(sorted(values)) for values in self.allowed)
+        self.total_weight = sum(self.weights)
+        self.recommendations = recommendations
+        self.default_recommendation = default_recommendation
+
+    def score(self, answers: Dict[str, int]) -> int:
+        """Validate answers and score them 0-100 in a single pass
+
+        Unanswered questions score 0. Raises InvalidAnswersError listing every
+        unknown question ID and every value that is not one of its options.
+        """
+        index = self.index
+        allowed = self.allowed
+        total = 0
+        problems = None
+        for question_id, value in answers.items():
+            i = index.get(question_id)
+            if i is None:
+                problems = problems or []
+                problems.append(f"unknown question {question_id}")
+            elif value not in allowed[i]:
+                problems = problems or []
+                problems.append(f"{question_id} must be one of {sorted(allowed[i])}, got {value}")
+            else:
+                total += value
+        if problems:
+            raise InvalidAnswersError(self.category, problems)
+        # Normalize to 0-100
+        return int((total / self.total_weight) * 100) if self.total_weight > 0 else 0
+
+    def recommendation(self, maturity: MaturityLevel) -> str:
+        return self.recommendations.get(maturity, self.default_recommendation)
+
+
+class QuestionnaireVersion:
+    """Every category's template and compiled questionnaire for one schema_version"""
+
+    def __init__(self, data: dict, source: str = ""):
+        self.source = source
+        self.schema_version = data.get("schema_version")
+        if not isinstance(self.schema_version, str) or not self.schema_version:
+            raise ValueError(f"{source}: schema_version must be a non-empty string")
+        categories = data.get("categories") or {}
+        missing = [category.value for category in AssessmentCategory if category.value not in categories]
+        if missing:
+            raise ValueError(f"{source}: missing categories {missing}")
+        default_recommendation = data.get("default_recommendation", DEFAULT_RECOMMENDATION)
+
+        self.templates: Dict[AssessmentCategory, dict] = {}
+        self.compiled: Dict[AssessmentCategory, CompiledQuestionnaire] = {}
+        for category in AssessmentCategory:
+            definition = categories[category.value]
+            try:
+                template = {
+                    "title": definition["title"],
+                    "description": definition["description"],
+                    "questions": [
+                        {
+                            "id": str(q["id"]),
+                            "text": q["text"],
+                            "weight": int(q["weight"]),
+                            "options": [{"value": int(o["value"]), "label": o["label"]} for o in q["options"]]
+                        }
+                        for q in definition["questions"]
+                    ]
+                }
+                recommendations = {
+                    MaturityLevel(level): text for level, text in (definition.get("recommendations") or {}).items()
+                }
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{source}: invalid {category.value} questionnaire: {e!r}")
+            self.templates[category] = template
+            self.compiled[category] = CompiledQuestionnaire(category, template, recommendations, default_recommendation)
+
+
+def load_questionnaire_file(path: str) -> QuestionnaireVersion:
+    """Parse and compile one questionnaire file"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            data = json.load(f)
+        else:
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"{path}: PyYAML is required to load YAML questionnaires")
+            data = yaml.safe_load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected a mapping at the top level")
+    return QuestionnaireVersion(data, source=path)
+
+
+def version_key(schema_version: str) -> tuple:
+    """Order versions numerically where possible ("1.10" after "1.9")"""
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in schema_version.split("."))
+
+
+class QuestionnaireRegistry:
+    """Questionnaire versions loaded from a directory, reloaded when files change"""
+
+    def __init__(self, directory: str, reload_seconds: float, default_version: str = ""):
+        self.directory = directory
+        self.reload_seconds = reload_seconds
+        self.configured_default = default_version
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+        self._files: Dict[str, tuple] = {}  # path -> ((mtime_ns, size), QuestionnaireVersion or None)
+        self._versions: Dict[str, QuestionnaireVersion] = {}
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _scan(self) -> Dict[str, tuple]:
+        signatures = {}
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(QUESTIONNAIRE_EXTENSIONS):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                signatures[path] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
+
+    def _maybe_reload(self):
+        if time.monotonic() < self._next_check:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            # With reloading disabled the directory is read once
+            self._next_check = now + self.reload_seconds if self.reload_seconds > 0 else float("inf")
+            self._reload()
+
+    def _reload(self):
+        signatures = self._scan()
+        if signatures == {path: signature for path, (signature, _) in self._files.items()}:
+            return
+
+        files = {}
+        for path, signature in signatures.items():
+            previous = self._files.get(path)
+            if previous and previous[0] == signature:
+                files[path] = previous
+                continue
+            # Only new or changed files are parsed and compiled
+            try:
+                files[path] = (signature, load_questionnaire_file(path))
+            except (OSError, ValueError) as e:
+                # Keep serving the last good copy of a file that fails to load
+                self.reload_errors += 1
+                self.last_error = str(e)
+                logger.error(f"Questionnaire reload failed: {e}")
+                files[path] = (signature, previous[1] if previous else None)
+
+        versions = {}
+        for path, (_, version) in files.items():
+            if version is None:
+                continue
+            if version.schema_version in versions:
+                self.reload_errors += 1
+                self.last_error = f"{path}: schema_version {version.schema_version} is already defined"
+                logger.error(f"Questionnaire reload failed: {self.last_error}")
+                continue
+            versions[version.schema_version] = version
+
+        self._files = files
+        self._versions = versions
+        self.reloads += 1
+
+    def get(self, schema_version: str) -> QuestionnaireVersion:
+        """The questionnaires of one schema_version"""
+        self._maybe_reload()
+        version = self._versions.get(schema_version)
+        if version is None:
+            raise UnknownSchemaVersionError(schema_version)
+        return version
+
+    @property
+    def default_version(self) -> str:
+        """Version given to new assessments: the configured one, else the newest"""
+        self._maybe_reload()
+        if self.configured_default:
+            return self.configured_default
+        if not self._versions:
+            raise UnknownSchemaVersionError("(none)")
+        return max(self._versions, key=version_key)
+
+    def current(self) -> QuestionnaireVersion:
+        """The questionnaires new assessments are created with"""
+        return self.get(self.default_version)
+
+    def versions(self) -> List[str]:
+        self._maybe_reload()
+        return sorted(self._versions, key=version_key)
+
+    def clear(self):
+        """Re-read the directory on next use"""
+        with self._lock:
+            self._files = {}
+            self._versions = {}
+            self._next_check = 0.0
+            self.reloads = 0
+            self.reload_errors = 0
+            self.last_error = None
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        self._maybe_reload()
+        with self._lock:
+            return {
+                "versions": sorted(self._versions, key=version_key),
+                "default_version": self.configured_default or (max(self._versions, key=version_key) if self._versions else None),
+                "reloads": self.reloads,
+                "reload_errors": self.reload_errors,
+                "last_error": self.last_error,
+            }
+
+
+questionnaire_registry = QuestionnaireRegistry(
+    settings.questionnaire_dir or DEFAULT_QUESTIONNAIRE_DIR,
+    settings.questionnaire_reload_seconds,
+    settings.questionnaire_default_version
+)
+
+
+def calculate_category_score(answers: Dict[str, int], category: AssessmentCategory, schema_version: Optional[str] = None) -> int:
+    """Calculate score for a category based on answers, raising InvalidAnswersError for invalid ones"""
+    version = questionnaire_registry.get(schema_version) if schema_version else questionnaire_registry.current()
+    return version.compiled[category].score(answers)
+
+
+def get_recommendations(
+    category: AssessmentCategory,
+    score: int,
+    maturity: MaturityLevel,
+    schema_version: Optional[str] = None
+) -> str:
     """Generate recommendations based on assessment results"""
-    recommendations = {
-        AssessmentCategory.DATA_PRIVACY: {
-            MaturityLevel.INITIAL: "Establish basic data inventory and privacy policies. Implement data classification and access controls.",
-            MaturityLevel.DEVELOPING: "Enhance data anonymization techniques. Implement comprehensive consent management.",
-            MaturityLevel.DEFINED: "Automate privacy controls. Conduct regular privacy impact assessments.",
-            MaturityLevel.MANAGED: "Implement privacy-by-design principles. Enhance data minimization practices.",
-            MaturityLevel.OPTIMIZED: "Maintain excellence. Share best practices across organization."
-        },
-        AssessmentCategory.MODEL_RISK: {
-            MaturityLevel.INITIAL: "Establish model development standards. Implement basic validation processes.",
-            MaturityLevel.DEVELOPING: "Create formal model governance framework. Implement model monitoring.",
-            MaturityLevel.DEFINED: "Enhance validation with independent review. Implement automated monitoring.",
-            MaturityLevel.MANAGED: "Implement advanced model risk management. Enhance retraining processes.",
-            MaturityLevel.OPTIMIZED: "Maintain excellence. Continuously improve model governance."
-        },
-        AssessmentCategory.ETHICS: {
-            MaturityLevel.INITIAL: "Establish AI ethics principles. Implement basic bias testing.",
-            MaturityLevel.DEVELOPING: "Create ethics review process. Enhance transparency mechanisms.",
-            MaturityLevel.DEFINED: "Establish ethics board. Implement comprehensive fairness testing.",
-            MaturityLevel.MANAGED: "Enhance stakeholder engagement. Implement advanced explainability.",
-            MaturityLevel.OPTIMIZED: "Maintain excellence. Lead industry in ethical AI practices."
-        },
-        AssessmentCategory.COMPLIANCE: {
-            MaturityLevel.INITIAL: "Identify applicable regulations. Establish basic compliance tracking.",
-            MaturityLevel.DEVELOPING: "Create compliance management program. Enhance documentation.",
-            MaturityLevel.DEFINED: "Implement automated compliance monitoring. Conduct regular audits.",
-            MaturityLevel.MANAGED: "Enhance regulatory engagement. Implement proactive compliance.",
-            MaturityLevel.OPTIMIZED: "Maintain excellence. Lead industry in AI compliance."
-        }
-    }
-    
-    return recommendations.get(category, {}).get(maturity, "Continue improving governance practices.")
+    version = questionnaire_registry.get(schema_version) if schema_version else questionnaire_registry.current()
+    return version.compiled[category].recommendation(maturity)
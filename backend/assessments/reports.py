@@ -19,6 +19,7 @@ def generate_csv_report(assessment: Assessment, results: List[AssessmentResult])
     writer.writerow(["Assessment Title", assessment.title])
     writer.writerow(["Created", assessment.created_at.strftime("%Y-%m-%d %H:%M:%S")])
     writer.writerow(["Status", assessment.status])
+    writer.writerow(["Questionnaire Version", assessment.schema_version])
     writer.writerow([])
     
     # Results
@@ -33,9 +34,8 @@ def generate_csv_report(assessment: Assessment, results: List[AssessmentResult])
     
     # Overall
     if results:
-        overall_score = sum(r.score for r in results) // len(results)
         writer.writerow([])
-        writer.writerow(["Overall Score", overall_score])
+        writer.writerow(["Overall Score", assessment.overall_score])
     
     return output.getvalue()
 
@@ -63,6 +63,7 @@ def generate_pdf_report(assessment: Assessment, results: List[AssessmentResult])
         ["Assessment Title:", assessment.title],
         ["Created:", assessment.created_at.strftime("%Y-%m-%d %H:%M:%S")],
         ["Status:", assessment.status.upper()],
+        ["Questionnaire Version:", assessment.schema_version],
     ]
     if assessment.description:
         info_data.append(["Description:", assessment.description])
@@ -92,8 +93,7 @@ def generate_pdf_report(assessment: Assessment, results: List[AssessmentResult])
             ])
         
         # Overall score
-        overall_score = sum(r.score for r in results) // len(results)
-        results_data.append(["OVERALL", str(overall_score), ""])
+        results_data.append(["OVERALL", str(assessment.overall_score), assessment.overall_maturity.title()])
         
         results_table = Table(results_data, colWidths=[2.5*inch, 1*inch, 1.5*inch])
         results_table.setStyle(TableStyle([
@@ -0,0 +1,439 @@
+"""
+Bulk rescoring of stored category results after scoring-rule changes
+
+Editing a questionnaire version's weights or recommendations, or the maturity
+thresholds, leaves stored scores stale. The rescoring job streams
+assessment_results in id order, one keyset chunk at a time, and scores the
+chunks in a process pool while the next ones are read. Each scored chunk is
+written back in one transaction: changed results with one batched UPDATE, their
+category score rollups, then the stored summaries of the assessments it
+touched. After every chunk the last id is saved to a checkpoint file, so an
+interrupted run can resume from there.
+
+Results resubmitted while the job runs are left alone, because the
+submission already scored them with the current rules.
+
+    python -m backend.assessments.rescoring --resume
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+from backend.db.models import Assessment, AssessmentResult
+from backend.db.database import SessionLocal
+from backend.audit.logging import logger, log_error
+from backend.config import settings
+from backend.assessments.crud import rollup_deltas, rollup_delta_statement
+from backend.assessments.questionnaire import (
+    questionnaire_registry,
+    AssessmentCategory,
+    InvalidAnswersError,
+    UnknownSchemaVersionError,
+    get_maturity_level
+)
+
+# Failures kept in the job stats and the checkpoint; the rest are only counted
+FAILURE_SAMPLE_SIZE = 20
+
+
+class RescoringInProgress(RuntimeError):
+    """A rescoring job is already running in this process"""
+
+
+def rescore_rows(rows: List[tuple]) -> Tuple[List[tuple], List[tuple]]:
+    """Score (id, category, schema_version, answers) rows with the current rules
+
+    Runs in the worker processes. Returns (id, score, maturity level,
+    recommendations) for every row that could be scored, and (id, error) for
+    the rest.
+    """
+    scored, failures = [], []
+    for result_id, category, schema_version, answers in rows:
+        try:
+            questionnaire = questionnaire_registry.get(schema_version).compiled[AssessmentCategory(category)]
+            score = questionnaire.score(answers or {})
+        except (InvalidAnswersError, UnknownSchemaVersionError, ValueError) as e:
+            failures.append((result_id, str(e)))
+            continue
+        maturity = get_maturity_level(score)
+        scored.append((result_id, score, maturity.value, questionnaire.recommendation(maturity)))
+    return scored, failures
+
+
+class _InlineExecutor(Executor):
+    """Scores chunks in the calling thread when only one worker is configured"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class RescoringJob:
+    """Streams, rescores and writes back every stored category result"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        checkpoint_path: str,
+        chunk_size: int = 500,
+        workers: int = 0
+    ):
+        self.session_factory = session_factory
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._progress = self._new_progress(None)
+
+    @staticmethod
+    def _new_progress(schema_version: Optional[str]) -> dict:
+        return {
+            "status": "idle",
+            "schema_version": schema_version,
+            "total": 0,
+            "processed": 0,
+            "updated": 0,
+            "skipped": 0,
+            "failed": 0,
+            "summaries_updated": 0,
+            "last_id": 0,
+            "failures": [],
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+
+    def _load_checkpoint(self, schema_version: Optional[str]) -> dict:
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("schema_version") != schema_version:
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} is for schema_version {checkpoint.get('schema_version')!r}, "
+                f"not {schema_version!r}"
+            )
+        return checkpoint
+
+    def _save_checkpoint(self):
+        keys = ("schema_version", "last_id", "processed", "updated", "skipped", "failed", "summaries_updated", "failures")
+        checkpoint = {key: self._progress[key] for key in keys}
+        # Write then rename so a crash never leaves a truncated checkpoint
+        partial = f"{self.checkpoint_path}.tmp"
+        with open(partial, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(partial, self.checkpoint_path)
+
+    def _read_chunk(self, after_id: int, schema_version: Optional[str], chunk_size: int) -> List[tuple]:
+        """The next chunk of (id, assessment_id, category, schema_version, questions, score, maturity, recommendations)"""
+        query = (
+            select(
+                AssessmentResult.id,
+                AssessmentResult.assessment_id,
+                AssessmentResult.category,
+                Assessment.schema_version,
+                AssessmentResult.questions,
+                AssessmentResult.score,
+                AssessmentResult.maturity_level,
+                AssessmentResult.recommendations
+            )
+            .join(Assessment, Assessment.id == AssessmentResult.assessment_id)
+            .where(AssessmentResult.id > after_id)
+            .order_by(AssessmentResult.id)
+            .limit(chunk_size)
+        )
+        if schema_version is not None:
+            query = query.where(Assessment.schema_version == schema_version)
+        with self.session_factory() as db:
+            return [tuple(row) for row in db.execute(query)]
+
+    def _count(self, schema_version: Optional[str]) -> int:
+        query = select(func.count(AssessmentResult.id)).join(Assessment, Assessment.id == AssessmentResult.assessment_id)
+        if schema_version is not None:
+            query = query.where(Assessment.schema_version == schema_version)
+        with self.session_factory() as db:
+            return db.execute(query).scalar_one()
+
+    def _write_chunk(self, rows: List[tuple], scored: List[tuple]) -> Tuple[int, int, int]:
+        """Write one scored chunk, returning (results updated, results skipped, summaries rewritten)"""
+        stored = {row[0]: row for row in rows}
+        changed = {
+            result_id: (score, maturity, recommendations)
+            for result_id, score, maturity, recommendations in scored
+            if stored[result_id][5:8] != (score, maturity, recommendations)
+        }
+        assessment_ids = sorted({row[1] for row in rows})
+
+        with self.session_factory() as db:
+            # Lock assessments before results, in the same order as answer submission
+            db.execute(select(Assessment.id).where(Assessment.id.in_(assessment_ids)).order_by(Assessment.id).with_for_update())
+            skipped = 0
+            locked_scores = {}
+            if changed:
+                current = {
+                    row.id: row
+                    for row in db.execute(
+                        select(
+                            AssessmentResult.id,
+                            AssessmentResult.questions,
+                            AssessmentResult.score,
+                            AssessmentResult.maturity_level,
+                            AssessmentResult.recommendations
+                        )
+                        .where(AssessmentResult.id.in_(list(changed)))
+                        .with_for_update()
+                    )
+                }
+                for result_id in list(changed):
+                    locked = current.get(result_id)
+                    if (
+                        locked is None
+                        or locked.questions != stored[result_id][4]
+                        or (locked.score, locked.maturity_level, locked.recommendations) == changed[result_id]
+                    ):
+                        # Deleted, or resubmitted since the chunk was read; a resubmission
+                        # already scored it with the current rules and moved its rollup
+                        del changed[result_id]
+                        skipped += 1
+                    else:
+                        locked_scores[result_id] = locked.score
+            if changed:
+                db.execute(
+                    update(AssessmentResult.__table__)
+                    .where(AssessmentResult.__table__.c.id == bindparam("result_id"))
+                    .values(score=bindparam("score"), maturity_level=bindparam("maturity"), recommendations=bindparam("recommendations")),
+                    [
+                        {"result_id": result_id, "score": score, "maturity": maturity, "recommendations": recommendations}
+                        for result_id, (score, maturity, recommendations) in changed.items()
+                    ]
+                )
+                deltas = rollup_deltas(
+                    # The locked score, not the chunk's: the rollup holds whatever is stored now
+                    removed=[(stored[result_id][2], locked_scores[result_id]) for result_id in changed],
+                    added=[(stored[result_id][2], score) for result_id, (score, _, _) in changed.items()]
+                )
+                if deltas:
+                    db.execute(rollup_delta_statement(db.get_bind().dialect.name, deltas))
+
+            # Recompute the touched assessments' stored summaries from their results
+            category_scores: Dict[int, dict] = {assessment_id: {} for assessment_id in assessment_ids}
+            for assessment_id, category, score in db.execute(
+                select(AssessmentResult.assessment_id, AssessmentResult.category, AssessmentResult.score)
+                .where(AssessmentResult.assessment_id.in_(assessment_ids))
+                .order_by(AssessmentResult.id)
+            ):
+                category_scores[assessment_id][category] = score
+            summaries = []
+            for assessment_id, overall_score, overall_maturity, stored_scores in db.execute(
+                select(Assessment.id, Assessment.overall_score, Assessment.overall_maturity, Assessment.category_scores)
+                .where(Assessment.id.in_(assessment_ids))
+            ):
+                scores = category_scores[assessment_id]
+                score = sum(scores.values()) // len(scores) if scores else 0
+                maturity = get_maturity_level(score).value
+                if (overall_score, overall_maturity, stored_scores or {}) != (score, maturity, scores):
+                    summaries.append({
+                        "assessment_id": assessment_id,
+                        "overall_score": score,
+                        "overall_maturity": maturity,
+                        "category_scores": scores,
+                    })
+            if summaries:
+                db.execute(
+                    update(Assessment.__table__)
+                    .where(Assessment.__table__.c.id == bindparam("assessment_id"))
+                    .values(
+                        overall_score=bindparam("overall_score"),
+                        overall_maturity=bindparam("overall_maturity"),
+                        category_scores=bindparam("category_scores")
+                    ),
+                    summaries
+                )
+            db.commit()
+        return len(changed), skipped, len(summaries)
+
+    def run(
+        self,
+        schema_version: Optional[str] = None,
+        resume: bool = False,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+        """Rescore every result, or only those of one schema_version, blocking until done
+
+        With resume, continues after the checkpoint's last id. progress is
+        called with the job stats after every chunk.
+        """
+        with self._lock:
+            if self._progress["status"] in ("running", "stopping") and self._thread is not threading.current_thread():
+                raise RescoringInProgress("A rescoring job is already running")
+            checkpoint = self._load_checkpoint(schema_version) if resume and os.path.exists(self.checkpoint_path) else {}
+            self._stopping.clear()
+            self._progress = self._new_progress(schema_version)
+            self._progress.update(checkpoint)
+            self._progress.update(status="running", started_at=datetime.utcnow().isoformat())
+
+        chunk_size = chunk_size or self.chunk_size
+        workers = workers if workers is not None else self.workers
+        workers = workers or os.cpu_count() or 1
+        run_started = time.monotonic()
+        resumed_from = self._progress["processed"]
+        # Jobs run on a thread of the API process; forking it could copy held
+        # locks into the workers, so they start fresh and import rescore_rows
+        executor = (
+            ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            if workers > 1 else _InlineExecutor()
+        )
+        try:
+            self._progress["total"] = self._count(schema_version)
+            after_id = self._progress["last_id"]
+            pending = deque()  # (rows, future) in id order
+            exhausted = False
+            while not self._stopping.is_set():
+                # Keep every worker busy with a chunk and one more queued
+                while not exhausted and len(pending) < workers * 2:
+                    rows = self._read_chunk(after_id, schema_version, chunk_size)
+                    if not rows:
+                        exhausted = True
+                        break
+                    after_id = rows[-1][0]
+                    pending.append((rows, executor.submit(rescore_rows, [(r[0], r[2], r[3], r[4]) for r in rows])))
+                if not pending:
+                    break
+
+                # Write chunks in id order so the checkpoint never skips one
+                rows, future = pending.popleft()
+                scored, failures = future.result()
+                updated, skipped, summaries_updated = self._write_chunk(rows, scored)
+                elapsed = time.monotonic() - run_started
+                stats = self._progress
+                stats["processed"] += len(rows)
+                stats["updated"] += updated
+                stats["skipped"] += skipped
+                stats["failed"] += len(failures)
+                stats["summaries_updated"] += summaries_updated
+                stats["last_id"] = rows[-1][0]
+                room = FAILURE_SAMPLE_SIZE - len(stats["failures"])
+                stats["failures"].extend({"id": result_id, "error": error} for result_id, error in failures[:max(room, 0)])
+                self._save_checkpoint()
+                if progress:
+                    progress(self.stats(elapsed, stats["processed"] - resumed_from))
+
+            self._progress["status"] = "stopped" if self._stopping.is_set() else "completed"
+        except Exception as e:
+            self._progress.update(status="failed", error=str(e))
+            log_error(e, "rescoring job")
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._progress["finished_at"] = datetime.utcnow().isoformat()
+            self._progress["elapsed_seconds"] = round(time.monotonic() - run_started, 3)
+            self._progress["run_processed"] = self._progress["processed"] - resumed_from
+
+        result = self.stats()
+        logger.info(
+            f"Rescoring {result['status']}: {result['processed']}/{result['total']} results, "
+            f"{result['updated']} updated, {result['skipped']} skipped, {result['failed']} failed, "
+            f"{result['rows_per_second']} rows/s"
+        )
+        return result
+
+    def start(self, **options) -> dict:
+        """Run the job on a background thread, returning its initial stats"""
+        with self._lock:
+            if self._progress["status"] in ("running", "stopping"):
+                raise RescoringInProgress("A rescoring job is already running")
+            if options.get("resume") and os.path.exists(self.checkpoint_path):
+                # Fail on a mismatched checkpoint here rather than on the thread
+                self._load_checkpoint(options.get("schema_version"))
+            self._progress = self._new_progress(options.get("schema_version"))
+            self._progress["status"] = "running"
+            self._thread = threading.Thread(target=self._run_in_background, kwargs=options, name="rescoring-job", daemon=True)
+            self._thread.start()
+        return self.stats()
+
+    def _run_in_background(self, **options):
+        try:
+            self.run(**options)
+        except Exception:
+            pass  # recorded in the stats and logged by run
+
+    def stop(self):
+        """Stop after the chunk being written; resume continues from its checkpoint"""
+        if self._progress["status"] == "running":
+            self._progress["status"] = "stopping"
+        self._stopping.set()
+
+    def wait(self, timeout: Optional[float] = None) -> dict:
+        """Block until a background run finishes"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.stats()
+
+    def stats(self, elapsed: Optional[float] = None, run_processed: Optional[int] = None) -> dict:
+        """Progress and throughput of the current or last run"""
+        stats = dict(self._progress, failures=list(self._progress["failures"]))
+        elapsed = stats.get("elapsed_seconds") if elapsed is None else elapsed
+        run_processed = stats.get("run_processed", 0) if run_processed is None else run_processed
+        stats["elapsed_seconds"] = round(elapsed or 0.0, 3)
+        stats["rows_per_second"] = round(run_processed / elapsed, 1) if elapsed else 0.0
+        stats.pop("run_processed", None)
+        return stats
+
+    def clear(self):
+        """Forget the last run's stats (the checkpoint file is kept)"""
+        with self._lock:
+            if self._progress["status"] not in ("running", "stopping"):
+                self._progress = self._new_progress(None)
+
+
+rescoring_job = RescoringJob(
+    session_factory=SessionLocal,
+    checkpoint_path=settings.rescore_checkpoint_path,
+    chunk_size=settings.rescore_chunk_size,
+    workers=settings.rescore_workers
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schema-version", help="Only rescore assessments created with this questionnaire version")
+    parser.add_argument("--resume", action="store_true", help="Continue after the checkpoint's last result id")
+    parser.add_argument("--chunk-size", type=int, default=settings.rescore_chunk_size)
+    parser.add_argument("--workers", type=int, default=settings.rescore_workers, help="Scoring processes, 0 uses every core")
+    parser.add_argument("--checkpoint", default=settings.rescore_checkpoint_path)
+    args = parser.parse_args()
+
+    rescoring_job.checkpoint_path = args.checkpoint
+
+    def report(stats):
+        print(
+            f"{stats['processed']}/{stats['total']} results, {stats['updated']} updated, "
+            f"{stats['failed']} failed, {stats['rows_per_second']} rows/s, last id {stats['last_id']}",
+            flush=True
+        )
+
+    try:
+        stats = rescoring_job.run(args.schema_version, args.resume, args.chunk_size, args.workers, progress=report)
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun with --resume to continue after result {rescoring_job.stats()['last_id']}")
+        raise SystemExit(130)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
-from typing import List
-from backend.db.database import get_db
-from backend.db.models import User
-from backend.auth.dependencies import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+from backend.db.database import get_async_db
+from backend.auth.principal_cache import Principal
+from backend.auth.dependencies import get_current_user, get_current_admin, get_read_db
 from backend.assessments.schemas import (
     AssessmentCreate,
     AssessmentUpdate,
     AssessmentResponse,
     CategoryAnswers,
+    BulkCategoryAnswers,
     AssessmentResultResponse,
     AssessmentSummary,
+    BulkAnswersResponse,
+    WhatIfResponse,
+    BenchmarksResponse,
+    AnswerDistributionResponse,
+    RescoreRequest,
+    RescoreStatus,
     QuestionnaireResponse
 )
 from backend.assessments.crud import (
@@ -19,34 +27,38 @@ from backend.assessments.crud import (
     get_user_assessments,
     update_assessment,
     delete_assessment,
+    submit_answer_batch,
     submit_category_answers,
-    get_assessment_summary
+    summarize_assessment,
+    get_assessment_summary,
+    get_assessment_benchmarks,
+    get_answer_distribution
 )
-from backend.assessments.questionnaire import QUESTIONNAIRES, AssessmentCategory
+from backend.assessments.questionnaire import (
+    questionnaire_registry,
+    AssessmentCategory,
+    QuestionnaireVersion,
+    UnknownSchemaVersionError
+)
+from backend.assessments.batch_scoring import rank_upgrades
+from backend.assessments.rescoring import rescoring_job, RescoringInProgress
 from backend.assessments.reports import generate_csv_report, generate_pdf_report
 
 router = APIRouter(prefix="/assessments", tags=["assessments"])
 
 
-@router.get("/questionnaires", response_model=List[QuestionnaireResponse])
-async def get_questionnaires():
-    """Get all questionnaire templates"""
-    return [
-        {
-            "category": category,
-            "title": data["title"],
-            "description": data["description"],
-            "questions": data["questions"]
-        }
-        for category, data in QUESTIONNAIRES.items()
-    ]
+def questionnaire_version(schema_version: Optional[str]) -> QuestionnaireVersion:
+    """The requested questionnaire version, or the one new assessments use"""
+    try:
+        return questionnaire_registry.get(schema_version) if schema_version else questionnaire_registry.current()
+    except UnknownSchemaVersionError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
-@router.get("/questionnaires/{category}", response_model=QuestionnaireResponse)
-async def get_questionnaire(category: AssessmentCategory):
-    """Get questionnaire template for a specific category"""
-    data = QUESTIONNAIRES[category]
+def questionnaire_template(version: QuestionnaireVersion, category: AssessmentCategory) -> dict:
+    data = version.templates[category]
     return {
+        "schema_version": version.schema_version,
         "category": category,
         "title": data["title"],
         "description": data["description"],
@@ -54,37 +66,104 @@ async def get_questionnaire(category: AssessmentCategory):
     }
 
 
+@router.get("/questionnaires", response_model=List[QuestionnaireResponse])
+async def get_questionnaires(schema_version: Optional[str] = None):
+    """Get all questionnaire templates, for the current version unless one is given"""
+    version = questionnaire_version(schema_version)
+    return [questionnaire_template(version, category) for category in version.templates]
+
+
+@router.get("/questionnaires/{category}", response_model=QuestionnaireResponse)
+async def get_questionnaire(category: AssessmentCategory, schema_version: Optional[str] = None):
+    """Get questionnaire template for a specific category"""
+    return questionnaire_template(questionnaire_version(schema_version), category)
+
+
+@router.get("/analytics/answers", response_model=AnswerDistributionResponse)
+async def get_answer_analytics(
+    category: AssessmentCategory,
+    question_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(draft|in_progress|completed)$"),
+    schema_version: Optional[str] = None,
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Answer counts per question option across all assessments (admin only)"""
+    questions = await get_answer_distribution(db, category, question_id, since, until, status_filter, schema_version)
+    return {"category": category, "questions": questions}
+
+
+@router.post("/admin/rescore", response_model=RescoreStatus, status_code=status.HTTP_202_ACCEPTED)
+async def start_rescoring(
+    request: RescoreRequest,
+    current_user: Principal = Depends(get_current_admin)
+):
+    """Rescore every stored result with the current scoring rules in the background (admin only)"""
+    try:
+        return rescoring_job.start(**request.model_dump())
+    except RescoringInProgress as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/admin/rescore", response_model=RescoreStatus)
+async def get_rescoring_status(current_user: Principal = Depends(get_current_admin)):
+    """Progress of the current or last rescoring run (admin only)"""
+    return rescoring_job.stats()
+
+
+@router.delete("/admin/rescore", response_model=RescoreStatus)
+async def stop_rescoring(current_user: Principal = Depends(get_current_admin)):
+    """Stop the running rescoring job after its current chunk (admin only)"""
+    rescoring_job.stop()
+    return rescoring_job.stats()
+
+
 @router.post("", response_model=AssessmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_assessment(
     assessment: AssessmentCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new assessment"""
-    db_assessment = create_assessment(db, current_user.id, assessment.title, assessment.description)
+    db_assessment = await create_assessment(db, current_user.id, assessment.title, assessment.description)
     return db_assessment
 
 
 @router.get("", response_model=List[AssessmentResponse])
 async def list_assessments(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(draft|in_progress|completed)$"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """List all assessments for the current user"""
-    assessments = get_user_assessments(db, current_user.id, skip, limit)
+    """List the current user's assessments, newest first
+
+    Pass the X-Next-Cursor response header back as `cursor` to get the next
+    page; the header is absent on the last page.
+    """
+    try:
+        assessments, next_cursor = await get_user_assessments(db, current_user.id, limit, cursor, status_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return assessments
 
 
 @router.get("/{assessment_id}", response_model=AssessmentResponse)
 async def get_assessment_detail(
     assessment_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get assessment details"""
-    assessment = get_assessment(db, assessment_id, current_user.id)
+    assessment = await get_assessment(db, assessment_id, current_user.id)
     if not assessment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
     return assessment
@@ -94,11 +173,11 @@ async def get_assessment_detail(
 async def update_assessment_detail(
     assessment_id: int,
     assessment_update: AssessmentUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update assessment details"""
-    updated = update_assessment(
+    updated = await update_assessment(
         db,
         assessment_id,
         current_user.id,
@@ -112,11 +191,11 @@ async def update_assessment_detail(
 @router.delete("/{assessment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_assessment_detail(
     assessment_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an assessment"""
-    success = delete_assessment(db, assessment_id, current_user.id)
+    success = await delete_assessment(db, assessment_id, current_user.id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -126,11 +205,11 @@ async def delete_assessment_detail(
 async def submit_answers(
     assessment_id: int,
     category_answers: CategoryAnswers,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit answers for a category"""
-    result = submit_category_answers(
+    result = await submit_category_answers(
         db,
         assessment_id,
         current_user.id,
@@ -142,27 +221,76 @@ async def submit_answers(
     return result
 
 
+@router.post("/{assessment_id}/answers/bulk", response_model=BulkAnswersResponse)
+async def submit_answers_bulk(
+    assessment_id: int,
+    bulk_answers: BulkCategoryAnswers,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Submit answers for several categories in one transaction"""
+    submitted = await submit_answer_batch(
+        db, assessment_id, current_user.id, bulk_answers.answers, with_results=True
+    )
+    if not submitted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    assessment, results = submitted
+    return {"results": results, "summary": summarize_assessment(assessment)}
+
+
 @router.get("/{assessment_id}/summary", response_model=AssessmentSummary)
 async def get_summary(
     assessment_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get assessment summary with overall score"""
-    summary = get_assessment_summary(db, assessment_id, current_user.id)
+    summary = await get_assessment_summary(db, assessment_id, current_user.id)
     if not summary:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
     return summary
 
 
+@router.get("/{assessment_id}/what-if", response_model=WhatIfResponse)
+async def get_what_if(
+    assessment_id: int,
+    category: Optional[AssessmentCategory] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Rank every single-question upgrade of the submitted answers by score gain"""
+    assessment = await get_assessment(db, assessment_id, current_user.id)
+    if not assessment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    return {
+        "assessment_id": assessment.id,
+        "overall_score": assessment.overall_score,
+        "upgrades": rank_upgrades(assessment, category, limit)
+    }
+
+
+@router.get("/{assessment_id}/benchmarks", response_model=BenchmarksResponse)
+async def get_benchmarks(
+    assessment_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Percentile rank of each category score against all assessments"""
+    categories = await get_assessment_benchmarks(db, assessment_id, current_user.id)
+    if categories is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
+    return {"assessment_id": assessment_id, "categories": categories}
+
+
 @router.get("/{assessment_id}/export/csv")
 async def export_csv(
     assessment_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Export assessment as CSV"""
-    assessment = get_assessment(db, assessment_id, current_user.id)
+    assessment = await get_assessment(db, assessment_id, current_user.id)
     if not assessment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
     
@@ -178,11 +306,11 @@ async def export_csv(
 @router.get("/{assessment_id}/export/pdf")
 async def export_pdf(
     assessment_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Export assessment as PDF"""
-    assessment = get_assessment(db, assessment_id, current_user.id)
+    assessment = await get_assessment(db, assessment_id, current_user.id)
     if not assessment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assessment not found")
     
@@ -20,7 +20,12 @@ class AssessmentUpdate(BaseModel):
 class CategoryAnswers(BaseModel):
     """Answers for a specific category"""
     category: AssessmentCategory
-    answers: Dict[str, int]  # question_id -> answer_value
+    answers: Dict[str, int]  # question_id -> answer_value, checked against the assessment's questionnaire version
+
+
+class BulkCategoryAnswers(BaseModel):
+    """Answers for any subset of categories, submitted together"""
+    answers: Dict[AssessmentCategory, Dict[str, int]] = Field(..., min_length=1)  # category -> question_id -> answer_value
 
 
 class AssessmentResultResponse(BaseModel):
@@ -62,8 +67,105 @@ class AssessmentSummary(BaseModel):
     category_scores: Dict[str, int]
 
 
+class BulkAnswersResponse(BaseModel):
+    """Results of a bulk submission with the updated summary"""
+    results: List[AssessmentResultResponse]
+    summary: AssessmentSummary
+
+
+class WhatIfUpgrade(BaseModel):
+    """Effect of raising one question's answer"""
+    category: str
+    question_id: str
+    current_value: int
+    upgraded_value: int
+    category_score: int
+    maturity_level: str
+    score_gain: int
+    overall_score: int
+    overall_gain: int
+
+
+class WhatIfResponse(BaseModel):
+    """Single-question upgrades of an assessment, largest gain first"""
+    assessment_id: int
+    overall_score: int
+    upgrades: List[WhatIfUpgrade]
+
+
+class CategoryBenchmark(BaseModel):
+    """One category score against every assessment's score in that category"""
+    category: str
+    score: int
+    maturity_level: str
+    assessments: int  # results in this category across all assessments
+    percentile_rank: float  # share scoring below, counting equal scores as half
+    maturity_distribution: Dict[str, int]
+    histogram: List[int]  # results at each score 0-100
+
+
+class BenchmarksResponse(BaseModel):
+    """Percentile benchmarks for each category an assessment has scored"""
+    assessment_id: int
+    categories: List[CategoryBenchmark]
+
+
+class AnswerOptionCount(BaseModel):
+    """How many answers chose one option value"""
+    value: int
+    count: int
+    share: float  # of the question's answers, 0-1
+
+
+class QuestionDistribution(BaseModel):
+    """Option counts for one question"""
+    question_id: str
+    answered: int
+    options: List[AnswerOptionCount]
+
+
+class AnswerDistributionResponse(BaseModel):
+    """Per-question answer distribution for one category"""
+    category: AssessmentCategory
+    questions: List[QuestionDistribution]
+
+
+class RescoreRequest(BaseModel):
+    """Options for a bulk rescoring run"""
+    schema_version: Optional[str] = None  # only assessments created with this questionnaire version
+    resume: bool = False  # continue after the checkpoint's last result
+    chunk_size: Optional[int] = Field(None, ge=1, le=10000)
+    workers: Optional[int] = Field(None, ge=0, le=64)
+
+
+class RescoreFailure(BaseModel):
+    """A stored result that could not be rescored"""
+    id: int
+    error: str
+
+
+class RescoreStatus(BaseModel):
+    """Progress and throughput of the current or last rescoring run"""
+    status: str  # idle, running, stopping, stopped, completed, failed
+    schema_version: Optional[str] = None
+    total: int
+    processed: int
+    updated: int
+    skipped: int
+    failed: int
+    summaries_updated: int
+    last_id: int
+    failures: List[RescoreFailure]
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    elapsed_seconds: float
+    rows_per_second: float
+    error: Optional[str] = None
+
+
 class QuestionnaireResponse(BaseModel):
     """Response schema for questionnaire template"""
+    schema_version: str
     category: AssessmentCategory
     title: str
     description: str
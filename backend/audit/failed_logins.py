@@ -0,0 +1,120 @@
+"""
+Asynchronously batched FailedLogin audit trail
+
+Failed logins are queued in memory and written in batches by a background
+thread, so the login path never waits on an audit insert. The rows are for
+investigation only; lockout decisions use backend.auth.attempts.
+"""
+import queue
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from backend.db.models import FailedLogin
+from backend.db.database import SessionLocal
+from backend.audit.logging import logger, log_error
+from backend.config import settings
+
+
+class FailedLoginAuditWriter:
+    """Buffers failed logins and inserts them in batches"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        enabled: bool = True,
+        batch_size: int = 100,
+        flush_interval: float = 2.0,
+        max_pending: int = 10000
+    ):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_pending)
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def record(self, user_id: int, ip_address: Optional[str] = None):
+        """Queue a failed login for the audit trail"""
+        if not self.enabled:
+            return
+        try:
+            self._queue.put_nowait({
+                "user_id": user_id,
+                "ip_address": ip_address,
+                "attempted_at": datetime.utcnow(),
+            })
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="failed-login-audit", daemon=True)
+            self._thread.start()
+
+    def _take_batch(self, timeout: Optional[float]) -> list:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list):
+        with self._write_lock:
+            db = self.session_factory()
+            try:
+                db.bulk_insert_mappings(FailedLogin, batch)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                log_error(e, "failed login audit flush")
+            finally:
+                db.close()
+        for _ in batch:
+            self._queue.task_done()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._take_batch(self.flush_interval)
+            if batch:
+                self._write(batch)
+
+    def flush(self):
+        """Write everything queued so far, blocking until done"""
+        while True:
+            batch = self._take_batch(None)
+            if not batch:
+                break
+            self._write(batch)
+        # Wait for any batch the writer thread is still inserting
+        self._queue.join()
+
+    def shutdown(self):
+        """Flush pending rows and stop the writer thread"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1)
+            self._thread = None
+        self.flush()
+        if self.dropped:
+            logger.warning(f"Failed login audit dropped {self.dropped} rows because the queue was full")
+
+
+failed_login_audit = FailedLoginAuditWriter(
+    session_factory=SessionLocal,
+    enabled=settings.failed_login_audit_enabled,
+    batch_size=settings.failed_login_audit_batch_size,
+    flush_interval=settings.failed_login_audit_flush_seconds
+)
@@ -15,9 +15,13 @@ logging.basicConfig(
 logger = logging.getLogger("ai_governance")
 
 
-def log_request(method: str, path: str, user_email: str = None, status_code: int = None):
+def log_request(method: str, path: str, user_email: str = None, status_code: int = None,
+                db_queries: int = None, db_time_ms: float = None):
     """Log API request"""
-    logger.info(f"Request: {method} {path} | User: {user_email or 'anonymous'} | Status: {status_code}")
+    message = f"Request: {method} {path} | User: {user_email or 'anonymous'} | Status: {status_code}"
+    if db_queries is not None:
+        message += f" | DB: {db_queries} queries {db_time_ms or 0:.1f}ms"
+    logger.info(message)
 
 
 def log_error(error: Exception, context: str = ""):
@@ -0,0 +1,119 @@
+"""
+Admission control for the login path
+
+Caps the number of password verifications in flight and the number of
+logins allowed to wait for a slot. Anything beyond that is shed right away
+so a credential-stuffing wave cannot starve the rest of the API.
+"""
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from backend.config import settings
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed by admission control"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Request shed by admission control")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a bounded FIFO wait queue"""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float, retry_after: int = 1):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self._in_flight = 0
+        # Waiters may belong to different event loops, so slots are handed
+        # over with call_soon_threadsafe rather than an asyncio primitive.
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold an in-flight slot for the duration of the block"""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                self.admitted += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                self.shed += 1
+                raise AdmissionRejected(self.retry_after)
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+            self.queued += 1
+
+        try:
+            await asyncio.wait_for(waiter[1], self.queue_timeout)
+        except BaseException as exc:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                # Otherwise a slot is already on its way to the cancelled
+                # future and _grant will pass it on.
+                if isinstance(exc, asyncio.TimeoutError):
+                    self.shed += 1
+            if isinstance(exc, asyncio.TimeoutError):
+                raise AdmissionRejected(self.retry_after) from None
+            raise
+
+        with self._lock:
+            self.admitted += 1
+
+    def _release(self):
+        with self._lock:
+            while self._waiters:
+                # Hand the slot straight to the next waiter
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._grant, future)
+                    return
+                except RuntimeError:
+                    # The waiter's event loop has already closed
+                    continue
+            self._in_flight -= 1
+
+    def _grant(self, future: asyncio.Future):
+        if future.done():
+            # Waiter gave up before the slot arrived
+            self._release()
+        else:
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        """Live counters for monitoring"""
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "shed": self.shed,
+            }
+
+
+login_admission = AdmissionController(
+    max_in_flight=settings.login_max_in_flight,
+    max_queue=settings.login_max_queue,
+    queue_timeout=settings.login_queue_timeout_seconds,
+    retry_after=settings.login_retry_after_seconds
+)
@@ -0,0 +1,239 @@
+"""
+Failed-login attempt counters used for account lockout
+
+Lockout decisions read a per-user counter instead of inserting and counting
+FailedLogin rows. Two backends are available:
+
+- memory: exact sliding window per process, capped at the lockout threshold
+- shared: sliding-window counter in a shared SQL store, so every worker
+  sees the same count; any SQLAlchemy URL works, including a SQLite file
+
+In the application database the counter table comes from the Alembic
+revision; only a separately configured store creates it on first use.
+"""
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Optional
+from sqlalchemy import Column, Integer, MetaData, String, Table, case, create_engine, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from backend.config import settings
+
+
+class AttemptCounter(ABC):
+    """Counts failures per key over a sliding window"""
+
+    def __init__(self, window_seconds: float, limit: int):
+        self.window_seconds = window_seconds
+        self.limit = limit
+
+    @abstractmethod
+    def record_failure(self, key: str, now: Optional[float] = None) -> int:
+        """Record a failure and return the failures inside the window"""
+
+    @abstractmethod
+    def failures(self, key: str, now: Optional[float] = None) -> int:
+        """Failures inside the window for a key"""
+
+    @abstractmethod
+    def reset(self, key: str):
+        """Forget all failures for a key"""
+
+    @abstractmethod
+    def clear(self):
+        """Forget all failures for every key"""
+
+    async def record_failure_async(self, key: str, now: Optional[float] = None) -> int:
+        """record_failure for async callers"""
+        return self.record_failure(key, now)
+
+    async def reset_async(self, key: str):
+        """reset for async callers"""
+        self.reset(key)
+
+
+class InMemoryAttemptCounter(AttemptCounter):
+    """Exact sliding window of failure timestamps per key
+
+    Each key keeps at most `limit` timestamps, which is all a lockout
+    decision needs, so recording and checking are O(1).
+    """
+
+    def __init__(self, window_seconds: float, limit: int):
+        super().__init__(window_seconds, limit)
+        self._attempts: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, attempts: deque, now: float):
+        cutoff = now - self.window_seconds
+        while attempts and attempts[0] <= cutoff:
+            attempts.popleft()
+
+    def record_failure(self, key: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts is None:
+                attempts = self._attempts[key] = deque(maxlen=max(self.limit, 1))
+            self._prune(attempts, now)
+            attempts.append(now)
+            return len(attempts)
+
+    def failures(self, key: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if attempts is None:
+                return 0
+            self._prune(attempts, now)
+            if not attempts:
+                del self._attempts[key]
+                return 0
+            return len(attempts)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._attempts.clear()
+
+
+metadata = MetaData()
+
+login_attempt_counters = Table(
+    "login_attempt_counters",
+    metadata,
+    Column("key", String(100), primary_key=True),
+    Column("window_index", Integer, nullable=False),
+    Column("current_count", Integer, nullable=False),
+    Column("previous_count", Integer, nullable=False),
+)
+
+UPSERT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+class SharedAttemptCounter(AttemptCounter):
+    """Sliding-window counter stored as one row per key in a shared SQL store
+
+    Uses the two-bucket approximation: the count for the current window plus
+    the previous window's count weighted by how much of it still overlaps
+    the sliding window. Every operation touches a single row.
+    """
+
+    def __init__(self, url: str, window_seconds: float, limit: int, create_table: bool = False):
+        super().__init__(window_seconds, limit)
+        connect_args = {"check_same_thread": False} if "sqlite" in url else {}
+        self.engine = create_engine(url, connect_args=connect_args)
+        self._table_ready = not create_table
+
+    def _ensure_table(self):
+        if not self._table_ready:
+            metadata.create_all(self.engine, tables=[login_attempt_counters])
+            self._table_ready = True
+
+    def _roll(self, row, now: float):
+        """Return (window_index, current, previous) rolled forward to now"""
+        window_index = int(now // self.window_seconds)
+        if row is None:
+            return window_index, 0, 0
+        if row.window_index == window_index:
+            return window_index, row.current_count, row.previous_count
+        if row.window_index == window_index - 1:
+            return window_index, 0, row.current_count
+        return window_index, 0, 0
+
+    def _estimate(self, window_index: int, current: int, previous: int, now: float) -> int:
+        elapsed = now - window_index * self.window_seconds
+        overlap = 1 - elapsed / self.window_seconds
+        return current + int(previous * overlap)
+
+    def _record_statement(self, key: str, window_index: int):
+        """Single-statement upsert that rolls the window and counts the failure
+
+        The window roll happens in SQL against the stored row, so concurrent
+        workers never lose an increment and the first failure for a key
+        cannot race another worker's insert.
+        """
+        insert = UPSERT_INSERTS.get(self.engine.dialect.name)
+        if insert is None:
+            raise ValueError(f"Shared attempt counter does not support {self.engine.dialect.name}")
+        table = login_attempt_counters
+        statement = insert(table).values(
+            key=key, window_index=window_index, current_count=1, previous_count=0
+        )
+        # SET expressions read the row as it was before the update
+        return statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "window_index": window_index,
+                "current_count": case(
+                    (table.c.window_index == window_index, table.c.current_count + 1),
+                    else_=1,
+                ),
+                "previous_count": case(
+                    (table.c.window_index == window_index, table.c.previous_count),
+                    (table.c.window_index == window_index - 1, table.c.current_count),
+                    else_=0,
+                ),
+            },
+        ).returning(table.c.current_count, table.c.previous_count)
+
+    def record_failure(self, key: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        self._ensure_table()
+        window_index = int(now // self.window_seconds)
+        with self.engine.begin() as conn:
+            current, previous = conn.execute(self._record_statement(key, window_index)).one()
+        return self._estimate(window_index, current, previous, now)
+
+    async def record_failure_async(self, key: str, now: Optional[float] = None) -> int:
+        # A round trip to the shared store must not block the event loop
+        return await asyncio.to_thread(self.record_failure, key, now)
+
+    async def reset_async(self, key: str):
+        await asyncio.to_thread(self.reset, key)
+
+    def failures(self, key: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(login_attempt_counters).where(login_attempt_counters.c.key == key)
+            ).first()
+        window_index, current, previous = self._roll(row, now)
+        return self._estimate(window_index, current, previous, now)
+
+    def reset(self, key: str):
+        self._ensure_table()
+        with self.engine.begin() as conn:
+            conn.execute(login_attempt_counters.delete().where(login_attempt_counters.c.key == key))
+
+    def clear(self):
+        self._ensure_table()
+        with self.engine.begin() as conn:
+            conn.execute(login_attempt_counters.delete())
+
+
+def build_attempt_counter() -> AttemptCounter:
+    """Create the attempt counter selected in settings"""
+    window_seconds = settings.lockout_duration_minutes * 60
+    limit = settings.max_failed_login_attempts
+    if settings.attempt_counter_backend == "shared":
+        # The application database gets the table from its migrations
+        if settings.attempt_counter_url and settings.attempt_counter_url != settings.database_url:
+            return SharedAttemptCounter(settings.attempt_counter_url, window_seconds, limit, create_table=True)
+        return SharedAttemptCounter(settings.database_url, window_seconds, limit)
+    if settings.attempt_counter_backend == "memory":
+        return InMemoryAttemptCounter(window_seconds, limit)
+    raise ValueError(f"Unknown attempt counter backend: {settings.attempt_counter_backend}")
+
+
+failed_login_counter = build_attempt_counter()
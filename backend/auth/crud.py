@@ -1,38 +1,55 @@
-from sqlalchemy.orm import Session
+import uuid
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-from typing import Optional
-from backend.db.models import User, FailedLogin, PasswordReset
-from backend.auth.security import get_password_hash, verify_password, generate_reset_token
+from typing import Callable, Optional, Tuple
+from backend.db.models import User, PasswordReset, RefreshToken
+from backend.db.database import AsyncSessionLocal
+from backend.auth.security import generate_reset_token, generate_refresh_token, hash_refresh_token
+from backend.auth.hashing import get_password_hash_async, verify_password_async
+from backend.auth.principal_cache import principal_cache
+from backend.auth.attempts import failed_login_counter
+from backend.audit.failed_logins import failed_login_audit
+from backend.audit.logging import log_security_event
 from backend.config import settings
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
+# Background tasks run after the request's session is gone, so they open their own
+background_session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+
+
+def normalize_email(email: str) -> str:
+    """Emails are stored and looked up in lowercase, so letter case never splits an account"""
+    return email.strip().lower()
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Get user by email"""
-    return db.query(User).filter(User.email == email).first()
+    return await db.scalar(select(User).where(User.email == normalize_email(email)))
 
 
-def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
     """Get user by ID"""
-    return db.query(User).filter(User.id == user_id).first()
+    return await db.get(User, user_id)
 
 
-def create_user(db: Session, email: str, password: str, full_name: Optional[str] = None) -> User:
+async def create_user(db: AsyncSession, email: str, password: str, full_name: Optional[str] = None) -> User:
     """Create a new user"""
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash_async(password)
     db_user = User(
-        email=email,
+        email=normalize_email(email),
         hashed_password=hashed_password,
         full_name=full_name
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
-def authenticate_user(db: Session, email: str, password: str, ip_address: Optional[str] = None) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str, ip_address: Optional[str] = None) -> Optional[User]:
     """Authenticate user and handle failed login tracking"""
-    user = get_user_by_email(db, email)
+    user = await get_user_by_email(db, email)
     
     if not user:
         return None
@@ -45,47 +62,64 @@ def authenticate_user(db: Session, email: str, password: str, ip_address: Option
             # Unlock account if lockout period has expired
             user.is_locked = False
             user.locked_until = None
-            db.commit()
+            await db.commit()
+            principal_cache.invalidate(user.email)
+    
+    # End the read transaction so no connection is held while bcrypt runs
+    await db.commit()
     
     # Verify password
-    if not verify_password(password, user.hashed_password):
-        # Record failed login
-        failed_login = FailedLogin(user_id=user.id, ip_address=ip_address)
-        db.add(failed_login)
-        
-        # Check failed login count in the last lockout duration
-        cutoff_time = datetime.utcnow() - timedelta(minutes=settings.lockout_duration_minutes)
-        recent_failures = db.query(FailedLogin).filter(
-            FailedLogin.user_id == user.id,
-            FailedLogin.attempted_at >= cutoff_time
-        ).count()
+    if not await verify_password_async(password, user.hashed_password):
+        # Count the failure in the sliding window; the audit row is written later
+        recent_failures = await failed_login_counter.record_failure_async(str(user.id))
+        failed_login_audit.record(user.id, ip_address)
         
         # Lock account if too many failures
         if recent_failures >= settings.max_failed_login_attempts:
             user.is_locked = True
             user.locked_until = datetime.utcnow() + timedelta(minutes=settings.lockout_duration_minutes)
-        
-        db.commit()
+            await db.commit()
+            principal_cache.invalidate(user.email)
         return None
     
     # Clear failed logins on successful authentication
-    db.query(FailedLogin).filter(FailedLogin.user_id == user.id).delete()
-    db.commit()
+    await failed_login_counter.reset_async(str(user.id))
     
     return user
 
 
-def create_password_reset_token(db: Session, email: str) -> Optional[str]:
+async def upgrade_password_hash(user_id: int, password: str, old_hash: str) -> bool:
+    """Rehash a password at the current bcrypt cost after a successful login
+
+    Runs as a background task on its own session. The update only applies if
+    the stored hash is unchanged, so a password reset that lands in the
+    meantime is never overwritten.
+    """
+    new_hash = await get_password_hash_async(password)
+    async with background_session_factory() as db:
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    return bool(result.rowcount)
+
+
+async def create_password_reset_token(db: AsyncSession, email: str) -> Optional[str]:
     """Create a password reset token"""
-    user = get_user_by_email(db, email)
+    user = await get_user_by_email(db, email)
     if not user:
         return None
     
     # Invalidate existing tokens
-    db.query(PasswordReset).filter(
-        PasswordReset.user_id == user.id,
-        PasswordReset.is_used == False
-    ).update({"is_used": True})
+    await db.execute(
+        update(PasswordReset)
+        .where(PasswordReset.user_id == user.id, PasswordReset.is_used == False)
+        .values(is_used=True)
+        .execution_options(synchronize_session=False)
+    )
     
     # Create new token
     token = generate_reset_token()
@@ -95,17 +129,16 @@ def create_password_reset_token(db: Session, email: str) -> Optional[str]:
         expires_at=datetime.utcnow() + timedelta(hours=1)
     )
     db.add(reset)
-    db.commit()
+    await db.commit()
     
     return token
 
 
-def reset_password_with_token(db: Session, token: str, new_password: str) -> bool:
+async def reset_password_with_token(db: AsyncSession, token: str, new_password: str) -> bool:
     """Reset password using a valid token"""
-    reset = db.query(PasswordReset).filter(
-        PasswordReset.token == token,
-        PasswordReset.is_used == False
-    ).first()
+    reset = await db.scalar(
+        select(PasswordReset).where(PasswordReset.token == token, PasswordReset.is_used == False)
+    )
     
     if not reset:
         return False
@@ -115,12 +148,126 @@ def reset_password_with_token(db: Session, token: str, new_password: str) -> boo
         return False
     
     # Update password
-    user = get_user_by_id(db, reset.user_id)
+    user = await get_user_by_id(db, reset.user_id)
     if not user:
         return False
     
-    user.hashed_password = get_password_hash(new_password)
+    # Release the connection while the new hash is computed
+    await db.commit()
+    user.hashed_password = await get_password_hash_async(new_password)
     reset.is_used = True
+    await revoke_user_refresh_tokens(db, user.id, commit=False)
+    
+    await db.commit()
+    principal_cache.invalidate(user.email)
+    return True
+
+
+async def set_user_active(db: AsyncSession, user_id: int, is_active: bool) -> Optional[User]:
+    """Activate or deactivate a user account"""
+    user = await get_user_by_id(db, user_id)
+    if not user:
+        return None
+    
+    user.is_active = is_active
+    if not is_active:
+        await revoke_user_refresh_tokens(db, user.id, commit=False)
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate(user.email)
+    return user
+
+
+async def issue_refresh_token(db: AsyncSession, user_id: int, family_id: Optional[str] = None, commit: bool = True) -> str:
+    """Create a refresh token, starting a new rotation family unless one is given"""
+    token = generate_refresh_token()
+    refresh = RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days)
+    )
+    db.add(refresh)
+    if commit:
+        await db.commit()
+    return token
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Optional[Tuple[User, str]]:
+    """Exchange a refresh token for its successor
+
+    Presenting a token that was already rotated means it leaked, so the
+    whole family is revoked and the caller has to log in again.
+    """
+    refresh = await db.scalar(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token))
+    )
+    
+    if not refresh or refresh.revoked_at is not None:
+        return None
+    
+    now = datetime.utcnow()
+    if now > refresh.expires_at:
+        return None
+    
+    # Conditional update so concurrent refreshes cannot both rotate the token
+    rotated = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == refresh.id, RefreshToken.used_at.is_(None))
+        .values(used_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    
+    if not rotated.rowcount:
+        await db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == refresh.family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        user = await get_user_by_id(db, refresh.user_id)
+        log_security_event("refresh_token_reuse", user.email if user else str(refresh.user_id), f"family={refresh.family_id}")
+        return None
     
-    db.commit()
+    user = await get_user_by_id(db, refresh.user_id)
+    if not user:
+        await db.rollback()
+        return None
+    
+    new_token = await issue_refresh_token(db, user.id, refresh.family_id, commit=False)
+    await db.commit()
+    return user, new_token
+
+
+async def revoke_refresh_token_family(db: AsyncSession, token: str, user_id: int) -> bool:
+    """Revoke a refresh token and every rotation of it"""
+    refresh = await db.scalar(
+        select(RefreshToken).where(
+            RefreshToken.token_hash == hash_refresh_token(token),
+            RefreshToken.user_id == user_id
+        )
+    )
+    if not refresh:
+        return False
+    
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == refresh.family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
     return True
+
+
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: int, commit: bool = True):
+    """Revoke every outstanding refresh token for a user"""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if commit:
+        await db.commit()
@@ -1,21 +1,24 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from backend.db.database import get_db
-from backend.auth.security import decode_access_token
-from backend.auth.crud import get_user_by_email
-from backend.db.models import User
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.db.database import get_async_db
+from backend.auth.security import decode_access_token_claims
+from backend.auth.revocation import revocation_list
+from backend.auth.crud import get_user_by_email, normalize_email
+from backend.auth.principal_cache import Principal, principal_cache
+from backend.db.routing import read_your_writes
 
 security = HTTPBearer()
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
     """Dependency to get current authenticated user"""
     token = credentials.credentials
-    email = decode_access_token(token)
+    claims = decode_access_token_claims(token)
+    email = claims.get("sub") if claims else None
     
     if email is None:
         raise HTTPException(
@@ -24,18 +27,53 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = get_user_by_email(db, email)
-    if user is None:
+    jti = claims.get("jti")
+    if jti and await revocation_list.is_revoked(db, jti):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
+            detail="Token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Tokens issued before emails were normalized may carry any letter case
+    user = principal_cache.get(normalize_email(email))
+    if user is None:
+        db_user = await get_user_by_email(db, email)
+        if db_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user = Principal.from_user(db_user)
+        principal_cache.put(user)
+    
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
         )
     
+    # Writes committed on this session start the user's read-your-writes window
+    db.info["principal_id"] = user.id
     return user
+
+
+async def get_read_db(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> AsyncSession:
+    """Dependency for read-only handlers: reads go to the replica unless the user wrote recently"""
+    if not read_your_writes.is_sticky(current_user.id):
+        db.info["read_only"] = True
+    return db
+
+
+async def get_current_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """Dependency that requires an administrator"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator privileges required"
+        )
+    return current_user
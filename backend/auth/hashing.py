@@ -0,0 +1,153 @@
+"""
+Bounded worker pool for bcrypt hashing and verification
+
+bcrypt is deliberately slow, so running it on the event loop stalls every
+other request on the worker. The pool moves that work onto a thread or
+process executor and caps how much work may be waiting for it.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional
+from backend.auth.security import verify_password, get_password_hash, configure_bcrypt_rounds, current_bcrypt_rounds
+from backend.config import settings
+
+
+class PasswordHashPoolSaturated(Exception):
+    """Raised when the hashing pool queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+class PasswordHashPool:
+    """Runs bcrypt work on a bounded executor with an awaitable API"""
+
+    def __init__(
+        self,
+        workers: int,
+        queue_depth: int,
+        executor: str = "thread",
+        retry_after: int = 1
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {executor}")
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.executor_kind = executor
+        self.retry_after = retry_after
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Jobs currently running or waiting for a worker"""
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                # Worker processes import their own CryptContext, so pass on
+                # the cost in case it was calibrated after startup. The pool
+                # is created once the server's threads are running, so the
+                # workers are spawned rather than forked
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=configure_bcrypt_rounds,
+                    initargs=(current_bcrypt_rounds(),)
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    def _acquire_slot(self):
+        with self._lock:
+            if self._pending >= self.workers + self.queue_depth:
+                raise PasswordHashPoolSaturated(self.retry_after)
+            self._pending += 1
+
+    def _release_slot(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable, *args):
+        """Run func(*args) on the pool and await its result"""
+        if self.workers <= 0:
+            # Inline mode, mainly useful for benchmarks and debugging
+            return func(*args)
+
+        self._acquire_slot()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release_slot()
+            raise
+        future.add_done_callback(self._release_slot)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        """Live counters for monitoring"""
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "pending": self._pending,
+        }
+
+    def shutdown(self):
+        """Stop the executor, waiting for running jobs"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hash_pool = PasswordHashPool(
+    workers=settings.password_hash_workers,
+    queue_depth=settings.password_hash_queue_depth,
+    executor=settings.password_hash_executor,
+    retry_after=settings.password_hash_retry_after_seconds
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool"""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await password_hash_pool.run(get_password_hash, password)
+
+
+def _hash_all(passwords: List[str], workers: int, rounds: int) -> List[str]:
+    chunksize = max(1, len(passwords) // (workers * 4))
+    # This runs on a worker thread, and forking a multithreaded process can
+    # copy held locks into the children, so start them fresh instead
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=configure_bcrypt_rounds,
+        initargs=(rounds,)
+    ) as executor:
+        return list(executor.map(get_password_hash, passwords, chunksize=chunksize))
+
+
+async def hash_passwords_parallel(passwords: List[str], workers: int = 0) -> List[str]:
+    """Hash many passwords across every core, for bulk provisioning
+
+    Uses its own short-lived process pool so a large import does not queue
+    ahead of interactive logins on password_hash_pool.
+    """
+    if not passwords:
+        return []
+    workers = workers or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _hash_all, passwords, workers, current_bcrypt_rounds())
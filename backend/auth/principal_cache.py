@@ -0,0 +1,111 @@
+"""
+In-process cache of authenticated principals
+
+get_current_user runs on every authenticated request. Caching a small
+immutable snapshot of the user, keyed by the token subject, saves the user
+lookup on warm requests. Entries expire after a TTL, the cache is bounded
+with LRU eviction, and auth flows that change a user invalidate it.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from backend.db.models import User
+from backend.config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of an authenticated user"""
+    id: int
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    is_locked: bool
+    is_admin: bool = False
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=bool(user.is_active),
+            is_locked=bool(user.is_locked),
+            is_admin=bool(user.is_admin),
+        )
+
+
+class PrincipalCache:
+    """Thread-safe TTL + LRU cache of principals keyed by email"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, email: str) -> Optional[Principal]:
+        """Return a fresh cached principal, or None on a miss"""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[email]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(email)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, principal: Principal):
+        """Cache a principal, evicting the least recently used entry if full"""
+        if not self.enabled:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[principal.email] = (expires_at, principal)
+            self._entries.move_to_end(principal.email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str):
+        """Drop the cached principal for a user"""
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def clear(self):
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    max_entries=settings.principal_cache_max_entries
+)
@@ -0,0 +1,126 @@
+"""
+Bulk user provisioning from CSV or NDJSON
+
+Rows are validated with the signup schema, checked against existing users
+in one query, hashed in parallel across cores and inserted in batched
+transactions. Bad rows are reported individually and never abort the batch.
+"""
+import csv
+import io
+import json
+from typing import Dict, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.db.models import User
+from backend.auth.schemas import UserCreate
+from backend.auth.hashing import hash_passwords_parallel
+from backend.auth.crud import normalize_email
+from backend.config import settings
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+
+def parse_user_rows(content: str, fmt: str) -> List[Tuple[int, object]]:
+    """Parse an upload into (row number, raw row) pairs
+
+    Unparseable NDJSON lines are kept as error strings so they can be
+    reported with their line number.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(content))
+        return [(number, row) for number, row in enumerate(reader, start=2)]
+    if fmt == "ndjson":
+        rows = []
+        for number, line in enumerate(content.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append((number, json.loads(line)))
+            except json.JSONDecodeError as e:
+                rows.append((number, f"Invalid JSON: {e.msg}"))
+        return rows
+    raise ValueError(f"Unsupported format: {fmt}. Use one of {', '.join(SUPPORTED_FORMATS)}")
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def bulk_create_users(db: AsyncSession, rows: List[Tuple[int, object]], batch_size: int = 0) -> Dict:
+    """Create users from parsed rows, returning counts and per-row failures"""
+    batch_size = batch_size or settings.provisioning_batch_size
+    failures = []
+    valid: List[Tuple[int, UserCreate]] = []
+    seen = set()
+
+    for number, raw in rows:
+        if not isinstance(raw, dict):
+            failures.append({"row": number, "email": None, "error": raw if isinstance(raw, str) else "Row must be an object"})
+            continue
+        try:
+            user = UserCreate(**{key: value for key, value in raw.items() if value not in (None, "")})
+        except ValidationError as e:
+            failures.append({"row": number, "email": raw.get("email"), "error": _validation_message(e)})
+            continue
+        email = normalize_email(user.email)
+        if email in seen:
+            failures.append({"row": number, "email": user.email, "error": "Duplicate email in upload"})
+            continue
+        seen.add(email)
+        valid.append((number, user))
+
+    # One query for every email already registered; stored emails are normalized
+    existing = set()
+    if valid:
+        emails = [normalize_email(user.email) for _, user in valid]
+        existing = set(await db.scalars(select(User.email).where(User.email.in_(emails))))
+        # Release the connection before the hashing below
+        await db.commit()
+
+    pending = []
+    for number, user in valid:
+        if normalize_email(user.email) in existing:
+            failures.append({"row": number, "email": user.email, "error": "Email already registered"})
+        else:
+            pending.append((number, user))
+
+    hashes = await hash_passwords_parallel(
+        [user.password for _, user in pending],
+        workers=settings.provisioning_hash_workers
+    )
+
+    created = 0
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        hash_batch = hashes[start:start + batch_size]
+        mappings = [
+            {"email": normalize_email(user.email), "hashed_password": hashed, "full_name": user.full_name}
+            for (_, user), hashed in zip(batch, hash_batch)
+        ]
+        try:
+            await db.execute(insert(User), mappings)
+            await db.commit()
+            created += len(batch)
+        except IntegrityError:
+            # Someone registered one of these emails meanwhile; retry row by row
+            await db.rollback()
+            for (number, user), mapping in zip(batch, mappings):
+                try:
+                    await db.execute(insert(User), [mapping])
+                    await db.commit()
+                    created += 1
+                except IntegrityError:
+                    await db.rollback()
+                    failures.append({"row": number, "email": user.email, "error": "Email already registered"})
+
+    failures.sort(key=lambda failure: failure["row"])
+    return {
+        "total": len(rows),
+        "created": created,
+        "failed": len(failures),
+        "failures": failures,
+    }
@@ -0,0 +1,167 @@
+"""
+Access token revocation list
+
+Revoked token IDs (`jti`) are stored in the revoked_tokens table until the
+token would have expired anyway. An in-memory bloom filter of those IDs sits
+in front of the table, so the common case, a token that was never revoked,
+is answered without touching the database.
+
+Each worker loads the filter at startup and then reloads it from the table
+every `revocation_refresh_seconds` in a background task on its own session,
+which is also when expired rows are pruned; tokens revoked on another worker
+take effect here within that interval. Request-path checks only read.
+"""
+import asyncio
+import hashlib
+import math
+import threading
+from datetime import datetime
+from typing import Callable, Optional, Set
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.db.models import RevokedToken
+from backend.db.database import AsyncSessionLocal
+from backend.audit.logging import log_error
+from backend.config import settings
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: position_i = h1 + i * h2
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class TokenRevocationList:
+    """Revoked access tokens behind an in-memory bloom filter"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        capacity: int,
+        error_rate: float,
+        refresh_seconds: float
+    ):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_seconds = refresh_seconds
+        self.bloom_negatives = 0
+        self.db_lookups = 0
+        self.refreshes = 0
+        self._bloom = BloomFilter(capacity, error_rate)
+        # Revoked here since the last reload read the table; they may be
+        # missing from that read and are carried into the rebuilt filter
+        self._revoked_since_snapshot: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    async def refresh(self):
+        """Prune expired revocations and rebuild the bloom filter from the table"""
+        async with self.session_factory() as db:
+            await db.execute(
+                delete(RevokedToken)
+                .where(RevokedToken.expires_at < datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            with self._lock:
+                self._revoked_since_snapshot = set()
+            jtis = list(await db.scalars(select(RevokedToken.jti)))
+
+        # Grow the filter if revocations outnumber its planned capacity
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            for jti in self._revoked_since_snapshot:
+                bloom.add(jti)
+            self._bloom = bloom
+            self.refreshes += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                log_error(e, "token revocation refresh")
+
+    def start(self):
+        """Reload the filter every refresh_seconds on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        """Cancel the background reload"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: datetime, user_id: Optional[int] = None):
+        """Revoke a token until its expiry"""
+        if await db.get(RevokedToken, jti) is None:
+            db.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+            await db.commit()
+        with self._lock:
+            self._bloom.add(jti)
+            self._revoked_since_snapshot.add(jti)
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        """Check a token ID, querying the table only on a bloom filter hit"""
+        with self._lock:
+            maybe_revoked = jti in self._bloom
+            if not maybe_revoked:
+                self.bloom_negatives += 1
+                return False
+            self.db_lookups += 1
+        return await db.get(RevokedToken, jti) is not None
+
+    def clear(self):
+        """Drop the in-memory filter until the next reload"""
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._revoked_since_snapshot = set()
+            self.bloom_negatives = 0
+            self.db_lookups = 0
+            self.refreshes = 0
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                "bloom_bits": self._bloom.size,
+                "bloom_hashes": self._bloom.hash_count,
+                "entries": self._bloom.count,
+                "bloom_negatives": self.bloom_negatives,
+                "db_lookups": self.db_lookups,
+                "refreshes": self.refreshes,
+            }
+
+
+revocation_list = TokenRevocationList(
+    AsyncSessionLocal,
+    capacity=settings.revocation_bloom_capacity,
+    error_rate=settings.revocation_bloom_error_rate,
+    refresh_seconds=settings.revocation_refresh_seconds
+)
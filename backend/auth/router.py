@@ -1,20 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from datetime import timedelta
-from backend.db.database import get_db
-from backend.auth.schemas import UserCreate, UserLogin, UserResponse, Token, PasswordResetRequest, PasswordResetConfirm
-from backend.auth.crud import create_user, authenticate_user, get_user_by_email, create_password_reset_token, reset_password_with_token
-from backend.auth.security import create_access_token
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, status, Request, UploadFile
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from typing import Optional
+from backend.db.database import get_async_db
+from backend.auth.schemas import UserCreate, UserLogin, UserResponse, Token, RefreshRequest, LogoutRequest, PasswordResetRequest, PasswordResetConfirm, BulkImportResult
+from backend.auth.crud import (
+    create_user,
+    authenticate_user,
+    get_user_by_email,
+    create_password_reset_token,
+    reset_password_with_token,
+    issue_refresh_token,
+    rotate_refresh_token,
+    revoke_refresh_token_family,
+    upgrade_password_hash
+)
+from backend.auth.security import create_access_token, decode_access_token_claims, password_needs_rehash
+from backend.auth.dependencies import security, get_current_user, get_current_admin
+from backend.auth.provisioning import parse_user_rows, bulk_create_users, SUPPORTED_FORMATS
+from backend.auth.principal_cache import Principal
+from backend.auth.revocation import revocation_list
+from backend.auth.admission import login_admission
+from backend.auth.throttle import login_throttle
 from backend.config import settings
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = get_user_by_email(db, user.email)
+    existing_user = await get_user_by_email(db, user.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -22,20 +40,30 @@ async def signup(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create user
-    db_user = create_user(db, user.email, user.password, user.full_name)
+    db_user = await create_user(db, user.email, user.password, user.full_name)
     return db_user
 
 
 @router.post("/login", response_model=Token)
-async def login(user_login: UserLogin, request: Request, db: Session = Depends(get_db)):
+async def login(
+    user_login: UserLogin,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
     """Authenticate user and return JWT token"""
     # Get client IP
     ip_address = request.client.host if request.client else None
     
-    # Authenticate
-    user = authenticate_user(db, user_login.email, user_login.password, ip_address)
+    # Reject noisy IPs and subnets before spending a bcrypt verification
+    login_throttle.check(ip_address)
+    
+    # Authenticate, shedding load once too many verifications are queued
+    async with login_admission.admit():
+        user = await authenticate_user(db, user_login.email, user_login.password, ip_address)
     
     if not user:
+        login_throttle.record_failure(ip_address)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password, or account is locked",
@@ -54,13 +82,69 @@ async def login(user_login: UserLogin, request: Request, db: Session = Depends(g
         data={"sub": user.email}, expires_delta=access_token_expires
     )
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Upgrade hashes made at an older bcrypt cost once the response is sent
+    if password_needs_rehash(user.hashed_password):
+        background_tasks.add_task(upgrade_password_hash, user.id, user_login.password, user.hashed_password)
+    
+    refresh_token = await issue_refresh_token(db, user.id)
+    
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(refresh_request: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Rotate a refresh token and return a new token pair"""
+    rotated = await rotate_refresh_token(db, refresh_request.refresh_token)
+    
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user, refresh_token = rotated
+    if not user.is_active or user.is_locked:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is inactive or locked"
+        )
+    
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+    access_token = create_access_token(
+        data={"sub": user.email}, expires_delta=access_token_expires
+    )
+    
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout(
+    logout_request: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Revoke the current access token and, if given, its refresh token"""
+    claims = decode_access_token_claims(credentials.credentials)
+    if claims and claims.get("jti"):
+        await revocation_list.revoke(
+            db,
+            claims["jti"],
+            datetime.utcfromtimestamp(claims["exp"]),
+            user_id=current_user.id
+        )
+    
+    if logout_request and logout_request.refresh_token:
+        await revoke_refresh_token_family(db, logout_request.refresh_token, current_user.id)
+    
+    return {"message": "Successfully logged out"}
 
 
 @router.post("/reset-password", status_code=status.HTTP_200_OK)
-async def request_password_reset(reset_request: PasswordResetRequest, db: Session = Depends(get_db)):
+async def request_password_reset(reset_request: PasswordResetRequest, db: AsyncSession = Depends(get_async_db)):
     """Request a password reset token"""
-    token = create_password_reset_token(db, reset_request.email)
+    token = await create_password_reset_token(db, reset_request.email)
     
     # Always return success to prevent email enumeration
     # In production, send email with token here
@@ -72,9 +156,9 @@ async def request_password_reset(reset_request: PasswordResetRequest, db: Sessio
 
 
 @router.post("/reset-password/confirm", status_code=status.HTTP_200_OK)
-async def confirm_password_reset(reset_confirm: PasswordResetConfirm, db: Session = Depends(get_db)):
+async def confirm_password_reset(reset_confirm: PasswordResetConfirm, db: AsyncSession = Depends(get_async_db)):
     """Reset password using a valid token"""
-    success = reset_password_with_token(db, reset_confirm.token, reset_confirm.new_password)
+    success = await reset_password_with_token(db, reset_confirm.token, reset_confirm.new_password)
     
     if not success:
         raise HTTPException(
@@ -83,3 +167,30 @@ async def confirm_password_reset(reset_confirm: PasswordResetConfirm, db: Sessio
         )
     
     return {"message": "Password successfully reset"}
+
+
+@router.post("/admin/users/bulk", response_model=BulkImportResult)
+async def bulk_import_users(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create many users from a CSV or NDJSON upload (admin only)"""
+    fmt = (format or "").lower()
+    if not fmt:
+        filename = (file.filename or "").lower()
+        fmt = "ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv"
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format: {fmt}. Use one of {', '.join(SUPPORTED_FORMATS)}"
+        )
+    
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload must be UTF-8 text")
+    
+    rows = parse_user_rows(content, fmt)
+    return await bulk_create_users(db, rows)
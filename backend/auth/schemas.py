@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -35,6 +35,17 @@ class Token(BaseModel):
     """JWT token response"""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    """Exchange a refresh token for a new token pair"""
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """Optionally revoke the refresh token issued with the access token"""
+    refresh_token: Optional[str] = None
 
 
 class TokenData(BaseModel):
@@ -51,3 +62,18 @@ class PasswordResetConfirm(BaseModel):
     """Confirm password reset with token"""
     token: str
     new_password: str = Field(..., min_length=8)
+
+
+class BulkImportFailure(BaseModel):
+    """A row that could not be imported"""
+    row: int
+    email: Optional[str] = None
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    """Outcome of a bulk user import"""
+    total: int
+    created: int
+    failed: int
+    failures: List[BulkImportFailure]
@@ -3,10 +3,30 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from backend.config import settings
+import hashlib
+import math
 import secrets
+import time
+import uuid
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context. Hashes below the configured cost are flagged by
+# needs_update() and upgraded on the next successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds
+)
+
+
+def configure_bcrypt_rounds(rounds: int):
+    """Set the bcrypt cost used for new hashes and the minimum accepted cost"""
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+def current_bcrypt_rounds() -> int:
+    """The bcrypt cost used for new hashes"""
+    return pwd_context.handler("bcrypt").default_rounds
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -19,6 +39,38 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash uses an outdated scheme or cost"""
+    return pwd_context.needs_update(hashed_password)
+
+
+def measure_bcrypt_seconds(rounds: int, samples: int = 3) -> float:
+    """Median time to verify a password at the given bcrypt cost"""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> int:
+    """Pick the highest bcrypt cost whose verify time stays within target_ms
+
+    Each extra round doubles the work, so one measurement at min_rounds
+    predicts the rest; the prediction is then checked once and stepped down
+    if this host turns out slower than estimated.
+    """
+    baseline = measure_bcrypt_seconds(min_rounds) * 1000
+    extra = int(math.floor(math.log2(target_ms / baseline))) if baseline < target_ms else 0
+    rounds = max(min_rounds, min(max_rounds, min_rounds + extra))
+    while rounds > min_rounds and measure_bcrypt_seconds(rounds) * 1000 > target_ms * 1.25:
+        rounds -= 1
+    return rounds
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -28,20 +80,43 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
     to_encode.update({"exp": expire})
+    # Unique token ID so individual tokens can be revoked
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 
-def decode_access_token(token: str) -> Optional[str]:
-    """Decode and verify a JWT token"""
+def decode_access_token_claims(token: str) -> Optional[dict]:
+    """Decode and verify a JWT token, returning all of its claims"""
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        email: str = payload.get("sub")
-        return email
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
         return None
 
 
+def decode_access_token(token: str) -> Optional[str]:
+    """Decode and verify a JWT token"""
+    payload = decode_access_token_claims(token)
+    if payload is None:
+        return None
+    email: str = payload.get("sub")
+    return email
+
+
 def generate_reset_token() -> str:
     """Generate a secure random token for password reset"""
     return secrets.token_urlsafe(32)
+
+
+def generate_refresh_token() -> str:
+    """Generate an opaque refresh token"""
+    return secrets.token_urlsafe(48)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Hash a refresh token for storage and indexed lookup
+
+    Refresh tokens are high-entropy random strings, so a fast SHA-256 digest
+    is sufficient and keeps refresh free of any password hashing.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
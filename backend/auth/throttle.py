@@ -0,0 +1,174 @@
+"""
+Per-IP and per-subnet credential-stuffing throttle
+
+Failed logins are counted per client IP and per subnet in a count-min
+sketch whose counters halve every decay period. Memory is fixed by the
+sketch dimensions no matter how many addresses we see, and the check runs
+before any user lookup or password hashing.
+"""
+import hashlib
+import ipaddress
+import math
+import threading
+import time
+from array import array
+from typing import Optional
+from backend.config import settings
+
+
+class LoginThrottled(Exception):
+    """Raised when a client has too many recent failed logins"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many failed login attempts from this address")
+        self.retry_after = retry_after
+
+
+class DecayingCountMinSketch:
+    """Count-min sketch with exponential time decay
+
+    Estimates never undercount; collisions can only overcount, bounded by
+    the sketch width. All counters halve every `half_life` seconds.
+    """
+
+    def __init__(self, width: int, depth: int, half_life: float):
+        if not 1 <= depth <= 16:
+            raise ValueError("Sketch depth must be between 1 and 16")
+        self.width = width
+        self.depth = depth
+        self.half_life = half_life
+        self._rows = [array("f", bytes(4 * width)) for _ in range(depth)]
+        self._last_decay = time.monotonic()
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.width * self.depth * 4
+
+    def _indexes(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        for row in range(self.depth):
+            yield int.from_bytes(digest[4 * row:4 * row + 4], "little") % self.width
+
+    def decay(self, now: Optional[float] = None):
+        """Apply any decay periods that have elapsed"""
+        now = time.monotonic() if now is None else now
+        periods = int((now - self._last_decay) // self.half_life)
+        if periods <= 0:
+            return
+        self._last_decay += periods * self.half_life
+        if periods >= 32:
+            for row in self._rows:
+                row[:] = array("f", bytes(4 * self.width))
+            return
+        factor = 0.5 ** periods
+        for row in self._rows:
+            for i, value in enumerate(row):
+                if value:
+                    row[i] = value * factor
+
+    def add(self, key: str, amount: float = 1.0, now: Optional[float] = None) -> float:
+        """Add to a key's count and return its new estimate"""
+        self.decay(now)
+        estimate = math.inf
+        for row, index in zip(self._rows, self._indexes(key)):
+            row[index] += amount
+            estimate = min(estimate, row[index])
+        return estimate
+
+    def estimate(self, key: str, now: Optional[float] = None) -> float:
+        """Estimated count for a key"""
+        self.decay(now)
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def clear(self):
+        for row in self._rows:
+            row[:] = array("f", bytes(4 * self.width))
+        self._last_decay = time.monotonic()
+
+
+class LoginThrottle:
+    """Throttles login attempts from IPs and subnets with many recent failures"""
+
+    def __init__(
+        self,
+        ip_limit: int,
+        subnet_limit: int,
+        half_life: float,
+        width: int,
+        depth: int,
+        ipv4_prefix: int = 24,
+        ipv6_prefix: int = 64
+    ):
+        self.ip_limit = ip_limit
+        self.subnet_limit = subnet_limit
+        self.ipv4_prefix = ipv4_prefix
+        self.ipv6_prefix = ipv6_prefix
+        self.throttled = 0
+        self._sketch = DecayingCountMinSketch(width, depth, half_life)
+        self._lock = threading.Lock()
+
+    def _subnet(self, ip_address: str) -> Optional[str]:
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return None
+        prefix = self.ipv4_prefix if address.version == 4 else self.ipv6_prefix
+        return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+    def _retry_after(self, estimate: float, limit: int) -> int:
+        """Seconds until the decayed count drops back under the limit"""
+        periods = math.ceil(math.log2(max(estimate, 1) / max(limit, 1)) + 1e-9)
+        return max(1, int(max(periods, 1) * self._sketch.half_life))
+
+    def check(self, ip_address: Optional[str]):
+        """Raise LoginThrottled if the IP or its subnet is over its limit"""
+        if not ip_address:
+            return
+        subnet = self._subnet(ip_address)
+        with self._lock:
+            ip_count = self._sketch.estimate(f"ip:{ip_address}")
+            if ip_count >= self.ip_limit:
+                self.throttled += 1
+                raise LoginThrottled(self._retry_after(ip_count, self.ip_limit))
+            if subnet:
+                subnet_count = self._sketch.estimate(f"net:{subnet}")
+                if subnet_count >= self.subnet_limit:
+                    self.throttled += 1
+                    raise LoginThrottled(self._retry_after(subnet_count, self.subnet_limit))
+
+    def record_failure(self, ip_address: Optional[str]):
+        """Count a failed login against the IP and its subnet"""
+        if not ip_address:
+            return
+        subnet = self._subnet(ip_address)
+        with self._lock:
+            self._sketch.add(f"ip:{ip_address}")
+            if subnet:
+                self._sketch.add(f"net:{subnet}")
+
+    def clear(self):
+        with self._lock:
+            self._sketch.clear()
+            self.throttled = 0
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "ip_limit": self.ip_limit,
+            "subnet_limit": self.subnet_limit,
+            "sketch_width": self._sketch.width,
+            "sketch_depth": self._sketch.depth,
+            "sketch_memory_bytes": self._sketch.memory_bytes,
+            "throttled": self.throttled,
+        }
+
+
+login_throttle = LoginThrottle(
+    ip_limit=settings.login_ip_max_failures,
+    subnet_limit=settings.login_subnet_max_failures,
+    half_life=settings.login_throttle_half_life_seconds,
+    width=settings.login_throttle_sketch_width,
+    depth=settings.login_throttle_sketch_depth,
+    ipv4_prefix=settings.login_throttle_ipv4_prefix,
+    ipv6_prefix=settings.login_throttle_ipv6_prefix
+)
@@ -0,0 +1,5 @@
+"""Benchmarks for performance-sensitive backend paths
+
+Run from the repository root, for example:
+    python -m backend.benchmarks.bench_login_latency
+"""
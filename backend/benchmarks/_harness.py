@@ -0,0 +1,57 @@
+"""Shared helpers for backend benchmarks"""
+import logging
+import os
+import tempfile
+from typing import List
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from backend.main import app
+from backend.db.database import Base, get_async_db
+
+# Per-request log lines would dominate the timings
+logging.getLogger("ai_governance").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def setup_database() -> str:
+    """Point the app at a fresh SQLite file and return its path"""
+    fd, path = tempfile.mkstemp(prefix="bench_", suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    # NullPool so the benchmark measures hashing, not connection pool waits
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return path
+
+
+def make_client() -> httpx.AsyncClient:
+    """In-process client sharing the benchmark's event loop with the app"""
+    return httpx.AsyncClient(app=app, base_url="http://bench")
+
+
+async def signup_and_login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    """Create a user and return a bearer token"""
+    response = await client.post("/auth/signup", json={"email": email, "password": password})
+    response.raise_for_status()
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
@@ -0,0 +1,35 @@
+"""
+bcrypt throughput per core at each cost
+
+Reports verify latency and hashes/second on a single core for a range of
+bcrypt costs, plus the cost calibration would pick for the target latency.
+
+    python -m backend.benchmarks.bench_bcrypt_cost --min-rounds 8 --max-rounds 14
+"""
+import argparse
+import os
+from backend.auth.security import measure_bcrypt_seconds, calibrate_bcrypt_rounds
+from backend.config import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rounds", type=int, default=8)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--target-ms", type=int, default=settings.bcrypt_target_verify_ms)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"{'cost':>4} {'verify ms':>10} {'hashes/s/core':>14} {'hashes/s (' + str(cores) + ' cores)':>20}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        seconds = measure_bcrypt_seconds(rounds, samples=args.samples)
+        per_core = 1 / seconds
+        print(f"{rounds:>4} {seconds * 1000:>10.1f} {per_core:>14.1f} {per_core * cores:>20.1f}")
+
+    chosen = calibrate_bcrypt_rounds(args.target_ms, settings.bcrypt_min_rounds, settings.bcrypt_max_rounds)
+    print(f"\nCalibration target {args.target_ms}ms -> {chosen} rounds")
+
+
+if __name__ == "__main__":
+    main()
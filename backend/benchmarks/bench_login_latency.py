@@ -0,0 +1,91 @@
+"""
+Login latency under concurrent /assessments reads
+
+Runs a burst of logins while reader tasks poll GET /assessments, once with
+bcrypt running inline on the event loop and once on the hashing pool, and
+reports login and read latencies for each mode.
+
+    python -m backend.benchmarks.bench_login_latency --logins 40 --readers 8
+"""
+import argparse
+import asyncio
+import os
+import time
+from backend.auth.hashing import password_hash_pool
+from backend.benchmarks._harness import setup_database, make_client, signup_and_login, percentile
+
+EMAIL = "bench@example.com"
+PASSWORD = "benchpassword123"
+
+
+async def run_mode(logins: int, readers: int, concurrency: int) -> dict:
+    async with make_client() as client:
+        token = await signup_and_login(client, EMAIL, PASSWORD)
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(10):
+            await client.post("/assessments", json={"title": f"Bench {i}"}, headers=headers)
+
+        login_latencies = []
+        read_latencies = []
+        done = asyncio.Event()
+        gate = asyncio.Semaphore(concurrency)
+
+        async def login_once():
+            async with gate:
+                start = time.perf_counter()
+                response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+                login_latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        async def reader():
+            while not done.is_set():
+                start = time.perf_counter()
+                response = await client.get("/assessments", headers=headers)
+                read_latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+                await asyncio.sleep(0)
+
+        reader_tasks = [asyncio.create_task(reader()) for _ in range(readers)]
+        started = time.perf_counter()
+        await asyncio.gather(*(login_once() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(*reader_tasks)
+
+    return {
+        "login_p50_ms": percentile(login_latencies, 50) * 1000,
+        "login_p99_ms": percentile(login_latencies, 99) * 1000,
+        "read_p50_ms": percentile(read_latencies, 50) * 1000,
+        "read_p99_ms": percentile(read_latencies, 99) * 1000,
+        "reads_per_second": len(read_latencies) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent logins in flight")
+    args = parser.parse_args()
+
+    configured_workers = password_hash_pool.workers
+    modes = [("inline", 0), ("pool", configured_workers or os.cpu_count() or 1)]
+    for name, workers in modes:
+        path = setup_database()
+        password_hash_pool.workers = workers
+        try:
+            stats = asyncio.run(run_mode(args.logins, args.readers, args.concurrency))
+        finally:
+            password_hash_pool.shutdown()
+            os.remove(path)
+        print(
+            f"{name:>6} (workers={workers}): "
+            f"login p50={stats['login_p50_ms']:.0f}ms p99={stats['login_p99_ms']:.0f}ms | "
+            f"read p50={stats['read_p50_ms']:.1f}ms p99={stats['read_p99_ms']:.1f}ms "
+            f"{stats['reads_per_second']:.0f} req/s"
+        )
+    password_hash_pool.workers = configured_workers
+
+
+if __name__ == "__main__":
+    main()
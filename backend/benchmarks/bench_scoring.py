@@ -0,0 +1,71 @@
+"""
+Category scoring: template walk vs compiled questionnaires
+
+Times scoring plus recommendation lookup for one category submission, once
+with the original functions (walk the nested templates, rebuild the
+recommendation dict per call, no validation) and once with the compiled
+questionnaires (validate and score in one pass, prebuilt recommendations).
+
+    python -m backend.benchmarks.bench_scoring --iterations 200000
+"""
+import argparse
+import timeit
+from backend.assessments.questionnaire import questionnaire_registry, get_maturity_level
+
+QUESTIONNAIRES = questionnaire_registry.current().templates
+COMPILED_QUESTIONNAIRES = questionnaire_registry.current().compiled
+RECOMMENDATIONS = {category: q.recommendations for category, q in COMPILED_QUESTIONNAIRES.items()}
+
+
+def template_score(answers, category) -> int:
+    """calculate_category_score before compilation"""
+    questionnaire = QUESTIONNAIRES[category]
+    total_weight = sum(q["weight"] for q in questionnaire["questions"])
+    score = 0
+    for question in questionnaire["questions"]:
+        score += answers.get(question["id"], 0)
+    return int((score / total_weight) * 100) if total_weight > 0 else 0
+
+
+def template_recommendations(category, score, maturity) -> str:
+    """get_recommendations before compilation: the table literal was rebuilt on every call"""
+    recommendations = {c: dict(levels) for c, levels in RECOMMENDATIONS.items()}
+    return recommendations.get(category, {}).get(maturity, "Continue improving governance practices.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000, help="Submissions scored per measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    submissions = [
+        (category, {q["id"]: q["options"][i % len(q["options"])]["value"] for i, q in enumerate(template["questions"])})
+        for category, template in QUESTIONNAIRES.items()
+    ]
+
+    def template_path():
+        for category, answers in submissions:
+            score = template_score(answers, category)
+            template_recommendations(category, score, get_maturity_level(score))
+
+    def compiled_path():
+        for category, answers in submissions:
+            questionnaire = COMPILED_QUESTIONNAIRES[category]
+            score = questionnaire.score(answers)
+            questionnaire.recommendation(get_maturity_level(score))
+
+    for category, answers in submissions:
+        assert template_score(answers, category) == COMPILED_QUESTIONNAIRES[category].score(answers)
+
+    number = max(1, args.iterations // len(submissions))
+    timings = {}
+    for name, path in (("template", template_path), ("compiled", compiled_path)):
+        best = min(timeit.repeat(path, number=number, repeat=args.repeat))
+        timings[name] = best / (number * len(submissions))
+        print(f"{name:>8}: {timings[name] * 1e6:.2f}us per submission")
+    print(f"speedup: {timings['template'] / timings['compiled']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Concurrent POST /assessments/{id}/answers on SQLite
+
+Submits answers from many concurrent clients against a SQLite file, once
+with SQLite's defaults (rollback journal, every connection writing directly)
+and once with the SQLite profile (WAL, tuned pragmas, single writer
+connection). Reports throughput, latency and failed submissions per profile.
+
+    python -m backend.benchmarks.bench_sqlite_answers --submissions 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import time
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from backend.main import app
+from backend.db.database import get_async_db
+from backend.db.routing import routing_sessionmaker
+from backend.db.sqlite import apply_sqlite_pragmas
+from backend.auth.principal_cache import principal_cache
+from backend.assessments.questionnaire import questionnaire_registry
+from backend.benchmarks._harness import setup_database, make_client, signup_and_login, percentile
+
+PASSWORD = "benchpassword123"
+
+
+def answers_for(category) -> dict:
+    return {question["id"]: question["options"][-1]["value"] for question in questionnaire_registry.current().templates[category]["questions"]}
+
+
+def use_profile(path: str, tuned: bool, concurrency: int) -> list:
+    """Route the app's sessions to engines for one profile, returning them for disposal"""
+    url = f"sqlite+aiosqlite:///{path}"
+    readers = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=concurrency, max_overflow=0)
+    writer = None
+    if tuned:
+        apply_sqlite_pragmas(readers.sync_engine)
+        writer = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0, pool_timeout=60)
+        apply_sqlite_pragmas(writer.sync_engine)
+    session_factory = routing_sessionmaker(readers, writer=writer)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return [engine for engine in (readers, writer) if engine is not None]
+
+
+async def run_profile(name: str, submissions: int, concurrency: int, assessments: int) -> dict:
+    async with make_client() as client:
+        token = await signup_and_login(client, f"bench-{name}@example.com", PASSWORD)
+        headers = {"Authorization": f"Bearer {token}"}
+        ids = []
+        for i in range(assessments):
+            response = await client.post("/assessments", json={"title": f"Bench {i}"}, headers=headers)
+            response.raise_for_status()
+            ids.append(response.json()["id"])
+
+        categories = list(questionnaire_registry.current().templates)
+        payloads = [answers_for(category) for category in categories]
+        latencies = []
+        failures = 0
+        gate = asyncio.Semaphore(concurrency)
+
+        async def submit(i):
+            nonlocal failures
+            async with gate:
+                start = time.perf_counter()
+                response = await client.post(
+                    f"/assessments/{ids[i % len(ids)]}/answers",
+                    json={"category": categories[i % len(categories)].value, "answers": payloads[i % len(payloads)]},
+                    headers=headers
+                )
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(submit(i) for i in range(submissions)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "submissions_per_second": submissions / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--assessments", type=int, default=20, help="Assessments the submissions are spread over")
+    args = parser.parse_args()
+
+    for name, tuned in (("default", False), ("profile", True)):
+        path = setup_database()
+        engines = use_profile(path, tuned, args.concurrency)
+        principal_cache.clear()
+
+        async def run():
+            try:
+                return await run_profile(name, args.submissions, args.concurrency, args.assessments)
+            finally:
+                for engine in engines:
+                    await engine.dispose()
+
+        try:
+            stats = asyncio.run(run())
+        finally:
+            os.remove(path)
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        print(
+            f"{name:>7}: {stats['submissions_per_second']:.0f} submissions/s | "
+            f"p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms | "
+            f"failed={stats['failures']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
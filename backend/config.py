@@ -9,16 +9,95 @@ class Settings(BaseSettings):
     # Database
     # The default is now set to a PostgreSQL connection string for the Docker setup
     database_url: str = "postgresql+psycopg2://ai_user:ai_password@db:5432/ai_governance_db"
+    read_database_url: str = ""  # optional replica for read-only endpoints
+    read_stickiness_seconds: float = 5.0  # reads stay on the primary this long after a user's write
+    
+    # Connection pool (applied to each engine separately)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800  # -1 never recycles
+    db_pool_pre_ping: bool = True
+    db_pool_slow_checkout_ms: float = 100.0  # waits above this are counted as slow
+    
+    # SQLite profile (only used when database_url is SQLite)
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"  # safe with WAL; full also syncs every commit
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size_bytes: int = 268435456
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_single_writer: bool = True  # queue API writes on one connection
+    
+    # Per-request query instrumentation (X-DB-Queries / X-DB-Time headers)
+    db_query_budget: int = 50  # statements per request, 0 disables
+    db_repeated_statement_limit: int = 10  # executions of one statement shape, 0 disables
+    db_strict_queries: bool = False  # fail requests over the limits instead of logging
+    
+    # Questionnaire registry
+    questionnaire_dir: str = ""  # versioned JSON/YAML files, defaults to backend/assessments/questionnaires
+    questionnaire_reload_seconds: float = 5.0  # how often to check the files for changes, 0 loads once
+    questionnaire_default_version: str = ""  # schema_version for new assessments, defaults to the newest
+    
+    # Bulk rescoring job
+    rescore_chunk_size: int = 500  # results read, scored and written per chunk
+    rescore_workers: int = 0  # scoring processes, 0 uses every core
+    rescore_checkpoint_path: str = "rescore_checkpoint.json"
     
     # Security
     secret_key: str = "your-secret-key-here-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    refresh_token_expire_days: int = 14
+    
+    # Access token revocation list
+    revocation_bloom_capacity: int = 100000
+    revocation_bloom_error_rate: float = 0.001
+    revocation_refresh_seconds: int = 30
     bcrypt_rounds: int = 12
+    bcrypt_calibrate: bool = False  # pick bcrypt_rounds at startup from measured speed
+    bcrypt_target_verify_ms: int = 250
+    bcrypt_min_rounds: int = 10
+    bcrypt_max_rounds: int = 16
+    
+    # Principal cache for authenticated requests
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_max_entries: int = 10000
+    
+    # Password hashing worker pool
+    password_hash_executor: str = "thread"  # thread, process
+    password_hash_workers: int = 4
+    password_hash_queue_depth: int = 64
+    password_hash_retry_after_seconds: int = 1
+    
+    # Bulk user provisioning
+    provisioning_hash_workers: int = 0  # 0 uses every core
+    provisioning_batch_size: int = 500
+    
+    # Login admission control
+    login_max_in_flight: int = 8
+    login_max_queue: int = 64
+    login_queue_timeout_seconds: float = 10.0
+    login_retry_after_seconds: int = 2
+    
+    # Per-IP / per-subnet failed login throttle
+    login_ip_max_failures: int = 20
+    login_subnet_max_failures: int = 100
+    login_throttle_half_life_seconds: int = 300
+    login_throttle_sketch_width: int = 4096
+    login_throttle_sketch_depth: int = 4
+    login_throttle_ipv4_prefix: int = 24
+    login_throttle_ipv6_prefix: int = 64
     
     # Account Lockout
     max_failed_login_attempts: int = 5
     lockout_duration_minutes: int = 15
+    attempt_counter_backend: str = "memory"  # memory, shared
+    attempt_counter_url: str = ""  # shared store, defaults to database_url
+    
+    # Failed login audit trail (written in background batches)
+    failed_login_audit_enabled: bool = True
+    failed_login_audit_batch_size: int = 100
+    failed_login_audit_flush_seconds: float = 2.0
     
     # Rate Limiting
     rate_limit_per_minute: int = 60
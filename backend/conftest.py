@@ -1,15 +1,30 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from backend.main import app
-from backend.db.database import Base, get_db
+from backend.config import settings
+from backend.db.database import Base, get_db, get_async_db
+from backend.db.routing import routing_sessionmaker, read_your_writes
+from backend.auth.principal_cache import principal_cache
+from backend.auth.attempts import failed_login_counter
+from backend.auth.throttle import login_throttle
+from backend.auth.revocation import revocation_list
+from backend.auth import crud as auth_crud
+from backend.audit.failed_logins import failed_login_audit
+from backend.assessments.rescoring import rescoring_job
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient may run each request on a new event loop, so async connections are never pooled
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+AsyncTestingSessionLocal = routing_sessionmaker(async_engine)
+
 
 def override_get_db():
     """Override database dependency for testing"""
@@ -20,7 +35,21 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override async database dependency for testing"""
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+failed_login_audit.session_factory = TestingSessionLocal
+rescoring_job.session_factory = TestingSessionLocal
+revocation_list.session_factory = AsyncTestingSessionLocal
+auth_crud.background_session_factory = AsyncTestingSessionLocal
+
+# Fail any test request that blows the query budget or repeats a statement (N+1)
+settings.db_strict_queries = True
 
 
 @pytest.fixture(scope="function")
@@ -28,9 +57,28 @@ def test_db():
     """Create test database"""
     Base.metadata.create_all(bind=engine)
     yield
+    failed_login_audit.flush()
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_auth_state():
+    """Keep in-process auth caches from leaking between tests"""
+    principal_cache.clear()
+    failed_login_counter.clear()
+    login_throttle.clear()
+    revocation_list.clear()
+    read_your_writes.clear()
+    rescoring_job.clear()
+    yield
+    principal_cache.clear()
+    failed_login_counter.clear()
+    login_throttle.clear()
+    revocation_list.clear()
+    read_your_writes.clear()
+    rescoring_job.clear()
+
+
 @pytest.fixture
 def client(test_db):
     """Test client"""
@@ -62,3 +110,24 @@ def test_user(client):
     token = login_response.json()["access_token"]
     
     return {"email": "test@example.com", "token": token}
+
+
+@pytest.fixture
+def admin_headers(client):
+    """Create an administrator and return its auth headers"""
+    from backend.db.models import User
+
+    credentials = {"email": "admin@example.com", "password": "adminpassword123"}
+    response = client.post("/auth/signup", json={**credentials, "full_name": "Admin User"})
+    assert response.status_code == 201
+
+    db = TestingSessionLocal()
+    try:
+        db.query(User).filter(User.email == credentials["email"]).update({"is_admin": True})
+        db.commit()
+    finally:
+        db.close()
+
+    login_response = client.post("/auth/login", json=credentials)
+    assert login_response.status_code == 200
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
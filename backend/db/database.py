@@ -1,17 +1,111 @@
+"""
+Database engines and sessions
+
+Builds the synchronous engine used by migrations, scripts and background
+jobs, and the async engines used by the API: the primary, an optional read
+replica and, in the SQLite profile, a single-connection writer. Every pool
+is instrumented for GET /metrics. Also provides the session factories, the
+request dependencies and the declarative Base the models in
+backend.db.models derive from.
+"""
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from backend.config import settings
+from backend.db.pool_metrics import (
+    PoolMetrics,
+    InstrumentedQueuePool,
+    InstrumentedAsyncQueuePool,
+    instrument_engine
+)
+from backend.db.routing import routing_sessionmaker
+from backend.db.sqlite import apply_sqlite_pragmas
+
+# Async drivers used for each database backend
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap a database URL's driver for its asyncio equivalent"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def pool_options(asynchronous: bool = False) -> dict:
+    """Engine keyword arguments for the configured connection pool"""
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def is_sqlite(url: str) -> bool:
+    """Whether a database URL points at SQLite"""
+    return make_url(url).get_backend_name() == "sqlite"
+
 
-# Create SQLAlchemy engine
+# Create SQLAlchemy engine (used by migrations, scripts and background jobs)
 engine = create_engine(
     settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
+    **pool_options()
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API so queries never block the event loop
+async_engine = create_async_engine(to_async_url(settings.database_url), **pool_options(asynchronous=True))
+
+# Optional read replica for read-only endpoints
+async_read_engine = (
+    create_async_engine(to_async_url(settings.read_database_url), **pool_options(asynchronous=True))
+    if settings.read_database_url else None
+)
+
+# SQLite profile: WAL and tuned pragmas everywhere, and API writes queued on one connection
+async_write_engine = None
+if is_sqlite(settings.database_url):
+    apply_sqlite_pragmas(engine)
+    apply_sqlite_pragmas(async_engine.sync_engine)
+    if settings.sqlite_single_writer:
+        async_write_engine = create_async_engine(
+            to_async_url(settings.database_url),
+            **{**pool_options(asynchronous=True), "pool_size": 1, "max_overflow": 0}
+        )
+        apply_sqlite_pragmas(async_write_engine.sync_engine)
+
+# Pool counters served by GET /metrics
+pool_metrics = {
+    "sync": instrument_engine(engine, PoolMetrics("sync", settings.db_pool_slow_checkout_ms)),
+    "async": instrument_engine(async_engine.sync_engine, PoolMetrics("async", settings.db_pool_slow_checkout_ms)),
+}
+if async_read_engine is not None:
+    pool_metrics["replica"] = instrument_engine(
+        async_read_engine.sync_engine,
+        PoolMetrics("replica", settings.db_pool_slow_checkout_ms)
+    )
+if async_write_engine is not None:
+    pool_metrics["writer"] = instrument_engine(
+        async_write_engine.sync_engine,
+        PoolMetrics("writer", settings.db_pool_slow_checkout_ms)
+    )
+
+# Objects stay usable after commit; async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = routing_sessionmaker(async_engine, async_read_engine, async_write_engine)
+
 # Base class for models
 Base = declarative_base()
 
@@ -23,3 +117,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.db.database import Base
@@ -13,6 +13,7 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     full_name = Column(String(255), nullable=True)
     is_active = Column(Boolean, default=True)
+    is_admin = Column(Boolean, default=False)
     is_locked = Column(Boolean, default=False)
     locked_until = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -22,6 +23,7 @@ class User(Base):
     assessments = relationship("Assessment", back_populates="user")
     failed_logins = relationship("FailedLogin", back_populates="user")
     password_resets = relationship("PasswordReset", back_populates="user")
+    refresh_tokens = relationship("RefreshToken", back_populates="user")
 
 
 class FailedLogin(Base):
@@ -52,6 +54,33 @@ class PasswordReset(Base):
     user = relationship("User", back_populates="password_resets")
 
 
+class RefreshToken(Base):
+    """Rotating refresh tokens, stored as SHA-256 hashes"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    family_id = Column(String(64), index=True, nullable=False)  # shared by every rotation of one login
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime, nullable=True)  # set when rotated
+    revoked_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    user = relationship("User", back_populates="refresh_tokens")
+
+
+class RevokedToken(Base):
+    """Access tokens revoked before expiry, pruned once they expire"""
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    expires_at = Column(DateTime, index=True, nullable=False)
+    revoked_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Assessment(Base):
     """AI Governance Assessment"""
     __tablename__ = "assessments"
@@ -66,9 +95,21 @@ class Assessment(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     
+    # Summary kept current by every submission, so reads never aggregate results
+    overall_score = Column(Integer, nullable=False, default=0, server_default="0")
+    overall_maturity = Column(String(50), nullable=False, default="initial", server_default="initial")
+    category_scores = Column(JSON, nullable=False, default=dict, server_default=text("'{}'"))  # category -> score
+    
     # Relationships
     user = relationship("User", back_populates="assessments")
-    results = relationship("AssessmentResult", back_populates="assessment", cascade="all, delete-orphan")
+    results = relationship(
+        "AssessmentResult", back_populates="assessment", cascade="all, delete-orphan", order_by="AssessmentResult.id"
+    )
+    
+    __table_args__ = (
+        # Keyset pagination of a user's assessments, newest first
+        Index("ix_assessments_user_created_id", "user_id", "created_at", "id"),
+    )
 
 
 class AssessmentResult(Base):
@@ -86,3 +127,43 @@ class AssessmentResult(Base):
     
     # Relationships
     assessment = relationship("Assessment", back_populates="results")
+    
+    __table_args__ = (
+        # One result per category; resubmitting a category upserts into it
+        UniqueConstraint("assessment_id", "category", name="uq_assessment_results_assessment_category"),
+    )
+
+
+class CategoryScoreRollup(Base):
+    """Number of category results at each score, across all assessments
+
+    Kept current by every write to assessment_results, so a category's
+    whole score distribution is at most 101 rows however many assessments
+    exist.
+    """
+    __tablename__ = "category_score_rollups"
+    
+    category = Column(String(100), primary_key=True)
+    score = Column(Integer, primary_key=True)  # 0-100
+    count = Column(Integer, nullable=False, default=0)
+
+
+class AssessmentAnswer(Base):
+    """One answer per row, copied from assessment_results.questions for analytics
+
+    Rewritten with its category's result on every submission, so answer
+    distributions can be grouped and filtered in SQL instead of parsing the
+    JSON blobs.
+    """
+    __tablename__ = "assessment_answers"
+    
+    assessment_id = Column(Integer, ForeignKey("assessments.id"), primary_key=True)
+    category = Column(String(100), primary_key=True)
+    question_id = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False)
+    answered_at = Column(DateTime, nullable=True)  # the result's submission time
+    
+    __table_args__ = (
+        # Covers the distribution query: filter by question and date, group by value
+        Index("ix_assessment_answers_question_answered", "category", "question_id", "answered_at", "value"),
+    )
@@ -0,0 +1,156 @@
+"""
+Connection pool instrumentation
+
+The engines use QueuePool subclasses that time how long each checkout waits
+for a free connection, and pool event listeners that count connects,
+checkouts and invalidations. A pool timeout is logged together with the
+pool's state at that moment, so `QueuePool limit` errors show whether the
+pool was exhausted by slow queries, leaked sessions or an undersized pool.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger("ai_governance")
+
+
+class PoolMetrics:
+    """Counters for one engine's connection pool"""
+
+    def __init__(self, name: str, slow_checkout_ms: float = 100.0):
+        self.name = name
+        self.slow_checkout_ms = slow_checkout_ms
+        self.engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.waits_total_ms = 0.0
+        self.waits_max_ms = 0.0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+
+    def record_wait(self, seconds: float):
+        waited_ms = seconds * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.waits_total_ms += waited_ms
+            self.waits_max_ms = max(self.waits_max_ms, waited_ms)
+            if waited_ms >= self.slow_checkout_ms:
+                self.slow_checkouts += 1
+
+    def record_timeout(self, pool: QueuePool):
+        with self._lock:
+            self.timeouts += 1
+        logger.warning(
+            f"Connection pool timeout | Pool: {self.name} | {pool.status()} | "
+            f"Peak in use: {self.peak_in_use}"
+        )
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        pool = self.engine.pool if self.engine is not None else None
+        if not isinstance(pool, QueuePool):
+            return
+        with self._lock:
+            self.peak_in_use = max(self.peak_in_use, pool.checkedout())
+            self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_soft_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.soft_invalidations += 1
+
+    def clear(self):
+        """Reset counters (the live gauges come from the pool itself)"""
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> dict:
+        """Live gauges and cumulative counters for monitoring"""
+        pool = self.engine.pool if self.engine is not None else None
+        gauges = {}
+        if isinstance(pool, QueuePool):
+            gauges = {
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # QueuePool reports negative overflow while the pool is still filling
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+            }
+        with self._lock:
+            return {
+                **gauges,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkout_wait_ms_avg": round(self.waits_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "checkout_wait_ms_max": round(self.waits_max_ms, 3),
+                "slow_checkouts": self.slow_checkouts,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "peak_in_use": self.peak_in_use,
+                "peak_overflow": max(self.peak_overflow, 0),
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Times checkouts and reports them to the pool's PoolMetrics"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout(self)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep reporting to the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool for sync engines with checkout timing"""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """QueuePool for async engines with checkout timing"""
+
+
+def instrument_engine(engine: Engine, metrics: PoolMetrics) -> PoolMetrics:
+    """Attach pool listeners and checkout timing to a (sync) engine"""
+    metrics.engine = engine
+    if isinstance(engine.pool, _InstrumentedPoolMixin):
+        engine.pool.metrics = metrics
+    event.listen(engine, "connect", metrics._on_connect)
+    event.listen(engine, "checkout", metrics._on_checkout)
+    event.listen(engine, "invalidate", metrics._on_invalidate)
+    event.listen(engine, "soft_invalidate", metrics._on_soft_invalidate)
+    return metrics
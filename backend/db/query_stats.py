@@ -0,0 +1,102 @@
+"""
+Per-request SQL statistics
+
+Engine-wide cursor hooks count every statement and accumulate its database
+time into the stats object of the request currently running, which the
+request middleware installs in a context variable. Statements are also
+grouped by shape (whitespace collapsed, IN-lists folded to one placeholder),
+so N+1 patterns show up as one shape repeated many times.
+
+In strict mode the statement that crosses a limit raises QueryLimitExceeded,
+so the request fails before its transaction can commit.
+
+Outside a request (scripts, background writers) nothing is recorded.
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_IN_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions differing only in parameters compare equal"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _IN_LIST.sub("(?)", shape)
+
+
+class QueryLimitExceeded(Exception):
+    """A request went over the query budget or repeat limit in strict mode"""
+
+
+class RequestQueryStats:
+    """Statements and database time for one request"""
+
+    def __init__(self, budget: int = 0, repeat_limit: int = 0, strict: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.budget = budget
+        self.repeat_limit = repeat_limit
+        self.strict = strict
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        if self.strict:
+            problems = self.violations(self.budget, self.repeat_limit)
+            if problems:
+                raise QueryLimitExceeded("; ".join(problems))
+
+    @property
+    def milliseconds(self) -> float:
+        return self.seconds * 1000
+
+    def most_repeated(self) -> tuple:
+        """(shape, count) of the most repeated statement, or ("", 0)"""
+        return self.shapes.most_common(1)[0] if self.shapes else ("", 0)
+
+    def violations(self, budget: int, repeat_limit: int) -> List[str]:
+        """Describe how this request exceeded the query budget or repeat limit"""
+        problems = []
+        if budget and self.count > budget:
+            problems.append(f"{self.count} queries exceed the budget of {budget}")
+        shape, repeats = self.most_repeated()
+        if repeat_limit and repeats > repeat_limit:
+            problems.append(f"statement repeated {repeats} times (limit {repeat_limit}): {shape[:200]}")
+        return problems
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request_stats(budget: int = 0, repeat_limit: int = 0, strict: bool = False) -> RequestQueryStats:
+    """Begin collecting statements for the current request"""
+    stats = RequestQueryStats(budget, repeat_limit, strict)
+    _current.set(stats)
+    return stats
+
+
+def current_request_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start = getattr(context, "_query_stats_start", None)
+    if stats is not None and start is not None:
+        stats.record(statement, time.perf_counter() - start)
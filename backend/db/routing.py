@@ -0,0 +1,151 @@
+"""
+Read replica and writer routing
+
+Sessions are created from a Session subclass whose get_bind() sends plain
+SELECTs to the replica once a handler has marked the session read-only.
+Anything else, and every statement after the session has written, goes to
+the primary, so a request always reads its own writes.
+
+With a writer bind (the SQLite profile's single-connection engine), flushes,
+DML and any read inside a transaction that has written go to the writer;
+other reads use the primary's pool.
+
+Replicas lag, so a user who committed a write keeps reading from the primary
+for `read_stickiness_seconds` afterwards. The user is the one resolved by
+get_current_user, which records its ID on the session.
+"""
+import threading
+import time
+from typing import Optional
+from sqlalchemy import Select, event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import Session
+from backend.config import settings
+
+
+class ReadYourWrites:
+    """Per-user windows during which reads stay on the primary"""
+
+    def __init__(self, window_seconds: float, max_entries: int = 100000):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.replica_statements = 0
+        self.primary_statements = 0
+        self._sticky = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id: int):
+        """Keep a user's reads on the primary for the stickiness window"""
+        if self.window_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._sticky) >= self.max_entries:
+                self._sticky = {key: until for key, until in self._sticky.items() if until > now}
+            self._sticky[user_id] = now + self.window_seconds
+
+    def is_sticky(self, user_id: int) -> bool:
+        with self._lock:
+            until = self._sticky.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._sticky[user_id]
+                return False
+            return True
+
+    def record_route(self, replica: bool):
+        with self._lock:
+            if replica:
+                self.replica_statements += 1
+            else:
+                self.primary_statements += 1
+
+    def clear(self):
+        with self._lock:
+            self._sticky.clear()
+            self.replica_statements = 0
+            self.primary_statements = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sticky_users": len(self._sticky),
+                "window_seconds": self.window_seconds,
+                "replica_statements": self.replica_statements,
+                "primary_statements": self.primary_statements,
+            }
+
+
+read_your_writes = ReadYourWrites(window_seconds=settings.read_stickiness_seconds)
+
+
+class RoutingSession(Session):
+    """Session that routes reads to the replica and writes to the writer, when configured"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        plain_read = (
+            not self.info.get("in_write")
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        )
+        replica = self.info.get("replica_bind")
+        if replica is not None and self.info.get("read_only"):
+            use_replica = plain_read and not self.info.get("wrote")
+            read_your_writes.record_route(use_replica)
+            if use_replica:
+                return replica
+        writer = self.info.get("writer_bind")
+        if writer is not None and not plain_read:
+            return writer
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def _mark_write(session):
+    session.info["wrote"] = True
+    session.info["in_write"] = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flush(session, flush_context):
+    _mark_write(session)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write(orm_execute_state.session)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _start_stickiness(session):
+    session.info["in_write"] = False
+    principal_id = session.info.get("principal_id")
+    if session.info.get("wrote") and principal_id is not None:
+        read_your_writes.mark(principal_id)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _end_write(session):
+    session.info["in_write"] = False
+
+
+def routing_sessionmaker(
+    primary: AsyncEngine,
+    replica: Optional[AsyncEngine] = None,
+    writer: Optional[AsyncEngine] = None
+) -> async_sessionmaker:
+    """Async session factory for primary, with optional replica reads and a dedicated writer"""
+    info = {}
+    if replica is not None:
+        info["replica_bind"] = replica.sync_engine
+    if writer is not None:
+        info["writer_bind"] = writer.sync_engine
+    return async_sessionmaker(
+        primary,
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+        info=info
+    )
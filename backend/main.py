@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Request, status
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -8,6 +8,19 @@ import time
 from backend.config import settings
 from backend.auth.router import router as auth_router
 from backend.assessments.router import router as assessments_router
+from backend.assessments.questionnaire import questionnaire_registry, InvalidAnswersError, UnknownSchemaVersionError
+from backend.assessments.rescoring import rescoring_job
+from backend.auth.hashing import password_hash_pool, PasswordHashPoolSaturated
+from backend.auth.admission import login_admission, AdmissionRejected
+from backend.auth.principal_cache import principal_cache
+from backend.auth.throttle import login_throttle, LoginThrottled
+from backend.auth.revocation import revocation_list
+from backend.auth.dependencies import get_current_admin
+from backend.auth.security import calibrate_bcrypt_rounds, configure_bcrypt_rounds
+from backend.audit.failed_logins import failed_login_audit
+from backend.db.database import pool_metrics
+from backend.db.routing import read_your_writes
+from backend.db.query_stats import start_request_stats, QueryLimitExceeded
 from backend.audit.logging import logger, log_request, log_error
 
 # Initialize rate limiter
@@ -24,6 +37,82 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+
+@app.exception_handler(InvalidAnswersError)
+async def invalid_answers_handler(request: Request, exc: InvalidAnswersError):
+    """Answers that do not fit the assessment's questionnaire version"""
+    return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={"detail": str(exc)})
+
+
+@app.exception_handler(UnknownSchemaVersionError)
+async def unknown_schema_version_handler(request: Request, exc: UnknownSchemaVersionError):
+    """The assessment's questionnaire version has been removed from the registry"""
+    return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"detail": str(exc)})
+
+
+@app.exception_handler(AdmissionRejected)
+@app.exception_handler(PasswordHashPoolSaturated)
+async def service_busy_handler(request: Request, exc: Exception):
+    """Shed load when login or password hashing capacity is exhausted"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is busy, please retry"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.exception_handler(QueryLimitExceeded)
+async def query_limit_exceeded_handler(request: Request, exc: QueryLimitExceeded):
+    """Fail a request that went over the query limits in strict mode; its transaction never commits"""
+    return JSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={"detail": f"Query limits exceeded in {request.method} {request.url.path}: {exc}"}
+    )
+
+
+@app.exception_handler(LoginThrottled)
+async def login_throttled_handler(request: Request, exc: LoginThrottled):
+    """Slow down clients with too many recent failed logins"""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many failed login attempts, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.on_event("startup")
+def calibrate_password_hashing():
+    """Tune the bcrypt cost to this host when calibration is enabled"""
+    if settings.bcrypt_calibrate:
+        rounds = calibrate_bcrypt_rounds(
+            settings.bcrypt_target_verify_ms,
+            settings.bcrypt_min_rounds,
+            settings.bcrypt_max_rounds
+        )
+        configure_bcrypt_rounds(rounds)
+        logger.info(f"Calibrated bcrypt cost to {rounds} rounds for a {settings.bcrypt_target_verify_ms}ms target")
+
+
+@app.on_event("startup")
+async def load_token_revocations():
+    """Load revoked tokens before serving, then keep reloading them in the background"""
+    try:
+        await revocation_list.refresh()
+    except Exception as e:
+        log_error(e, "token revocation load")
+    revocation_list.start()
+
+
+@app.on_event("shutdown")
+def shutdown_background_workers():
+    """Release password hashing workers, flush the failed login audit trail and checkpoint rescoring"""
+    revocation_list.stop()
+    password_hash_pool.shutdown()
+    failed_login_audit.shutdown()
+    # A stopped rescoring run finishes its current chunk and resumes from the checkpoint
+    rescoring_job.stop()
+    rescoring_job.wait(timeout=30)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +120,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -39,20 +129,38 @@ app.add_middleware(
 async def log_requests(request: Request, call_next):
     """Log all requests and responses"""
     start_time = time.time()
+    query_stats = start_request_stats(
+        settings.db_query_budget,
+        settings.db_repeated_statement_limit,
+        settings.db_strict_queries
+    )
     
     try:
         response = await call_next(request)
         process_time = time.time() - start_time
         
+        # Flag N+1 patterns and chatty handlers; strict mode already failed the request
+        problems = query_stats.violations(settings.db_query_budget, settings.db_repeated_statement_limit)
+        if problems:
+            message = f"Query limits exceeded in {request.method} {request.url.path}: {'; '.join(problems)}"
+            if settings.db_strict_queries:
+                logger.error(message)
+            else:
+                logger.warning(message)
+        
         # Log request
         log_request(
             method=request.method,
             path=request.url.path,
-            status_code=response.status_code
+            status_code=response.status_code,
+            db_queries=query_stats.count,
+            db_time_ms=query_stats.milliseconds
         )
         
-        # Add process time header
+        # Add process time and database headers
         response.headers["X-Process-Time"] = str(process_time)
+        response.headers["X-DB-Queries"] = str(query_stats.count)
+        response.headers["X-DB-Time"] = f"{query_stats.milliseconds:.3f}"
         return response
     
     except Exception as e:
@@ -85,6 +193,22 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", dependencies=[Depends(get_current_admin)])
+async def metrics():
+    """Live counters for capacity monitoring, for administrators only"""
+    return {
+        "login_admission": login_admission.stats(),
+        "password_hash_pool": password_hash_pool.stats(),
+        "principal_cache": principal_cache.stats(),
+        "login_throttle": login_throttle.stats(),
+        "token_revocation": revocation_list.stats(),
+        "db_pool": {name: metrics.stats() for name, metrics in pool_metrics.items()},
+        "read_routing": read_your_writes.stats(),
+        "questionnaires": questionnaire_registry.stats(),
+        "rescoring": rescoring_job.stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
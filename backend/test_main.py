@@ -1,3 +1,6 @@
+import asyncio
+import threading
+import time
 import pytest
 
 
@@ -206,3 +209,1600 @@ def test_unauthorized_access(client):
     """Test accessing protected endpoint without auth"""
     response = client.get("/assessments")
     assert response.status_code == 403
+
+
+def test_password_hash_pool_round_trip():
+    """Test hashing and verification on the worker pool"""
+    from backend.auth.hashing import PasswordHashPool
+    from backend.auth.security import verify_password, get_password_hash
+
+    pool = PasswordHashPool(workers=2, queue_depth=2)
+
+    async def round_trip():
+        hashed = await pool.run(get_password_hash, "password123")
+        return await pool.run(verify_password, "password123", hashed)
+
+    try:
+        assert asyncio.run(round_trip()) is True
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+def test_password_hash_process_pool_spawns_workers():
+    """Test the process executor spawns workers that carry the bcrypt cost"""
+    from backend.auth.hashing import PasswordHashPool
+    from backend.auth.security import verify_password, get_password_hash
+
+    pool = PasswordHashPool(workers=1, queue_depth=1, executor="process")
+
+    async def round_trip():
+        hashed = await pool.run(get_password_hash, "password123")
+        return await pool.run(verify_password, "password123", hashed)
+
+    try:
+        assert asyncio.run(round_trip()) is True
+        assert pool._executor._mp_context.get_start_method() == "spawn"
+    finally:
+        pool.shutdown()
+
+
+def test_password_hash_pool_sheds_when_full():
+    """Test the pool rejects work beyond workers + queue depth"""
+    from backend.auth.hashing import PasswordHashPool, PasswordHashPoolSaturated
+
+    pool = PasswordHashPool(workers=1, queue_depth=0, retry_after=3)
+    release = threading.Event()
+
+    async def saturate():
+        blocked = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        try:
+            with pytest.raises(PasswordHashPoolSaturated) as exc_info:
+                await pool.run(release.wait)
+            assert exc_info.value.retry_after == 3
+        finally:
+            release.set()
+            await blocked
+
+    try:
+        asyncio.run(saturate())
+        assert pool.pending == 0
+    finally:
+        pool.shutdown()
+
+
+def test_admission_controller_queues_and_sheds():
+    """Test in-flight limit, FIFO hand-off and shedding when the queue is full"""
+    from backend.auth.admission import AdmissionController, AdmissionRejected
+
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5, retry_after=4)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.admit():
+                await release.wait()
+
+        first = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        assert controller.stats()["waiting"] == 1
+
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with controller.admit():
+                pass
+        assert exc_info.value.retry_after == 4
+
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+    stats = controller.stats()
+    assert stats["admitted"] == 2
+    assert stats["queued"] == 1
+    assert stats["shed"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_login_shed_returns_503(client, test_user, admin_headers, monkeypatch):
+    """Test login fails fast with Retry-After when admission control sheds it"""
+    from backend.auth.admission import login_admission
+
+    monkeypatch.setattr(login_admission, "max_in_flight", 0)
+    monkeypatch.setattr(login_admission, "max_queue", 0)
+
+    response = client.post(
+        "/auth/login",
+        json={"email": test_user["email"], "password": "testpassword123"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(login_admission.retry_after)
+
+    metrics = client.get("/metrics", headers=admin_headers).json()
+    assert metrics["login_admission"]["shed"] >= 1
+
+
+def test_warm_request_skips_user_query(client, test_user, admin_headers):
+    """Test a cached principal serves authenticated requests without a user lookup"""
+    from sqlalchemy import event
+    from backend.conftest import async_engine
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    client.get("/assessments", headers=headers)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/assessments", headers=headers)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert not [s for s in statements if "FROM users" in s]
+    assert client.get("/metrics", headers=admin_headers).json()["principal_cache"]["hits"] >= 1
+
+
+def test_principal_cache_invalidated_on_deactivation(client, test_user):
+    """Test deactivating a user takes effect despite a warm cache"""
+    from backend.auth.crud import get_user_by_email, set_user_active
+    from backend.conftest import AsyncTestingSessionLocal
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assert client.get("/assessments", headers=headers).status_code == 200
+
+    async def deactivate():
+        async with AsyncTestingSessionLocal() as db:
+            user = await get_user_by_email(db, test_user["email"])
+            await set_user_active(db, user.id, False)
+
+    asyncio.run(deactivate())
+
+    assert client.get("/assessments", headers=headers).status_code == 403
+
+
+def test_principal_cache_lru_and_ttl():
+    """Test the cache evicts least recently used entries and expires stale ones"""
+    from backend.auth.principal_cache import Principal, PrincipalCache
+
+    def principal(n):
+        return Principal(id=n, email=f"user{n}@example.com", full_name=None, is_active=True, is_locked=False)
+
+    cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+    cache.put(principal(1))
+    cache.put(principal(2))
+    assert cache.get("user1@example.com") is not None
+    cache.put(principal(3))
+    assert cache.get("user2@example.com") is None
+    assert cache.get("user1@example.com") is not None
+
+    cache.ttl_seconds = 0.01
+    cache.put(principal(4))
+    time.sleep(0.02)
+    assert cache.get("user4@example.com") is None
+
+
+def test_lockout_after_repeated_failures(client, test_user):
+    """Test the account locks once failures reach the threshold"""
+    from backend.config import settings
+    from backend.db.models import FailedLogin
+    from backend.audit.failed_logins import failed_login_audit
+    from backend.conftest import TestingSessionLocal
+
+    for _ in range(settings.max_failed_login_attempts):
+        response = client.post(
+            "/auth/login",
+            json={"email": test_user["email"], "password": "wrongpassword"}
+        )
+        assert response.status_code == 401
+
+    response = client.post(
+        "/auth/login",
+        json={"email": test_user["email"], "password": "testpassword123"}
+    )
+    assert response.status_code == 401
+
+    failed_login_audit.flush()
+    db = TestingSessionLocal()
+    try:
+        assert db.query(FailedLogin).count() == settings.max_failed_login_attempts
+    finally:
+        db.close()
+
+
+def test_in_memory_attempt_counter_window():
+    """Test failures fall out of the sliding window"""
+    from backend.auth.attempts import InMemoryAttemptCounter
+
+    counter = InMemoryAttemptCounter(window_seconds=60, limit=3)
+    assert counter.record_failure("1", now=0) == 1
+    assert counter.record_failure("1", now=30) == 2
+    assert counter.record_failure("1", now=59) == 3
+    assert counter.record_failure("1", now=61) == 3
+    assert counter.failures("1", now=95) == 2
+    assert counter.failures("1", now=120) == 1
+    counter.reset("1")
+    assert counter.failures("1", now=120) == 0
+
+
+def test_shared_attempt_counter_sqlite(tmp_path):
+    """Test the shared store against a SQLite file standing in for the shared database"""
+    from backend.auth.attempts import SharedAttemptCounter
+
+    url = f"sqlite:///{tmp_path / 'attempts.db'}"
+    counter = SharedAttemptCounter(url, window_seconds=60, limit=5, create_table=True)
+    other_worker = SharedAttemptCounter(url, window_seconds=60, limit=5, create_table=True)
+
+    assert counter.record_failure("1", now=0) == 1
+    assert other_worker.record_failure("1", now=10) == 2
+    assert counter.failures("1", now=30) == 2
+    # Half of the previous window still overlaps the sliding window
+    assert counter.failures("1", now=90) == 1
+    assert counter.failures("1", now=200) == 0
+    other_worker.reset("1")
+    assert counter.failures("1", now=30) == 0
+
+
+def test_shared_attempt_counter_concurrent_failures(tmp_path):
+    """Test concurrent workers never lose a failure, including the first one for a key"""
+    from concurrent.futures import ThreadPoolExecutor
+    from backend.auth.attempts import SharedAttemptCounter
+
+    url = f"sqlite:///{tmp_path / 'attempts.db'}"
+    workers = [SharedAttemptCounter(url, window_seconds=60, limit=50, create_table=True) for _ in range(4)]
+    for worker in workers:
+        worker._ensure_table()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda i: workers[i % 4].record_failure("1", now=5), range(40)))
+
+    assert workers[0].failures("1", now=5) == 40
+    # The window rolls inside the upsert: the old count becomes the previous bucket
+    assert workers[1].record_failure("1", now=70) == 1 + int(40 * (1 - 10 / 60))
+    assert workers[2].record_failure("1", now=200) == 1
+
+
+def test_login_throttled_per_ip(client, test_user, monkeypatch):
+    """Test an IP rotating emails is throttled before any password check"""
+    from backend.auth.throttle import login_throttle
+
+    monkeypatch.setattr(login_throttle, "ip_limit", 3)
+
+    for i in range(3):
+        response = client.post(
+            "/auth/login",
+            json={"email": f"victim{i}@example.com", "password": "wrongpassword"}
+        )
+        assert response.status_code == 401
+
+    response = client.post(
+        "/auth/login",
+        json={"email": test_user["email"], "password": "testpassword123"}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_login_throttle_counts_subnets():
+    """Test failures from different hosts in one subnet add up"""
+    from backend.auth.throttle import LoginThrottle, LoginThrottled
+
+    throttle = LoginThrottle(ip_limit=100, subnet_limit=3, half_life=60, width=256, depth=4)
+    for host in range(1, 4):
+        throttle.check(f"203.0.113.{host}")
+        throttle.record_failure(f"203.0.113.{host}")
+
+    with pytest.raises(LoginThrottled):
+        throttle.check("203.0.113.200")
+    throttle.check("198.51.100.1")
+
+
+def test_decaying_count_min_sketch():
+    """Test sketch estimates never undercount and halve every half-life"""
+    from backend.auth.throttle import DecayingCountMinSketch
+
+    sketch = DecayingCountMinSketch(width=64, depth=4, half_life=10)
+    start = sketch._last_decay
+    for i in range(500):
+        sketch.add(f"key{i}", now=start)
+    for _ in range(8):
+        sketch.add("hot", now=start)
+
+    assert all(sketch.estimate(f"key{i}", now=start) >= 1 for i in range(500))
+    before = sketch.estimate("hot", now=start)
+    assert before >= 8
+    assert sketch.estimate("hot", now=start + 10) == pytest.approx(before / 2)
+    assert sketch.memory_bytes == 64 * 4 * 4
+
+
+def test_refresh_token_rotation(client):
+    """Test refresh issues a new pair and rotated tokens stop working"""
+    client.post("/auth/signup", json={"email": "refresh@example.com", "password": "password123"})
+    login = client.post("/auth/login", json={"email": "refresh@example.com", "password": "password123"}).json()
+    assert login["refresh_token"]
+
+    response = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != login["refresh_token"]
+
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert client.get("/assessments", headers=headers).status_code == 200
+
+
+def test_refresh_token_reuse_revokes_family(client):
+    """Test replaying a rotated refresh token revokes its successors too"""
+    client.post("/auth/signup", json={"email": "reuse@example.com", "password": "password123"})
+    login = client.post("/auth/login", json={"email": "reuse@example.com", "password": "password123"}).json()
+
+    successor = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]}).json()
+
+    replay = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+    assert replay.status_code == 401
+
+    response = client.post("/auth/refresh", json={"refresh_token": successor["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_logout_revokes_access_token(client, test_user):
+    """Test a logged-out access token is rejected on the next request"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assert client.get("/assessments", headers=headers).status_code == 200
+
+    response = client.post("/auth/logout", headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/assessments", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+
+def test_unrevoked_tokens_skip_revocation_lookup(client, test_user, admin_headers):
+    """Test the bloom filter answers for tokens that were never revoked"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    for _ in range(3):
+        client.get("/assessments", headers=headers)
+
+    stats = client.get("/metrics", headers=admin_headers).json()["token_revocation"]
+    assert stats["bloom_negatives"] >= 3
+    assert stats["db_lookups"] == 0
+
+
+def test_revocation_refresh_prunes_expired(test_db):
+    """Test expired revocations are pruned when the filter is rebuilt"""
+    from datetime import datetime, timedelta
+    from backend.auth.revocation import TokenRevocationList
+    from backend.db.models import RevokedToken
+    from backend.conftest import AsyncTestingSessionLocal, TestingSessionLocal
+
+    revocations = TokenRevocationList(AsyncTestingSessionLocal, capacity=100, error_rate=0.01, refresh_seconds=60)
+
+    async def scenario():
+        async with AsyncTestingSessionLocal() as db:
+            await revocations.revoke(db, "expired", datetime.utcnow() - timedelta(minutes=1))
+            await revocations.revoke(db, "live", datetime.utcnow() + timedelta(minutes=5))
+        await revocations.refresh()
+        async with AsyncTestingSessionLocal() as db:
+            return await revocations.is_revoked(db, "live"), await revocations.is_revoked(db, "expired")
+
+    assert asyncio.run(scenario()) == (True, False)
+    db = TestingSessionLocal()
+    try:
+        assert db.query(RevokedToken).count() == 1
+    finally:
+        db.close()
+
+
+def test_revocation_during_refresh_survives_swap(test_db):
+    """Test a token revoked while the filter is being rebuilt stays revoked"""
+    from datetime import datetime, timedelta
+    from backend.auth.revocation import TokenRevocationList
+    from backend.conftest import AsyncTestingSessionLocal
+
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+
+    def session_revoking_after_read():
+        # Another request revokes a token right after the reload read the table
+        session = AsyncTestingSessionLocal()
+        read = session.scalars
+
+        async def scalars(*args, **kwargs):
+            result = await read(*args, **kwargs)
+            async with AsyncTestingSessionLocal() as db:
+                await revocations.revoke(db, "late", expires_at)
+            return result
+
+        session.scalars = scalars
+        return session
+
+    revocations = TokenRevocationList(session_revoking_after_read, capacity=100, error_rate=0.01, refresh_seconds=60)
+
+    async def scenario():
+        await revocations.refresh()
+        async with AsyncTestingSessionLocal() as db:
+            return await revocations.is_revoked(db, "late")
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_revocation_check_never_writes(client, test_user):
+    """Test authenticated requests leave pruning to the background reload"""
+    from datetime import datetime, timedelta
+    from backend.db.models import RevokedToken
+    from backend.conftest import TestingSessionLocal
+
+    db = TestingSessionLocal()
+    try:
+        db.add(RevokedToken(jti="expired", expires_at=datetime.utcnow() - timedelta(minutes=1)))
+        db.commit()
+    finally:
+        db.close()
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assert client.get("/assessments", headers=headers).status_code == 200
+
+    db = TestingSessionLocal()
+    try:
+        assert db.query(RevokedToken).count() == 1
+    finally:
+        db.close()
+
+
+def test_revocation_background_reload(test_db):
+    """Test a revocation made by another worker is picked up by the background reload"""
+    from datetime import datetime, timedelta
+    from backend.auth.revocation import TokenRevocationList
+    from backend.conftest import AsyncTestingSessionLocal
+
+    revocations = TokenRevocationList(AsyncTestingSessionLocal, capacity=100, error_rate=0.01, refresh_seconds=0.05)
+    other_worker = TokenRevocationList(AsyncTestingSessionLocal, capacity=100, error_rate=0.01, refresh_seconds=60)
+
+    async def scenario():
+        revocations.start()
+        try:
+            async with AsyncTestingSessionLocal() as db:
+                await other_worker.revoke(db, "jti-1", datetime.utcnow() + timedelta(minutes=5))
+            for _ in range(100):
+                if revocations.stats()["refreshes"]:
+                    break
+                await asyncio.sleep(0.02)
+            async with AsyncTestingSessionLocal() as db:
+                return await revocations.is_revoked(db, "jti-1")
+        finally:
+            revocations.stop()
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_outdated_bcrypt_cost_rehashed_on_login(client):
+    """Test a hash made at an older cost is upgraded after a successful login"""
+    from backend.auth.security import configure_bcrypt_rounds, current_bcrypt_rounds
+    from backend.db.models import User
+    from backend.conftest import TestingSessionLocal
+
+    original_rounds = current_bcrypt_rounds()
+    try:
+        configure_bcrypt_rounds(4)
+        client.post("/auth/signup", json={"email": "rehash@example.com", "password": "password123"})
+
+        configure_bcrypt_rounds(5)
+        response = client.post("/auth/login", json={"email": "rehash@example.com", "password": "password123"})
+        assert response.status_code == 200
+
+        db = TestingSessionLocal()
+        try:
+            user = db.query(User).filter(User.email == "rehash@example.com").first()
+            assert user.hashed_password.startswith("$2b$05$")
+        finally:
+            db.close()
+    finally:
+        configure_bcrypt_rounds(original_rounds)
+
+
+def test_calibrate_bcrypt_rounds_respects_bounds():
+    """Test calibration stays within the configured cost range"""
+    from backend.auth.security import calibrate_bcrypt_rounds
+
+    assert calibrate_bcrypt_rounds(target_ms=0.001, min_rounds=4, max_rounds=6) == 4
+    assert calibrate_bcrypt_rounds(target_ms=10000, min_rounds=4, max_rounds=6) == 6
+
+
+def make_admin(email):
+    """Promote a user to administrator directly in the test database"""
+    from backend.db.models import User
+    from backend.conftest import TestingSessionLocal
+
+    db = TestingSessionLocal()
+    try:
+        db.query(User).filter(User.email == email).update({"is_admin": True})
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_bulk_import_users(client, test_user):
+    """Test bulk import creates valid rows and reports the rest"""
+    make_admin(test_user["email"])
+    upload = (
+        "email,password,full_name\n"
+        "alice@example.com,password123,Alice\n"
+        f"{test_user['email'].upper()},password123,Existing\n"
+        "not-an-email,password123,Broken\n"
+        "bob@example.com,short,Bob\n"
+        "alice@example.com,password123,Alice Again\n"
+        "carol@example.com,password123,\n"
+    )
+    response = client.post(
+        "/auth/admin/users/bulk",
+        files={"file": ("users.csv", upload, "text/csv")},
+        headers={"Authorization": f"Bearer {test_user['token']}"}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["total"] == 6
+    assert result["created"] == 2
+    assert [f["row"] for f in result["failures"]] == [3, 4, 5, 6]
+    assert result["failures"][0]["error"] == "Email already registered"
+
+    login = client.post("/auth/login", json={"email": "carol@example.com", "password": "password123"})
+    assert login.status_code == 200
+
+
+def test_emails_ignore_letter_case(client):
+    """Test signup and login treat emails differing only in case as one account"""
+    response = client.post("/auth/signup", json={"email": "Mixed.Case@Example.com", "password": "password123"})
+    assert response.status_code == 201
+    assert response.json()["email"] == "mixed.case@example.com"
+
+    response = client.post("/auth/signup", json={"email": "MIXED.CASE@example.com", "password": "password123"})
+    assert response.status_code == 400
+
+    login = client.post("/auth/login", json={"email": "mixed.CASE@example.com", "password": "password123"})
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert client.get("/assessments", headers=headers).status_code == 200
+
+
+def test_migration_lowercases_user_emails(tmp_path):
+    """Test stored emails are lowercased, and case-only duplicates stop the upgrade"""
+    import os
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine, text
+
+    config = Config(os.path.join(os.path.dirname(__file__), "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(os.path.dirname(__file__), "alembic"))
+
+    def migrate(engine, emails):
+        with engine.begin() as connection:
+            config.attributes["connection"] = connection
+            command.upgrade(config, "0006_login_attempt_counters")
+            for email in emails:
+                connection.execute(text("INSERT INTO users (email, hashed_password) VALUES (:e, 'x')"), {"e": email})
+            command.upgrade(config, "head")
+            return sorted(connection.execute(text("SELECT email FROM users")).scalars())
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'emails.db'}")
+    assert migrate(engine, ["Alice@Example.com", "bob@example.com"]) == ["alice@example.com", "bob@example.com"]
+    engine.dispose()
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'conflict.db'}")
+    with pytest.raises(ValueError, match="carol@example.com"):
+        migrate(engine, ["Carol@example.com", "carol@example.com"])
+    engine.dispose()
+
+
+def test_bulk_import_requires_admin(client, test_user):
+    """Test non-admins cannot bulk import users"""
+    response = client.post(
+        "/auth/admin/users/bulk",
+        files={"file": ("users.ndjson", '{"email": "x@example.com", "password": "password123"}\n')},
+        headers={"Authorization": f"Bearer {test_user['token']}"}
+    )
+    assert response.status_code == 403
+
+
+def test_async_database_url_drivers():
+    """Test database URLs are mapped onto their async drivers"""
+    from backend.db.database import to_async_url
+
+    assert to_async_url("postgresql+psycopg2://user:secret@db:5432/app") == "postgresql+asyncpg://user:secret@db:5432/app"
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    with pytest.raises(ValueError):
+        to_async_url("mysql://user@db/app")
+
+
+def test_pool_metrics_record_waits_and_timeouts(tmp_path):
+    """Test checkout waits and pool timeouts are counted"""
+    from sqlalchemy import create_engine, exc
+    from backend.db.pool_metrics import PoolMetrics, InstrumentedQueuePool, instrument_engine
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2
+    )
+    metrics = instrument_engine(engine, PoolMetrics("test", slow_checkout_ms=20))
+    try:
+        held = engine.connect()
+        assert metrics.stats()["in_use"] == 1
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+        threading.Timer(0.03, held.close).start()
+        with engine.connect():
+            pass
+
+        stats = metrics.stats()
+        assert stats["timeouts"] == 1
+        assert stats["checkouts"] == 2
+        assert stats["slow_checkouts"] == 1
+        assert stats["checkout_wait_ms_max"] >= 20
+        assert stats["connects"] == 1
+        assert stats["peak_in_use"] == 1
+        assert stats["in_use"] == 0
+
+        engine.dispose()
+        with engine.connect():
+            pass
+        assert metrics.stats()["checkouts"] == 3
+    finally:
+        engine.dispose()
+
+
+def test_metrics_include_db_pools(client, test_user, admin_headers):
+    """Test /metrics is for administrators and exposes both connection pools"""
+    assert client.get("/metrics").status_code == 403
+    user_headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assert client.get("/metrics", headers=user_headers).status_code == 403
+
+    pools = client.get("/metrics", headers=admin_headers).json()["db_pool"]
+    assert set(pools) == {"sync", "async"}
+    assert {"in_use", "overflow", "checkout_wait_ms_max", "invalidations", "timeouts"} <= set(pools["sync"])
+
+
+def test_read_replica_routing_with_read_your_writes(client, test_user, tmp_path):
+    """Test reads use the replica except right after the user's own writes"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+    from backend.main import app
+    from backend.db.database import Base, get_async_db
+    from backend.db.routing import routing_sessionmaker, read_your_writes
+    from backend.conftest import async_engine, override_get_async_db
+
+    # A second SQLite file stands in for a replica that has not caught up
+    replica_path = tmp_path / "replica.db"
+    replica_sync = create_engine(f"sqlite:///{replica_path}")
+    Base.metadata.create_all(bind=replica_sync)
+    replica_sync.dispose()
+    replica = create_async_engine(f"sqlite+aiosqlite:///{replica_path}", poolclass=NullPool)
+    session_factory = routing_sessionmaker(async_engine, replica)
+
+    async def override_routed_db():
+        async with session_factory() as db:
+            yield db
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    app.dependency_overrides[get_async_db] = override_routed_db
+    try:
+        created = client.post("/assessments", json={"title": "Fresh"}, headers=headers)
+        assert created.status_code == 201
+
+        # Within the stickiness window the primary serves the new row
+        assert [a["title"] for a in client.get("/assessments", headers=headers).json()] == ["Fresh"]
+
+        # Once the window lapses, reads go to the (empty) replica
+        read_your_writes.clear()
+        assert client.get("/assessments", headers=headers).json() == []
+        assert client.get(f"/assessments/{created.json()['id']}", headers=headers).status_code == 404
+        assert read_your_writes.stats()["replica_statements"] >= 2
+    finally:
+        app.dependency_overrides[get_async_db] = override_get_async_db
+
+
+def test_routing_session_stays_on_primary_after_write(tmp_path):
+    """Test a read-only session switches to the primary once it writes"""
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+    from backend.db.database import Base
+    from backend.db.models import User
+    from backend.db.routing import routing_sessionmaker
+
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}", poolclass=NullPool)
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool)
+    session_factory = routing_sessionmaker(primary, replica)
+
+    async def scenario():
+        for engine in (primary, replica):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+        async with session_factory() as db:
+            db.info["read_only"] = True
+            before = db.sync_session.get_bind(clause=select(User))
+            db.add(User(email="writer@example.com", hashed_password="x"))
+            await db.flush()
+            after = db.sync_session.get_bind(clause=select(User))
+            found = await db.scalar(select(User).where(User.email == "writer@example.com"))
+            await db.rollback()
+            return before, after, found
+
+    before, after, found = asyncio.run(scenario())
+    assert before is replica.sync_engine
+    assert after is primary.sync_engine
+    assert found is not None
+
+
+def test_sqlite_profile_pragmas(tmp_path):
+    """Test the SQLite profile switches new connections to WAL with tuned pragmas"""
+    from sqlalchemy import create_engine, text
+    from backend.db.sqlite import apply_sqlite_pragmas
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    apply_sqlite_pragmas(engine)
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    finally:
+        engine.dispose()
+
+
+def test_single_writer_queues_concurrent_writes(tmp_path):
+    """Test concurrent writers share the single writer connection without lock errors"""
+    from sqlalchemy import create_engine, func, select
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+    from backend.db.database import Base
+    from backend.db.models import User, Assessment
+    from backend.db.routing import routing_sessionmaker
+    from backend.db.sqlite import apply_sqlite_pragmas
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'writer.db'}"
+    setup = create_engine(f"sqlite:///{tmp_path / 'writer.db'}")
+    Base.metadata.create_all(bind=setup)
+    setup.dispose()
+
+    readers = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=4)
+    writer = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0)
+    for engine in (readers, writer):
+        apply_sqlite_pragmas(engine.sync_engine)
+    session_factory = routing_sessionmaker(readers, writer=writer)
+
+    async def scenario():
+        async with session_factory() as db:
+            user = User(email="writer@example.com", hashed_password="x")
+            db.add(user)
+            await db.commit()
+            user_id = user.id
+
+        async def write(i):
+            async with session_factory() as db:
+                assert db.sync_session.get_bind(clause=select(User)) is readers.sync_engine
+                db.add(Assessment(user_id=user_id, title=f"Concurrent {i}"))
+                await db.flush()
+                assert db.sync_session.get_bind(clause=select(User)) is writer.sync_engine
+                await asyncio.sleep(0)
+                await db.commit()
+
+        await asyncio.gather(*(write(i) for i in range(20)))
+        async with session_factory() as db:
+            count = await db.scalar(select(func.count()).select_from(Assessment))
+        await readers.dispose()
+        await writer.dispose()
+        return count
+
+    assert asyncio.run(scenario()) == 20
+
+
+def test_db_query_headers(client, test_user):
+    """Test responses report the statements they ran"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    response = client.get("/assessments", headers=headers)
+    assert int(response.headers["X-DB-Queries"]) >= 1
+    assert float(response.headers["X-DB-Time"]) >= 0
+    assert client.get("/health").headers["X-DB-Queries"] == "0"
+
+
+def test_strict_query_budget_fails_request(client, monkeypatch):
+    """Test strict mode fails a request over the query budget before it commits"""
+    from backend.config import settings
+    from backend.db.models import User
+    from backend.conftest import TestingSessionLocal
+
+    monkeypatch.setattr(settings, "db_query_budget", 1)
+    response = client.post("/auth/signup", json={"email": "budget@example.com", "password": "password123"})
+    assert response.status_code == 500
+    assert "budget" in response.json()["detail"]
+
+    db = TestingSessionLocal()
+    try:
+        assert db.query(User).filter(User.email == "budget@example.com").count() == 0
+    finally:
+        db.close()
+
+
+def test_repeated_statement_shapes_detected():
+    """Test statements differing only in parameters count as one repeated shape"""
+    from backend.db.query_stats import RequestQueryStats, statement_shape
+
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape("SELECT *\n FROM t WHERE id IN (?)")
+    stats = RequestQueryStats()
+    for _ in range(4):
+        stats.record("SELECT * FROM assessment_results WHERE assessment_id = ?", 0.001)
+    assert stats.violations(budget=0, repeat_limit=3)
+    assert not stats.violations(budget=10, repeat_limit=4)
+
+
+def create_scored_assessment(client, headers, title):
+    """Create an assessment with answers in every category"""
+    from backend.assessments.questionnaire import questionnaire_registry
+
+    assessment_id = client.post("/assessments", json={"title": title}, headers=headers).json()["id"]
+    for category, questionnaire in questionnaire_registry.current().templates.items():
+        answers = {q["id"]: q["options"][-1]["value"] for q in questionnaire["questions"]}
+        response = client.post(
+            f"/assessments/{assessment_id}/answers",
+            json={"category": category.value, "answers": answers},
+            headers=headers
+        )
+        assert response.status_code == 200
+    return assessment_id
+
+
+def query_count(client, path, headers):
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    return int(response.headers["X-DB-Queries"])
+
+
+def test_list_query_count_is_constant(client, test_user):
+    """Test listing assessments costs the same queries for 1 or many rows"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    create_scored_assessment(client, headers, "First")
+    query_count(client, "/assessments", headers)  # warm auth caches
+
+    one = query_count(client, "/assessments?limit=1", headers)
+    for i in range(5):
+        create_scored_assessment(client, headers, f"More {i}")
+    query_count(client, "/assessments", headers)
+    many = query_count(client, "/assessments?limit=100", headers)
+
+    assert one == many
+    assert len(client.get("/assessments", headers=headers).json()[0]["results"]) == 4
+
+
+def test_detail_summary_and_export_query_counts(client, test_user):
+    """Test detail, summary and exports read the assessment and its results in one statement"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    empty_id = client.post("/assessments", json={"title": "Empty"}, headers=headers).json()["id"]
+    scored_id = create_scored_assessment(client, headers, "Scored")
+    query_count(client, "/assessments", headers)  # warm auth caches
+
+    for path in ("", "/summary", "/export/csv", "/export/pdf"):
+        empty = query_count(client, f"/assessments/{empty_id}{path}", headers)
+        scored = query_count(client, f"/assessments/{scored_id}{path}", headers)
+        assert empty == scored == 1, path
+
+
+def test_keyset_pagination(client, test_user):
+    """Test cursors page through assessments newest first without gaps or repeats"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    created = [
+        client.post("/assessments", json={"title": f"Page {i}"}, headers=headers).json()["id"]
+        for i in range(5)
+    ]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/assessments", params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(a["id"] for a in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == list(reversed(created))
+    assert client.get("/assessments", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
+
+
+def test_list_filters_by_status(client, test_user):
+    """Test the status filter on the assessment listing"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    draft_id = client.post("/assessments", json={"title": "Draft"}, headers=headers).json()["id"]
+    started_id = client.post("/assessments", json={"title": "Started"}, headers=headers).json()["id"]
+    client.put(f"/assessments/{started_id}", json={"status": "in_progress"}, headers=headers)
+
+    drafts = client.get("/assessments", params={"status": "draft"}, headers=headers).json()
+    assert [a["id"] for a in drafts] == [draft_id]
+    assert client.get("/assessments", params={"status": "bogus"}, headers=headers).status_code == 422
+
+
+def test_resubmitting_category_upserts_result(client, test_user):
+    """Test a resubmitted category overwrites its result instead of adding another"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assessment_id = client.post("/assessments", json={"title": "Upsert"}, headers=headers).json()["id"]
+    low = {"dp_1": 0, "dp_2": 0, "dp_3": 0, "dp_4": 0, "dp_5": 0}
+    high = {"dp_1": 10, "dp_2": 10, "dp_3": 15, "dp_4": 10, "dp_5": 15}
+
+    first = client.post(
+        f"/assessments/{assessment_id}/answers",
+        json={"category": "data_privacy", "answers": low},
+        headers=headers
+    ).json()
+    second = client.post(
+        f"/assessments/{assessment_id}/answers",
+        json={"category": "data_privacy", "answers": high},
+        headers=headers
+    ).json()
+
+    assert second["id"] == first["id"]
+    assert second["score"] > first["score"]
+    assessment = client.get(f"/assessments/{assessment_id}", headers=headers).json()
+    assert len(assessment["results"]) == 1
+    assert assessment["results"][0]["score"] == second["score"]
+    assert assessment["status"] == "in_progress"
+
+
+def test_submission_completes_assessment_without_count_query(client, test_user):
+    """Test the last category completes the assessment with a single upsert statement"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assessment_id = create_scored_assessment(client, headers, "Complete")
+    assessment = client.get(f"/assessments/{assessment_id}", headers=headers).json()
+    assert assessment["status"] == "completed"
+    assert assessment["completed_at"] is not None
+
+    response = client.post(
+        f"/assessments/{assessment_id}/answers",
+        json={"category": "ethics", "answers": {"eth_1": 0}},
+        headers=headers
+    )
+    assert response.status_code == 200
+    # Lock the assessment, upsert the result, move the rollup count, replace the category's
+    # answer rows (delete and insert), update the stored summary; no count and no refresh
+    assert int(response.headers["X-DB-Queries"]) == 6
+    assert client.get(f"/assessments/{assessment_id}", headers=headers).json()["completed_at"] == assessment["completed_at"]
+
+
+def test_upsert_statement_per_dialect():
+    """Test the result upsert compiles to ON CONFLICT ... RETURNING on each backend"""
+    from sqlalchemy.dialects import postgresql, sqlite
+    from backend.assessments.crud import upsert_result_statement
+
+    values = {"assessment_id": 1, "category": "ethics", "questions": {}, "score": 0, "maturity_level": "initial"}
+    for dialect in (postgresql.dialect(), sqlite.dialect()):
+        sql = str(upsert_result_statement(dialect.name, [values]).compile(dialect=dialect))
+        assert "ON CONFLICT (assessment_id, category) DO UPDATE" in sql
+        assert "RETURNING" in sql
+    with pytest.raises(ValueError):
+        upsert_result_statement("mysql", [values])
+
+
+def test_rollup_deltas_net_out_and_increment():
+    """Test rollup deltas cancel unchanged scores and compile to an incrementing upsert"""
+    from sqlalchemy.dialects import postgresql, sqlite
+    from backend.assessments.crud import rollup_deltas, rollup_delta_statement
+
+    deltas = rollup_deltas(removed=[("ethics", 40), ("model_risk", 70)], added=[("ethics", 80), ("model_risk", 70)])
+    assert deltas == [{"category": "ethics", "score": 40, "count": -1}, {"category": "ethics", "score": 80, "count": 1}]
+    for dialect in (postgresql.dialect(), sqlite.dialect()):
+        sql = str(rollup_delta_statement(dialect.name, deltas).compile(dialect=dialect))
+        assert "ON CONFLICT (category, score) DO UPDATE SET count = (category_score_rollups.count + excluded.count)" in sql
+
+
+def test_bulk_answers_submit_categories_together(client, test_user):
+    """Test a bulk submission saves every category at once and returns the summary"""
+    from backend.assessments.questionnaire import questionnaire_registry
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assessment_id = client.post("/assessments", json={"title": "Bulk"}, headers=headers).json()["id"]
+    answers = {
+        category.value: {q["id"]: q["options"][-1]["value"] for q in questionnaire["questions"]}
+        for category, questionnaire in questionnaire_registry.current().templates.items()
+    }
+
+    partial = client.post(
+        f"/assessments/{assessment_id}/answers/bulk",
+        json={"answers": {"data_privacy": answers["data_privacy"], "ethics": answers["ethics"]}},
+        headers=headers
+    )
+    assert partial.status_code == 200
+    assert [r["category"] for r in partial.json()["results"]] == ["data_privacy", "ethics"]
+    assert partial.json()["summary"]["assessment"]["status"] == "in_progress"
+
+    response = client.post(f"/assessments/{assessment_id}/answers/bulk", json={"answers": answers}, headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["results"]) == 4
+    assert data["summary"]["assessment"]["status"] == "completed"
+    assert len(data["summary"]["assessment"]["results"]) == 4
+    assert data["summary"]["category_scores"] == {r["category"]: r["score"] for r in data["results"]}
+    assert data["summary"] == client.get(f"/assessments/{assessment_id}/summary", headers=headers).json()
+
+
+def test_bulk_answers_validation(client, test_user):
+    """Test bulk submissions reject empty or unknown categories and missing assessments"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assessment_id = client.post("/assessments", json={"title": "Bulk"}, headers=headers).json()["id"]
+    path = f"/assessments/{assessment_id}/answers/bulk"
+
+    assert client.post(path, json={"answers": {}}, headers=headers).status_code == 422
+    assert client.post(path, json={"answers": {"bogus": {"x": 1}}}, headers=headers).status_code == 422
+    missing = client.post("/assessments/999999/answers/bulk", json={"answers": {"ethics": {"eth_1": 0}}}, headers=headers)
+    assert missing.status_code == 404
+
+
+def test_migrations_backfill_assessment_summary(tmp_path):
+    """Test the migrations dedupe results and backfill stored summaries in batches"""
+    import importlib
+    import json
+    import os
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine, inspect, text
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    config = Config(os.path.join(os.path.dirname(__file__), "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(os.path.dirname(__file__), "alembic"))
+
+    def migrate(revision):
+        with engine.begin() as connection:
+            config.attributes["connection"] = connection
+            command.upgrade(config, revision)
+
+    migrate("0001_initial_schema")
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'm@example.com', 'x')"))
+        for assessment_id in range(1, 4):
+            connection.execute(text("INSERT INTO assessments (id, user_id, title) VALUES (:id, 1, 'A')"), {"id": assessment_id})
+        rows = [
+            (1, "ethics", 10, {"eth_1": 0}),
+            (1, "ethics", 90, {"eth_1": 15, "eth_2": 7}),
+            (1, "compliance", 50, {}),
+            (2, "data_privacy", 70, {"dp_1": 10}),
+        ]
+        for assessment_id, category, score, questions in rows:
+            connection.execute(
+                text(
+                    "INSERT INTO assessment_results (assessment_id, category, questions, score, maturity_level) "
+                    "VALUES (:a, :c, :q, :s, 'initial')"
+                ),
+                {"a": assessment_id, "c": category, "q": json.dumps(questions), "s": score}
+            )
+
+    migrate("head")
+
+    def summaries():
+        with engine.connect() as connection:
+            return [
+                (row.overall_score, row.overall_maturity, json.loads(row.category_scores))
+                for row in connection.execute(text("SELECT * FROM assessments ORDER BY id"))
+            ]
+
+    expected = [
+        (70, "managed", {"ethics": 90, "compliance": 50}),
+        (70, "managed", {"data_privacy": 70}),
+        (0, "initial", {}),
+    ]
+    assert summaries() == expected
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM assessment_results")).scalar() == 3
+
+    # The same backfill walking one assessment per batch
+    summary_migration = importlib.import_module("backend.alembic.versions.0003_assessment_summary")
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE assessments SET overall_score = 0, overall_maturity = 'initial', category_scores = '{}'"))
+        original_batch, summary_migration.BATCH_SIZE = summary_migration.BATCH_SIZE, 1
+        try:
+            summary_migration.backfill(connection)
+        finally:
+            summary_migration.BATCH_SIZE = original_batch
+    assert summaries() == expected
+    with engine.connect() as connection:
+        rollups = connection.execute(text("SELECT category, score, count FROM category_score_rollups ORDER BY category"))
+        assert [tuple(row) for row in rollups] == [("compliance", 50, 1), ("data_privacy", 70, 1), ("ethics", 90, 1)]
+        answers = connection.execute(text(
+            "SELECT assessment_id, category, question_id, value FROM assessment_answers ORDER BY assessment_id, question_id"
+        ))
+        assert [tuple(row) for row in answers] == [(1, "ethics", "eth_1", 15), (1, "ethics", "eth_2", 7), (2, "data_privacy", "dp_1", 10)]
+
+    # The portable answer backfill, one result per batch, gives the same rows
+    answers_migration = importlib.import_module("backend.alembic.versions.0005_assessment_answers")
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM assessment_answers"))
+        original_batch, answers_migration.BATCH_SIZE = answers_migration.BATCH_SIZE, 1
+        try:
+            answers_migration.backfill(connection)
+        finally:
+            answers_migration.BATCH_SIZE = original_batch
+    with engine.connect() as connection:
+        answers = connection.execute(text(
+            "SELECT assessment_id, category, question_id, value FROM assessment_answers ORDER BY assessment_id, question_id"
+        ))
+        assert [tuple(row) for row in answers] == [(1, "ethics", "eth_1", 15), (1, "ethics", "eth_2", 7), (2, "data_privacy", "dp_1", 10)]
+    assert "uq_assessment_results_assessment_category" in {
+        c["name"] for c in inspect(engine).get_unique_constraints("assessment_results")
+    }
+    engine.dispose()
+
+
+def test_migrations_step_up_and_down(tmp_path):
+    """Test every revision upgrades and downgrades on its own, ending at the models' tables"""
+    import os
+    from alembic import command
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    from sqlalchemy import create_engine, inspect
+    from backend.db.database import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'stepped.db'}")
+    config = Config(os.path.join(os.path.dirname(__file__), "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(os.path.dirname(__file__), "alembic"))
+    revisions = [script.revision for script in ScriptDirectory.from_config(config).walk_revisions("base", "heads")]
+
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        for revision in reversed(revisions):
+            command.upgrade(config, revision)
+        assert set(Base.metadata.tables) | {"login_attempt_counters"} <= set(inspect(connection).get_table_names())
+        for _ in revisions:
+            command.downgrade(config, "-1")
+        assert set(inspect(connection).get_table_names()) <= {"alembic_version"}
+    engine.dispose()
+
+
+def test_compiled_scoring_matches_templates():
+    """Test compiled questionnaires score every option combination like the template formula"""
+    from itertools import product
+    from backend.assessments.questionnaire import questionnaire_registry, calculate_category_score
+
+    for category, questionnaire in questionnaire_registry.current().templates.items():
+        questions = questionnaire["questions"]
+        total_weight = sum(q["weight"] for q in questions)
+        for values in product(*([o["value"] for o in q["options"]] for q in questions)):
+            answers = {q["id"]: value for q, value in zip(questions, values)}
+            assert calculate_category_score(answers, category) == int((sum(values) / total_weight) * 100)
+
+
+def test_invalid_answers_rejected(client, test_user):
+    """Test unknown question IDs and values outside a question's options are rejected"""
+    from backend.assessments.questionnaire import questionnaire_registry, AssessmentCategory, InvalidAnswersError
+
+    with pytest.raises(InvalidAnswersError) as error:
+        questionnaire_registry.current().compiled[AssessmentCategory.ETHICS].score({"eth_1": 3, "dp_1": 10, "eth_2": 15})
+    assert len(error.value.problems) == 2
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assessment_id = client.post("/assessments", json={"title": "Invalid"}, headers=headers).json()["id"]
+    for answers in ({"dp_1": 3}, {"nope": 0}):
+        response = client.post(
+            f"/assessments/{assessment_id}/answers",
+            json={"category": "data_privacy", "answers": answers},
+            headers=headers
+        )
+        assert response.status_code == 422
+    bulk = client.post(
+        f"/assessments/{assessment_id}/answers/bulk",
+        json={"answers": {"data_privacy": {"dp_1": 10}, "ethics": {"eth_1": 20}}},
+        headers=headers
+    )
+    assert bulk.status_code == 422
+    assert "eth_1" in str(bulk.json()["detail"])
+    assert client.get(f"/assessments/{assessment_id}", headers=headers).json()["results"] == []
+
+
+def test_batch_scoring_matches_single_scoring():
+    """Test the vectorized scorer agrees with per-answer-set scoring and maturity"""
+    from itertools import product
+    from backend.assessments.batch_scoring import answer_matrix, score_batch
+    from backend.assessments.questionnaire import (
+        questionnaire_registry, AssessmentCategory, InvalidAnswersError, get_maturity_level
+    )
+
+    compiled = questionnaire_registry.current().compiled
+
+    for category, questionnaire in questionnaire_registry.current().templates.items():
+        questions = questionnaire["questions"]
+        answer_sets = [
+            {q["id"]: value for q, value in zip(questions, values)}
+            for values in product(*([o["value"] for o in q["options"]] for q in questions))
+        ]
+        scores, maturities = score_batch(compiled[category], answer_matrix(compiled[category], answer_sets))
+        expected = [compiled[category].score(answers) for answers in answer_sets]
+        assert scores.tolist() == expected
+        assert maturities.tolist() == [get_maturity_level(score).value for score in expected]
+
+    ethics = compiled[AssessmentCategory.ETHICS]
+    with pytest.raises(InvalidAnswersError):
+        score_batch(ethics, answer_matrix(ethics, [{"eth_1": 3}]))
+    with pytest.raises(ValueError):
+        score_batch(ethics, [[0, 0]])
+
+
+def test_what_if_ranks_single_question_upgrades(client, test_user):
+    """Test the what-if analysis lists every upgrade of the submitted answers, largest gain first"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assessment_id = client.post("/assessments", json={"title": "What if"}, headers=headers).json()["id"]
+    client.post(
+        f"/assessments/{assessment_id}/answers/bulk",
+        json={"answers": {
+            "data_privacy": {"dp_1": 10, "dp_2": 10, "dp_3": 7, "dp_4": 10, "dp_5": 0},
+            "ethics": {"eth_1": 15, "eth_2": 15, "eth_3": 15, "eth_4": 10, "eth_5": 10},
+        }},
+        headers=headers
+    )
+
+    response = client.get(f"/assessments/{assessment_id}/what-if", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    upgrades = data["upgrades"]
+    # dp_3: 7 -> 15, dp_5: 0 -> 7 and 0 -> 15; ethics is already at the top
+    assert [(u["question_id"], u["upgraded_value"]) for u in upgrades] == [("dp_5", 15), ("dp_3", 15), ("dp_5", 7)]
+    best = upgrades[0]
+    assert best["score_gain"] == 25 and best["category_score"] == 86
+    assert best["overall_score"] == (86 + 100) // 2
+    assert best["overall_gain"] == best["overall_score"] - data["overall_score"]
+
+    limited = client.get(f"/assessments/{assessment_id}/what-if", params={"category": "ethics"}, headers=headers)
+    assert limited.json()["upgrades"] == []
+    assert len(client.get(f"/assessments/{assessment_id}/what-if", params={"limit": 1}, headers=headers).json()["upgrades"]) == 1
+    assert client.get("/assessments/999999/what-if", headers=headers).status_code == 404
+
+
+def test_questionnaire_registry_reloads_changed_files(tmp_path):
+    """Test new and edited questionnaire files are picked up and broken edits keep the last good copy"""
+    import json
+    import shutil
+    import yaml
+    from backend.assessments.questionnaire import (
+        DEFAULT_QUESTIONNAIRE_DIR, QuestionnaireRegistry, AssessmentCategory, UnknownSchemaVersionError
+    )
+
+    shutil.copy(f"{DEFAULT_QUESTIONNAIRE_DIR}/1.0.json", tmp_path / "1.0.json")
+    registry = QuestionnaireRegistry(str(tmp_path), reload_seconds=0.01)
+    assert registry.versions() == ["1.0"]
+    assert registry.default_version == "1.0"
+
+    with open(tmp_path / "1.0.json") as f:
+        data = json.load(f)
+    data["schema_version"] = "1.10"
+    data["categories"]["ethics"]["title"] = "Responsible AI"
+    (tmp_path / "1.10.yaml").write_text(yaml.safe_dump(data))
+    time.sleep(0.02)
+    assert registry.versions() == ["1.0", "1.10"]
+    assert registry.default_version == "1.10"
+    assert registry.current().templates[AssessmentCategory.ETHICS]["title"] == "Responsible AI"
+
+    (tmp_path / "1.10.yaml").write_text("schema_version: '1.10'\ncategories: {}\n")
+    time.sleep(0.02)
+    assert registry.get("1.10").templates[AssessmentCategory.ETHICS]["title"] == "Responsible AI"
+    stats = registry.stats()
+    assert stats["reload_errors"] == 1 and "missing categories" in stats["last_error"]
+
+    with pytest.raises(UnknownSchemaVersionError):
+        registry.get("2.0")
+
+
+def test_assessments_scored_with_their_schema_version(client, test_user, admin_headers, tmp_path, monkeypatch):
+    """Test each assessment keeps the questionnaire version it was created with"""
+    import json
+    import shutil
+    from backend.assessments.questionnaire import DEFAULT_QUESTIONNAIRE_DIR, questionnaire_registry
+
+    shutil.copy(f"{DEFAULT_QUESTIONNAIRE_DIR}/1.0.json", tmp_path / "1.0.json")
+    monkeypatch.setattr(questionnaire_registry, "directory", str(tmp_path))
+    questionnaire_registry.clear()
+    try:
+        headers = {"Authorization": f"Bearer {test_user['token']}"}
+        old = client.post("/assessments", json={"title": "Old"}, headers=headers).json()
+        assert old["schema_version"] == "1.0"
+
+        # 2.0 doubles every data privacy weight, halving the same answers' score
+        with open(tmp_path / "1.0.json") as f:
+            data = json.load(f)
+        data["schema_version"] = "2.0"
+        for question in data["categories"]["data_privacy"]["questions"]:
+            question["weight"] *= 2
+        (tmp_path / "2.0.json").write_text(json.dumps(data))
+        questionnaire_registry.clear()
+
+        new = client.post("/assessments", json={"title": "New"}, headers=headers).json()
+        assert new["schema_version"] == "2.0"
+        answers = {"dp_1": 10, "dp_2": 10, "dp_3": 15, "dp_4": 10, "dp_5": 15}
+        scores = [
+            client.post(
+                f"/assessments/{assessment['id']}/answers",
+                json={"category": "data_privacy", "answers": answers},
+                headers=headers
+            ).json()["score"]
+            for assessment in (old, new)
+        ]
+        assert scores == [100, 50]
+
+        templates = client.get("/assessments/questionnaires", params={"schema_version": "1.0"}).json()
+        assert {t["schema_version"] for t in templates} == {"1.0"}
+        assert client.get("/assessments/questionnaires/ethics").json()["schema_version"] == "2.0"
+        assert client.get("/assessments/questionnaires", params={"schema_version": "9.9"}).status_code == 404
+
+        # Retiring a version still in use is a conflict rather than a silent rescore
+        (tmp_path / "2.0.json").unlink()
+        questionnaire_registry.clear()
+        response = client.post(
+            f"/assessments/{new['id']}/answers",
+            json={"category": "data_privacy", "answers": answers},
+            headers=headers
+        )
+        assert response.status_code == 409
+        assert client.get("/metrics", headers=admin_headers).json()["questionnaires"]["versions"] == ["1.0"]
+    finally:
+        questionnaire_registry.clear()
+
+
+def test_rescoring_job_resumes_from_checkpoint(client, test_user, tmp_path):
+    """Test the rescoring job rewrites stale results and summaries and resumes after a stop"""
+    import json
+    from sqlalchemy import text
+    from backend.conftest import TestingSessionLocal
+    from backend.assessments.rescoring import RescoringJob
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assessment_ids = [create_scored_assessment(client, headers, f"Rescore {i}") for i in range(3)]
+
+    # Scores written under old rules, plus one result whose answers the current rules reject
+    db = TestingSessionLocal()
+    try:
+        result_ids = db.execute(text("SELECT id FROM assessment_results ORDER BY id")).scalars().all()
+        db.execute(text(
+            "UPDATE assessment_results SET score = 0, maturity_level = 'initial', recommendations = 'stale' WHERE id % 2 = 0"
+        ))
+        db.execute(text("UPDATE assessment_results SET questions = :q WHERE id = :id"), {"q": '{"dp_1": 3}', "id": result_ids[0]})
+        db.execute(text("UPDATE assessments SET overall_score = 0, overall_maturity = 'initial', category_scores = '{}'"))
+        db.execute(text("DELETE FROM category_score_rollups"))
+        db.execute(text(
+            "INSERT INTO category_score_rollups (category, score, count) "
+            "SELECT category, score, COUNT(*) FROM assessment_results GROUP BY category, score"
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    checkpoint = tmp_path / "rescore.json"
+    job = RescoringJob(TestingSessionLocal, str(checkpoint), chunk_size=5, workers=2)
+    reports = []
+
+    def stop_after_first_chunk(stats):
+        reports.append(stats)
+        job.stop()
+
+    stats = job.run(progress=stop_after_first_chunk)
+    assert stats["status"] == "stopped"
+    assert stats["processed"] == 5 and stats["total"] == len(result_ids) == 12
+    assert json.loads(checkpoint.read_text())["last_id"] == result_ids[4]
+
+    stats = job.run(resume=True, progress=reports.append)
+    assert stats["status"] == "completed"
+    assert stats["processed"] == 12 and stats["last_id"] == result_ids[-1]
+    assert stats["updated"] == 6 and stats["failed"] == 1 and stats["skipped"] == 0
+    assert stats["failures"][0]["id"] == result_ids[0]
+    # Results of one assessment can span chunks, so its summary is rewritten once per chunk
+    assert stats["summaries_updated"] == 5
+    assert [r["processed"] for r in reports] == [5, 10, 12]
+
+    for assessment_id in assessment_ids:
+        summary = client.get(f"/assessments/{assessment_id}/summary", headers=headers).json()
+        assert summary["overall_score"] == 100 and summary["overall_maturity"] == "optimized"
+        assert set(summary["category_scores"].values()) == {100}
+        assert all(r["recommendations"] != "stale" for r in summary["assessment"]["results"])
+
+    assert_rollups_match_results()
+
+    # Nothing is stale any more, so a fresh run rewrites nothing
+    assert job.run(workers=1)["updated"] == 0
+
+
+def test_rescoring_admin_api(client, test_user, tmp_path, monkeypatch):
+    """Test admins can start and follow a background rescoring run"""
+    from backend.auth.principal_cache import principal_cache
+    from backend.assessments.rescoring import rescoring_job
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    create_scored_assessment(client, headers, "Rescore")
+    monkeypatch.setattr(rescoring_job, "checkpoint_path", str(tmp_path / "rescore.json"))
+
+    assert client.post("/assessments/admin/rescore", json={}, headers=headers).status_code == 403
+    make_admin(test_user["email"])
+    principal_cache.clear()
+
+    response = client.post("/assessments/admin/rescore", json={"workers": 1, "chunk_size": 2}, headers=headers)
+    assert response.status_code == 202
+    assert response.json()["status"] == "running"
+    rescoring_job.wait(timeout=30)
+
+    status = client.get("/assessments/admin/rescore", headers=headers).json()
+    assert status["status"] == "completed"
+    assert status["processed"] == status["total"] == 4
+    assert status["updated"] == 0
+    assert client.get("/metrics", headers=headers).json()["rescoring"]["processed"] == 4
+
+    # The checkpoint belongs to a run over every version
+    response = client.post("/assessments/admin/rescore", json={"resume": True, "schema_version": "1.0"}, headers=headers)
+    assert response.status_code == 400
+    assert client.delete("/assessments/admin/rescore", headers=headers).json()["status"] == "completed"
+
+
+def assert_rollups_match_results():
+    """Check the category score rollups against a full GROUP BY over the results"""
+    from sqlalchemy import text
+    from backend.conftest import TestingSessionLocal
+
+    db = TestingSessionLocal()
+    try:
+        rollups = {
+            (row.category, row.score): row.count
+            for row in db.execute(text("SELECT category, score, count FROM category_score_rollups WHERE count != 0"))
+        }
+        grouped = {
+            (row.category, row.score): row.n
+            for row in db.execute(text("SELECT category, score, COUNT(*) AS n FROM assessment_results GROUP BY category, score"))
+        }
+    finally:
+        db.close()
+    assert rollups == grouped
+
+
+def test_category_rollups_follow_every_write(client, test_user):
+    """Test rollups track submissions, resubmissions and deletions and back the percentile benchmarks"""
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    ids = [client.post("/assessments", json={"title": f"Peer {i}"}, headers=headers).json()["id"] for i in range(4)]
+    # ethics scores 0, 46, 100 and 100; only the first two also answer data privacy
+    answers = [
+        {"ethics": {"eth_1": 0}, "data_privacy": {"dp_1": 10}},
+        {"ethics": {"eth_1": 15, "eth_2": 15, "eth_3": 0, "eth_4": 0, "eth_5": 0}, "data_privacy": {"dp_1": 5}},
+        {"ethics": {"eth_1": 15, "eth_2": 15, "eth_3": 15, "eth_4": 10, "eth_5": 10}},
+        {"ethics": {"eth_1": 15, "eth_2": 15, "eth_3": 15, "eth_4": 10, "eth_5": 10}},
+    ]
+    for assessment_id, submission in zip(ids, answers):
+        assert client.post(f"/assessments/{assessment_id}/answers/bulk", json={"answers": submission}, headers=headers).status_code == 200
+    assert_rollups_match_results()
+
+    response = client.get(f"/assessments/{ids[1]}/benchmarks", headers=headers)
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Queries"]) <= 3
+    benchmarks = {b["category"]: b for b in response.json()["categories"]}
+    ethics = benchmarks["ethics"]
+    assert ethics["assessments"] == 4 and sum(ethics["histogram"]) == 4
+    assert ethics["score"] == 46 and ethics["percentile_rank"] == 37.5  # one below, itself counted as half
+    assert ethics["maturity_distribution"] == {"initial": 1, "developing": 0, "defined": 1, "managed": 0, "optimized": 2}
+    assert benchmarks["data_privacy"]["assessments"] == 2
+    top = {b["category"]: b for b in client.get(f"/assessments/{ids[2]}/benchmarks", headers=headers).json()["categories"]}
+    assert list(top) == ["ethics"] and top["ethics"]["percentile_rank"] == 75.0
+
+    # Resubmitting moves the count to the new score; deleting removes it
+    client.post(f"/assessments/{ids[0]}/answers", json={"category": "ethics", "answers": {"eth_1": 15}}, headers=headers)
+    client.post(f"/assessments/{ids[3]}/answers", json={"category": "ethics", "answers": {"eth_1": 15, "eth_2": 15, "eth_3": 15, "eth_4": 10, "eth_5": 10}}, headers=headers)
+    assert client.delete(f"/assessments/{ids[2]}", headers=headers).status_code == 204
+    assert_rollups_match_results()
+    ethics = client.get(f"/assessments/{ids[3]}/benchmarks", headers=headers).json()["categories"][0]
+    assert ethics["assessments"] == 3 and ethics["percentile_rank"] == round(2.5 / 3 * 100, 1)
+
+    empty_id = client.post("/assessments", json={"title": "Empty"}, headers=headers).json()["id"]
+    assert client.get(f"/assessments/{empty_id}/benchmarks", headers=headers).json()["categories"] == []
+    assert client.get("/assessments/999999/benchmarks", headers=headers).status_code == 404
+
+
+def test_answer_distribution_analytics(client, test_user):
+    """Test per-question option counts follow submissions and honour the date and status filters"""
+    from datetime import datetime, timedelta
+    from sqlalchemy import text
+    from backend.auth.principal_cache import principal_cache
+    from backend.conftest import TestingSessionLocal
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    ids = [client.post("/assessments", json={"title": f"Org {i}"}, headers=headers).json()["id"] for i in range(3)]
+    for assessment_id, dp_3 in zip(ids, (0, 0, 15)):
+        client.post(
+            f"/assessments/{assessment_id}/answers",
+            json={"category": "data_privacy", "answers": {"dp_1": 10, "dp_3": dp_3}},
+            headers=headers
+        )
+    # The third organisation resubmits without dp_1 and completes every other category
+    client.post(f"/assessments/{ids[2]}/answers", json={"category": "data_privacy", "answers": {"dp_3": 7}}, headers=headers)
+    client.post(
+        f"/assessments/{ids[2]}/answers/bulk",
+        json={"answers": {"model_risk": {"mr_1": 0}, "ethics": {"eth_1": 0}, "compliance": {"comp_1": 0}}},
+        headers=headers
+    )
+
+    params = {"category": "data_privacy"}
+    assert client.get("/assessments/analytics/answers", params=params, headers=headers).status_code == 403
+    make_admin(test_user["email"])
+    principal_cache.clear()
+
+    def distribution(**filters):
+        response = client.get("/assessments/analytics/answers", params={**params, **filters}, headers=headers)
+        assert response.status_code == 200
+        assert int(response.headers["X-DB-Queries"]) <= 2
+        return {
+            q["question_id"]: (q["answered"], {o["value"]: (o["count"], round(o["share"], 3)) for o in q["options"]})
+            for q in response.json()["questions"]
+        }
+
+    assert distribution() == {
+        "dp_1": (2, {10: (2, 1.0)}),
+        "dp_3": (3, {0: (2, 0.667), 7: (1, 0.333)}),
+    }
+    assert distribution(question_id="dp_3", status="completed") == {"dp_3": (1, {7: (1, 1.0)})}
+    assert distribution(status="draft") == {}
+
+    # Answers submitted last month fall outside a window starting yesterday
+    db = TestingSessionLocal()
+    try:
+        db.execute(
+            text("UPDATE assessment_answers SET answered_at = :at WHERE assessment_id = :id"),
+            {"at": datetime.utcnow() - timedelta(days=30), "id": ids[0]}
+        )
+        db.commit()
+    finally:
+        db.close()
+    yesterday = (datetime.utcnow() - timedelta(days=1)).isoformat() + "Z"
+    assert distribution(question_id="dp_3", since=yesterday) == {"dp_3": (2, {0: (1, 0.5), 7: (1, 0.5)})}
+    assert distribution(question_id="dp_3", until=yesterday) == {"dp_3": (1, {0: (1, 1.0)})}
+
+    assert client.delete(f"/assessments/{ids[1]}", headers=headers).status_code == 204
+    assert distribution(question_id="dp_1") == {"dp_1": (1, {10: (1, 1.0)})}
+    assert client.get("/assessments/analytics/answers", params={"category": "nope"}, headers=headers).status_code == 422
+
+
+def test_rescoring_chunk_write_after_resubmission_keeps_rollups(client, test_user, tmp_path):
+    """Test a result resubmitted between a chunk's read and write is neither rewritten nor re-counted"""
+    from sqlalchemy import text
+    from backend.conftest import TestingSessionLocal
+    from backend.assessments.rescoring import RescoringJob, rescore_rows
+    from backend.assessments.questionnaire import questionnaire_registry, AssessmentCategory
+
+    headers = {"Authorization": f"Bearer {test_user['token']}"}
+    assessment_id = create_scored_assessment(client, headers, "Interleaved")
+
+    # Stale stored scores, with the rollups matching them
+    db = TestingSessionLocal()
+    try:
+        db.execute(text("UPDATE assessment_results SET score = 0, maturity_level = 'initial', recommendations = 'stale'"))
+        db.execute(text("DELETE FROM category_score_rollups"))
+        db.execute(text(
+            "INSERT INTO category_score_rollups (category, score, count) "
+            "SELECT category, score, COUNT(*) FROM assessment_results GROUP BY category, score"
+        ))
+        db.execute(text("UPDATE assessments SET category_scores = :scores"), {
+            "scores": '{"data_privacy": 0, "model_risk": 0, "ethics": 0, "compliance": 0}'
+        })
+        db.commit()
+    finally:
+        db.close()
+
+    job = RescoringJob(TestingSessionLocal, str(tmp_path / "rescore.json"), workers=1)
+    rows = job._read_chunk(0, None, 100)
+    scored, failures = rescore_rows([(r[0], r[2], r[3], r[4]) for r in rows])
+    assert not failures and len(scored) == 4
+
+    # The same answers resubmitted before the chunk is written
+    template = questionnaire_registry.current().templates[AssessmentCategory.ETHICS]
+    ethics = {q["id"]: q["options"][-1]["value"] for q in template["questions"]}
+    response = client.post(f"/assessments/{assessment_id}/answers", json={"category": "ethics", "answers": ethics}, headers=headers)
+    assert response.status_code == 200 and response.json()["score"] == 100
+
+    updated, skipped, _ = job._write_chunk(rows, scored)
+    assert (updated, skipped) == (3, 1)
+    assert_rollups_match_results()
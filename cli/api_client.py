@@ -1,18 +1,47 @@
+import os
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterator, Tuple
 from cli.config import API_BASE_URL
 
 
 class APIClient:
     """Client for interacting with the AI Governance Assessor API"""
     
-    def __init__(self, token: Optional[str] = None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+        on_tokens_refreshed: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
         self.base_url = API_BASE_URL
         self.token = token
+        self.refresh_token = refresh_token
+        self.on_tokens_refreshed = on_tokens_refreshed
         self.headers = {"Content-Type": "application/json"}
         if token:
             self.headers["Authorization"] = f"Bearer {token}"
     
+    def _set_tokens(self, tokens: Dict[str, Any]):
+        self.token = tokens["access_token"]
+        self.refresh_token = tokens.get("refresh_token") or self.refresh_token
+        self.headers["Authorization"] = f"Bearer {self.token}"
+    
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send an authenticated request, refreshing the access token once on 401"""
+        send = getattr(requests, method)
+        
+        def headers():
+            # Multipart uploads set their own Content-Type
+            if "files" in kwargs:
+                return {k: v for k, v in self.headers.items() if k != "Content-Type"}
+            return self.headers
+        
+        response = send(f"{self.base_url}{path}", headers=headers(), **kwargs)
+        if response.status_code == 401 and self.refresh_token and self.refresh():
+            response = send(f"{self.base_url}{path}", headers=headers(), **kwargs)
+        response.raise_for_status()
+        return response
+    
     def login(self, email: str, password: str) -> Dict[str, Any]:
         """Login and get access token"""
         response = requests.post(
@@ -20,61 +49,132 @@ class APIClient:
             json={"email": email, "password": password}
         )
         response.raise_for_status()
-        return response.json()
+        tokens = response.json()
+        self._set_tokens(tokens)
+        return tokens
+    
+    def refresh(self) -> bool:
+        """Exchange the refresh token for a new token pair"""
+        if not self.refresh_token:
+            return False
+        response = requests.post(
+            f"{self.base_url}/auth/refresh",
+            json={"refresh_token": self.refresh_token}
+        )
+        if response.status_code != 200:
+            return False
+        tokens = response.json()
+        self._set_tokens(tokens)
+        if self.on_tokens_refreshed:
+            self.on_tokens_refreshed(tokens)
+        return True
     
-    def list_assessments(self) -> list:
-        """List all assessments"""
-        response = requests.get(
-            f"{self.base_url}/assessments",
+    def logout(self):
+        """Revoke the current access token and refresh token on the server"""
+        response = requests.post(
+            f"{self.base_url}/auth/logout",
+            json={"refresh_token": self.refresh_token},
             headers=self.headers
         )
         response.raise_for_status()
-        return response.json()
+    
+    def list_assessments(
+        self,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> list:
+        """List one page of assessments, newest first"""
+        return self._list_page(status, limit, cursor)[0]
+    
+    def iter_assessments(self, status: Optional[str] = None, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Yield every assessment, newest first, fetching pages only as they are consumed"""
+        cursor = None
+        while True:
+            page, cursor = self._list_page(status, page_size, cursor)
+            yield from page
+            if not cursor:
+                return
+    
+    def _list_page(self, status: Optional[str], limit: Optional[int], cursor: Optional[str]) -> Tuple[list, Optional[str]]:
+        params = {key: value for key, value in (("status", status), ("limit", limit), ("cursor", cursor)) if value}
+        response = self._request("get", "/assessments", params=params or None)
+        return response.json(), response.headers.get("X-Next-Cursor")
     
     def create_assessment(self, title: str, description: Optional[str] = None) -> Dict[str, Any]:
         """Create a new assessment"""
-        response = requests.post(
-            f"{self.base_url}/assessments",
-            json={"title": title, "description": description},
-            headers=self.headers
+        response = self._request(
+            "post",
+            "/assessments",
+            json={"title": title, "description": description}
         )
-        response.raise_for_status()
         return response.json()
     
     def get_assessment(self, assessment_id: int) -> Dict[str, Any]:
         """Get assessment details"""
-        response = requests.get(
-            f"{self.base_url}/assessments/{assessment_id}",
-            headers=self.headers
-        )
-        response.raise_for_status()
+        response = self._request("get", f"/assessments/{assessment_id}")
         return response.json()
     
     def get_summary(self, assessment_id: int) -> Dict[str, Any]:
         """Get assessment summary"""
-        response = requests.get(
-            f"{self.base_url}/assessments/{assessment_id}/summary",
-            headers=self.headers
+        response = self._request("get", f"/assessments/{assessment_id}/summary")
+        return response.json()
+    
+    def submit_answers(self, assessment_id: int, answers: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+        """Submit answers for several categories at once, returning their results and the summary"""
+        response = self._request(
+            "post",
+            f"/assessments/{assessment_id}/answers/bulk",
+            json={"answers": answers}
         )
-        response.raise_for_status()
         return response.json()
     
     def export_csv(self, assessment_id: int, output_file: str):
         """Export assessment as CSV"""
-        response = requests.get(
-            f"{self.base_url}/assessments/{assessment_id}/export/csv",
-            headers=self.headers
-        )
-        response.raise_for_status()
+        response = self._request("get", f"/assessments/{assessment_id}/export/csv")
         with open(output_file, 'wb') as f:
             f.write(response.content)
     
     def export_pdf(self, assessment_id: int, output_file: str):
         """Export assessment as PDF"""
-        response = requests.get(
-            f"{self.base_url}/assessments/{assessment_id}/export/pdf",
-            headers=self.headers
-        )
-        response.raise_for_status()
+        response = self._request("get", f"/assessments/{assessment_id}/export/pdf")
         with open(output_file, 'wb') as f:
             f.write(response.content)
+    
+    def start_rescore(
+        self,
+        schema_version: Optional[str] = None,
+        resume: bool = False,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Start rescoring stored results with the current scoring rules (admin only)"""
+        options = {"schema_version": schema_version, "resume": resume, "chunk_size": chunk_size, "workers": workers}
+        response = self._request(
+            "post",
+            "/assessments/admin/rescore",
+            json={key: value for key, value in options.items() if value is not None}
+        )
+        return response.json()
+    
+    def rescore_status(self) -> Dict[str, Any]:
+        """Progress of the current or last rescoring run (admin only)"""
+        response = self._request("get", "/assessments/admin/rescore")
+        return response.json()
+    
+    def stop_rescore(self) -> Dict[str, Any]:
+        """Stop the running rescoring job after its current chunk (admin only)"""
+        response = self._request("delete", "/assessments/admin/rescore")
+        return response.json()
+    
+    def bulk_import_users(self, input_file: str, format: Optional[str] = None) -> Dict[str, Any]:
+        """Create users from a CSV or NDJSON file (admin only)"""
+        with open(input_file, 'rb') as f:
+            content = f.read()
+        response = self._request(
+            "post",
+            "/auth/admin/users/bulk",
+            files={"file": (os.path.basename(input_file), content)},
+            params={"format": format} if format else None
+        )
+        return response.json()
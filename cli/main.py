@@ -8,8 +8,11 @@ import typer
 from rich.console import Console
 from rich.table import Table
 from rich import print as rprint
-from typing import Optional
+from typing import Optional, Dict, Any
+import itertools
+import json
 import os
+import time
 from cli.api_client import APIClient
 
 app = typer.Typer(help="AI Governance Assessor CLI")
@@ -19,27 +22,42 @@ console = Console()
 TOKEN_FILE = os.path.expanduser("~/.ai_governance_token")
 
 
-def get_stored_token() -> Optional[str]:
-    """Get stored authentication token"""
+def get_stored_tokens() -> Optional[Dict[str, Any]]:
+    """Get stored access and refresh tokens"""
     if os.path.exists(TOKEN_FILE):
         with open(TOKEN_FILE, 'r') as f:
-            return f.read().strip()
+            content = f.read().strip()
+        if not content:
+            return None
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            # Token files written before refresh tokens hold a bare access token
+            return {"access_token": content}
     return None
 
 
-def store_token(token: str):
-    """Store authentication token"""
-    with open(TOKEN_FILE, 'w') as f:
-        f.write(token)
+def store_tokens(tokens: Dict[str, Any]):
+    """Store access and refresh tokens, readable only by the current user"""
+    fd = os.open(TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump({
+            "access_token": tokens["access_token"],
+            "refresh_token": tokens.get("refresh_token"),
+        }, f)
 
 
 def get_client() -> APIClient:
     """Get authenticated API client"""
-    token = get_stored_token()
-    if not token:
+    tokens = get_stored_tokens()
+    if not tokens:
         console.print("[red]Not authenticated. Please run 'login' command first.[/red]")
         raise typer.Exit(1)
-    return APIClient(token)
+    return APIClient(
+        tokens["access_token"],
+        refresh_token=tokens.get("refresh_token"),
+        on_tokens_refreshed=store_tokens
+    )
 
 
 @app.command()
@@ -51,7 +69,7 @@ def login(
     try:
         client = APIClient()
         result = client.login(email, password)
-        store_token(result["access_token"])
+        store_tokens(result)
         console.print("[green]✓ Successfully logged in![/green]")
     except Exception as e:
         console.print(f"[red]Login failed: {str(e)}[/red]")
@@ -61,17 +79,30 @@ def login(
 @app.command()
 def logout():
     """Logout and clear stored credentials"""
+    tokens = get_stored_tokens()
+    if tokens:
+        try:
+            APIClient(tokens["access_token"], refresh_token=tokens.get("refresh_token")).logout()
+        except Exception as e:
+            # Still clear local credentials if the server is unreachable
+            console.print(f"[yellow]Could not revoke token on server: {str(e)}[/yellow]")
     if os.path.exists(TOKEN_FILE):
         os.remove(TOKEN_FILE)
     console.print("[green]✓ Successfully logged out![/green]")
 
 
 @app.command()
-def list():
-    """List all assessments"""
+def list(
+    status: Optional[str] = typer.Option(None, help="Only show draft, in_progress or completed assessments"),
+    limit: int = typer.Option(100, help="Maximum assessments to show (0 for all)"),
+    page_size: int = typer.Option(100, help="Assessments fetched per request")
+):
+    """List assessments, newest first"""
     try:
         client = get_client()
-        assessments = client.list_assessments()
+        # Pages are fetched lazily, so only as many as the limit needs are requested
+        pages = client.iter_assessments(status=status, page_size=min(page_size, limit) if limit else page_size)
+        assessments = [*itertools.islice(pages, limit or None)]
         
         if not assessments:
             console.print("[yellow]No assessments found.[/yellow]")
@@ -134,6 +165,40 @@ def show(assessment_id: int = typer.Argument(..., help="Assessment ID")):
         raise typer.Exit(1)
 
 
+@app.command()
+def answer(
+    assessment_id: int = typer.Argument(..., help="Assessment ID"),
+    input_file: str = typer.Argument(..., help="JSON file mapping each category to its question_id -> answer_value answers")
+):
+    """Submit answers for one or more categories"""
+    try:
+        with open(input_file) as f:
+            answers = json.load(f)
+        
+        client = get_client()
+        result = client.submit_answers(assessment_id, answers)
+        
+        table = Table(title=f"Submitted {len(result['results'])} categories")
+        table.add_column("Category", style="cyan")
+        table.add_column("Score", style="green")
+        table.add_column("Maturity", style="yellow")
+        
+        for category_result in result['results']:
+            table.add_row(
+                category_result['category'].replace('_', ' ').title(),
+                str(category_result['score']),
+                category_result['maturity_level'].title()
+            )
+        
+        console.print(table)
+        summary = result['summary']
+        console.print(f"[bold]Status:[/bold] {summary['assessment']['status']}")
+        console.print(f"[bold]Overall Score:[/bold] [green]{summary['overall_score']}[/green]")
+    except Exception as e:
+        console.print(f"[red]Failed to submit answers: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+
 @app.command()
 def report(assessment_id: int = typer.Argument(..., help="Assessment ID")):
     """Show assessment report summary"""
@@ -189,5 +254,85 @@ def export(
         raise typer.Exit(1)
 
 
+@app.command("import-users")
+def import_users(
+    input_file: str = typer.Argument(..., help="CSV or NDJSON file with email, password and full_name"),
+    format: Optional[str] = typer.Option(None, help="File format (csv or ndjson); detected from the extension by default")
+):
+    """Bulk create users (admin only)"""
+    try:
+        client = get_client()
+        result = client.bulk_import_users(input_file, format)
+        
+        console.print(f"[green]✓ Created {result['created']} of {result['total']} users[/green]")
+        
+        if result['failures']:
+            table = Table(title=f"{result['failed']} rows failed")
+            table.add_column("Row", style="cyan")
+            table.add_column("Email", style="yellow")
+            table.add_column("Error", style="red")
+            
+            for failure in result['failures']:
+                table.add_row(str(failure['row']), failure.get('email') or "", failure['error'])
+            
+            console.print(table)
+    except Exception as e:
+        console.print(f"[red]Failed to import users: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+
+@app.command()
+def rescore(
+    schema_version: Optional[str] = typer.Option(None, help="Only rescore assessments created with this questionnaire version"),
+    resume: bool = typer.Option(False, help="Continue an interrupted run from its checkpoint"),
+    chunk_size: Optional[int] = typer.Option(None, help="Results read, scored and written per chunk"),
+    workers: Optional[int] = typer.Option(None, help="Scoring processes on the server, 0 uses every core"),
+    wait: bool = typer.Option(True, help="Follow progress until the run finishes"),
+    stop: bool = typer.Option(False, help="Stop the running job instead of starting one")
+):
+    """Rescore stored results after scoring rules change (admin only)"""
+    try:
+        client = get_client()
+        if stop:
+            status = client.stop_rescore()
+            console.print(f"[yellow]Stopping after result {status['last_id']}; rerun with --resume to continue[/yellow]")
+            return
+        
+        status = client.start_rescore(schema_version, resume, chunk_size, workers)
+        while wait and status['status'] in ("running", "stopping"):
+            time.sleep(1)
+            status = client.rescore_status()
+            console.print(
+                f"{status['processed']}/{status['total']} results, {status['updated']} updated, "
+                f"{status['failed']} failed, {status['rows_per_second']} rows/s"
+            )
+        
+        if status['status'] == "failed":
+            console.print(f"[red]Rescoring failed after result {status['last_id']}: {status['error']}[/red]")
+            raise typer.Exit(1)
+        if not wait:
+            console.print("[green]✓ Rescoring started[/green]")
+            return
+        console.print(
+            f"[green]✓ Rescoring {status['status']}: {status['updated']} of {status['processed']} results updated "
+            f"in {status['elapsed_seconds']}s[/green]"
+        )
+        
+        if status['failures']:
+            table = Table(title=f"{status['failed']} results could not be rescored")
+            table.add_column("Result", style="cyan")
+            table.add_column("Error", style="red")
+            
+            for failure in status['failures']:
+                table.add_row(str(failure['id']), failure['error'])
+            
+            console.print(table)
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(f"[red]Failed to rescore: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+
 if __name__ == "__main__":
     app()
@@ -57,3 +57,76 @@ def test_create_assessment(mock_post):
     assert result["id"] == 1
     assert result["title"] == "New Assessment"
     mock_post.assert_called_once()
+
+
+@patch('cli.api_client.requests.post')
+@patch('cli.api_client.requests.get')
+def test_expired_token_refreshes_transparently(mock_get, mock_post):
+    """Test a 401 triggers one refresh and a retry with the new token"""
+    expired = Mock(status_code=401)
+    ok = Mock(status_code=200)
+    ok.json.return_value = []
+    mock_get.side_effect = [expired, ok]
+
+    refreshed = Mock(status_code=200)
+    refreshed.json.return_value = {"access_token": "new_token", "refresh_token": "new_refresh"}
+    mock_post.return_value = refreshed
+
+    saved = []
+    client = APIClient(token="old_token", refresh_token="old_refresh", on_tokens_refreshed=saved.append)
+    assert client.list_assessments() == []
+
+    mock_post.assert_called_once()
+    assert mock_post.call_args.kwargs["json"] == {"refresh_token": "old_refresh"}
+    assert mock_get.call_args.kwargs["headers"]["Authorization"] == "Bearer new_token"
+    assert client.refresh_token == "new_refresh"
+    assert saved[0]["access_token"] == "new_token"
+
+
+@patch('cli.api_client.requests.get')
+def test_iter_assessments_follows_cursor_lazily(mock_get):
+    """Test pages are requested only as results are consumed"""
+    first = Mock(status_code=200, headers={"X-Next-Cursor": "abc"})
+    first.json.return_value = [{"id": 3}, {"id": 2}]
+    second = Mock(status_code=200, headers={})
+    second.json.return_value = [{"id": 1}]
+    mock_get.side_effect = [first, second]
+
+    client = APIClient(token="test_token")
+    pages = client.iter_assessments(status="draft", page_size=2)
+    assert next(pages)["id"] == 3
+    assert mock_get.call_count == 1
+
+    assert [a["id"] for a in pages] == [2, 1]
+    assert mock_get.call_count == 2
+    assert mock_get.call_args.kwargs["params"] == {"status": "draft", "limit": 2, "cursor": "abc"}
+
+
+@patch('cli.api_client.requests.post')
+def test_submit_answers_uses_bulk_endpoint(mock_post):
+    """Test answers for several categories are sent in one request"""
+    mock_response = Mock(status_code=200)
+    mock_response.json.return_value = {"results": [], "summary": {}}
+    mock_post.return_value = mock_response
+
+    client = APIClient(token="test_token")
+    answers = {"data_privacy": {"dp_1": 10}, "ethics": {"eth_1": 5}}
+    client.submit_answers(7, answers)
+
+    mock_post.assert_called_once()
+    assert mock_post.call_args.args[0].endswith("/assessments/7/answers/bulk")
+    assert mock_post.call_args.kwargs["json"] == {"answers": answers}
+
+
+@patch('cli.api_client.requests.post')
+def test_start_rescore_sends_only_given_options(mock_post):
+    """Test rescoring options left unset fall back to the server defaults"""
+    mock_response = Mock(status_code=202)
+    mock_response.json.return_value = {"status": "running"}
+    mock_post.return_value = mock_response
+
+    client = APIClient(token="test_token")
+    assert client.start_rescore(schema_version="1.0", workers=4)["status"] == "running"
+
+    assert mock_post.call_args.args[0].endswith("/assessments/admin/rescore")
+    assert mock_post.call_args.kwargs["json"] == {"schema_version": "1.0", "resume": False, "workers": 4}
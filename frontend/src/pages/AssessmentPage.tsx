@@ -2,7 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import { assessmentAPI } from '../services/api';
-import type { Assessment, Questionnaire, Question } from '../types';
+import type { Assessment, BulkAnswersResponse, Questionnaire, Question } from '../types';
 
 const AssessmentPage: React.FC = () => {
     const { id } = useParams<{ id: string }>();
@@ -21,10 +21,9 @@ const AssessmentPage: React.FC = () => {
     const loadData = async () => {
         if (!token || !id) return;
         try {
-            const [assessmentData, questionnairesData] = await Promise.all([
-                assessmentAPI.getAssessment(token, parseInt(id)),
-                assessmentAPI.getQuestionnaires(),
-            ]);
+            // Questions come from the version the assessment is scored against
+            const assessmentData = await assessmentAPI.getAssessment(token, parseInt(id));
+            const questionnairesData = await assessmentAPI.getQuestionnaires(assessmentData.schema_version);
             setAssessment(assessmentData);
             setQuestionnaires(questionnairesData);
 
@@ -50,9 +49,20 @@ const AssessmentPage: React.FC = () => {
     const handleSubmit = async () => {
         if (!token || !id || !selectedCategory) return;
         try {
-            await assessmentAPI.submitAnswers(token, parseInt(id), selectedCategory, answers);
+            // The response carries the updated assessment, so no reload is needed
+            const { summary }: BulkAnswersResponse = await assessmentAPI.submitAnswersBulk(
+                token,
+                parseInt(id),
+                { [selectedCategory]: answers }
+            );
+            setAssessment(summary.assessment);
             setAnswers({});
-            loadData();
+
+            const answered = summary.assessment.results.map((r) => r.category);
+            const nextIncomplete = questionnaires.find((q) => !answered.includes(q.category));
+            if (nextIncomplete) {
+                setSelectedCategory(nextIncomplete.category);
+            }
         } catch (error) {
             console.error('Failed to submit answers:', error);
         }
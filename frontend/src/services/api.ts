@@ -42,8 +42,9 @@ export const authAPI = {
 
 // Assessment endpoints
 export const assessmentAPI = {
-    getQuestionnaires: async () => {
-        const response = await fetch(`${API_BASE_URL}/assessments/questionnaires`);
+    getQuestionnaires: async (schemaVersion?: string) => {
+        const query = schemaVersion ? `?schema_version=${encodeURIComponent(schemaVersion)}` : '';
+        const response = await fetch(`${API_BASE_URL}/assessments/questionnaires${query}`);
         if (!response.ok) throw new Error('Failed to fetch questionnaires');
         return response.json();
     },
@@ -90,6 +91,19 @@ export const assessmentAPI = {
         return response.json();
     },
 
+    submitAnswersBulk: async (token: string, assessmentId: number, answers: Record<string, Record<string, number>>) => {
+        const response = await fetch(`${API_BASE_URL}/assessments/${assessmentId}/answers/bulk`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${token}`,
+            },
+            body: JSON.stringify({ answers }),
+        });
+        if (!response.ok) throw new Error('Failed to submit answers');
+        return response.json();
+    },
+
     getSummary: async (token: string, assessmentId: number) => {
         const response = await fetch(`${API_BASE_URL}/assessments/${assessmentId}/summary`, {
             headers: { 'Authorization': `Bearer ${token}` },
@@ -40,6 +40,7 @@ export interface Question {
 }
 
 export interface Questionnaire {
+    schema_version: string;
     category: string;
     title: string;
     description: string;
@@ -52,3 +53,8 @@ export interface AssessmentSummary {
     overall_maturity: string;
     category_scores: Record<string, number>;
 }
+
+export interface BulkAnswersResponse {
+    results: AssessmentResult[];
+    summary: AssessmentSummary;
+}